@@ -0,0 +1,138 @@
+"""Local stand-in for the Lumos API, serving synthetic datasets of any size for benchmarks."""
+
+import json
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+from uuid import UUID
+
+APP_ID = str(UUID(int=1))
+
+
+def user(i: int) -> dict[str, Any]:
+    return {
+        "id": str(UUID(int=10**7 + i)),
+        "given_name": f"Given{i}",
+        "family_name": f"Family{i}",
+        "email": f"user{i}@example.com",
+    }
+
+
+def app(i: int) -> dict[str, Any]:
+    return {
+        "id": APP_ID if i == 0 else str(UUID(int=2 * 10**7 + i)),
+        "user_friendly_label": f"App {i}",
+        "app_class_id": "benchmark",
+        "instance_id": str(i),
+    }
+
+
+def permission(i: int) -> dict[str, Any]:
+    return {
+        "id": str(UUID(int=3 * 10**7 + i)),
+        "label": f"Permission {i}",
+        "app_id": APP_ID,
+        "app_class_id": "benchmark",
+        "request_config": {"request_fulfillment_config": {"time_based_access": ["12 hours", "7 days"]}},
+    }
+
+
+def group(i: int) -> dict[str, Any]:
+    return {
+        "id": str(UUID(int=4 * 10**7 + i)),
+        "name": f"Group {i}",
+        "description": f"Synthetic group {i}",
+        "app_id": APP_ID,
+        "source_app_id": APP_ID,
+        "integration_specific_id": str(i),
+    }
+
+
+def access_request(i: int) -> dict[str, Any]:
+    return {
+        "id": str(UUID(int=5 * 10**7 + i)),
+        "app_id": APP_ID,
+        "app_name": "App 0",
+        "status": "PENDING" if i % 3 else "COMPLETED",
+        "requested_at": f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00",
+        "expires_at": None,
+        "requester_user": user(i),
+        "supporter_user": None,
+        "target_user": user(i),
+        "requestable_permissions": [permission(i % 10)],
+    }
+
+
+# Rows are generated from their index on demand, so 100k-row datasets cost no memory up front
+DATASETS: dict[str, Callable[[int], dict[str, Any]]] = {
+    "/users": user,
+    "/appstore/apps": app,
+    "/appstore/requestable_permissions": permission,
+    "/groups": group,
+    "/appstore/access_requests": access_request,
+}
+
+
+class MockApi:
+    """Serves every list endpoint with `size` rows, paginated like the real API."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(size))
+        self.server.daemon_threads = True
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MockApi":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _handler(size: int) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self) -> None:
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            if row := DATASETS.get(url.path):
+                page = int(query.get("page", ["1"])[0])
+                page_size = int(query.get("size", ["100"])[0])
+                start = min((page - 1) * page_size, size)
+                end = min(start + page_size, size)
+                self._reply(
+                    {
+                        "items": [row(i) for i in range(start, end)],
+                        "total": size,
+                        "page": page,
+                        "size": page_size,
+                        "pages": -(-size // page_size),
+                    }
+                )
+            elif url.path == "/users/current":
+                self._reply(user(0))
+            else:
+                self._reply({"detail": "Not found"}, status=404)
+
+        def _reply(self, body: Any, status: int = 200) -> None:
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+
+    return Handler
@@ -0,0 +1,274 @@
+"""Benchmarks for CLI startup, `lumos list` latency, model parsing and memory use.
+
+Run them and save the results:
+
+    python benchmarks/run.py run --output results.json
+
+Compare two runs, failing when a benchmark got slower than the threshold allows:
+
+    python benchmarks/run.py compare baseline.json results.json --threshold 0.2
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import mock_api
+from mock_api import APP_ID, MockApi
+from tabulate import tabulate
+
+DEFAULT_SIZES = [100, 1_000, 10_000]
+LIST_COMMANDS = {
+    "users": ["list", "users"],
+    "apps": ["list", "apps"],
+    "groups": ["list", "groups"],
+    "permissions": ["list", "permissions", "--app", APP_ID],
+    "requests": ["list", "requests"],
+}
+DEFAULT_THRESHOLD = 0.2
+
+Results = dict[str, dict[str, Any]]
+
+
+def summarize(samples: list[float], unit: str) -> dict[str, Any]:
+    return {
+        "unit": unit,
+        "median": statistics.median(samples),
+        "min": min(samples),
+        "max": max(samples),
+        "samples": samples,
+    }
+
+
+def wall_time(args: list[str], env: dict[str, str] | None = None, stdin: str = "") -> float:
+    start = time.perf_counter()
+    subprocess.run(args, env=env, input=stdin, text=True, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def bench_startup(repeat: int) -> Results:
+    """Cold-start cost, measured in fresh interpreters."""
+    import_code = "import time; start = time.perf_counter(); import lumos.cli; print(time.perf_counter() - start)"
+    import_samples = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, "-c", import_code], capture_output=True, text=True, check=True)
+        import_samples.append(float(output.stdout))
+    version_samples = [wall_time([sys.executable, "-m", "lumos.cli", "--version"]) for _ in range(repeat)]
+    return {
+        "startup/import lumos.cli": summarize(import_samples, "s"),
+        "startup/lumos --version": summarize(version_samples, "s"),
+    }
+
+
+def bench_list(sizes: list[int], repeat: int) -> Results:
+    """End-to-end latency of fetching and printing every row, in a fresh process each time."""
+    results: Results = {}
+    with tempfile.TemporaryDirectory() as home:
+        Path(home, ".lumos-dev").write_text("benchmark")
+        for size in sizes:
+            with MockApi(size) as api:
+                env = {**os.environ, "HOME": home, "DEV_MODE": "1", "API_URL": api.url}
+                for name, command in LIST_COMMANDS.items():
+                    args = [sys.executable, "-m", "lumos.cli", "--no-cache", *command, "--no-paginate"]
+                    # Answer yes when asked to confirm fetching more than 5000 rows
+                    samples = [wall_time(args, env=env, stdin="y\n") for _ in range(repeat)]
+                    results[f"list {name}/{size}"] = summarize(samples, "s")
+                    print(f"  list {name} ({size} rows): {statistics.median(samples):.3f}s", file=sys.stderr)
+    return results
+
+
+def bench_memory(sizes: list[int]) -> Results:
+    """Peak memory allocated by Python while fetching every user and printing them as a table."""
+    import lumos.common.client
+    from lumos.common.cache import response_cache
+    from lumos.common.client import ApiClient
+    from lumos.common.index import local_index
+    from lumos.list_collections.cli import display
+
+    response_cache.enabled = False
+    local_index.enabled = False
+    lumos.common.client.confirm = lambda *args, **kwargs: True
+    results: Results = {}
+    for size in sizes:
+        with MockApi(size) as api:
+            os.environ.update({"DEV_MODE": "1", "API_URL": api.url, "API_KEY": "benchmark"})
+            client = ApiClient()
+            tracemalloc.start()
+            users, count, total = client.get_users(all=True)
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                display("users", users, count, total, page=1, page_size=count)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del users
+        results[f"memory get_all+display users/{size}"] = summarize([float(peak)], "bytes")
+        print(f"  get_all + display users ({size} rows): {peak / 1024 / 1024:.1f} MiB", file=sys.stderr)
+    return results
+
+
+def bench_parse(sizes: list[int], repeat: int) -> Results:
+    """Time and peak memory to turn pages of API results into models, as get_all does, without any HTTP."""
+    from lumos.common.models import AccessRequest, Permission, User
+
+    models = {
+        "users": (User, mock_api.user),
+        "permissions": (Permission, mock_api.permission),
+        "requests": (AccessRequest, mock_api.access_request),
+    }
+    results: Results = {}
+    for size in sizes:
+        for name, (model, make_row) in models.items():
+            pages = list(_pages(make_row, size))
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for page in pages:
+                    model.parse_list(page)
+                samples.append(time.perf_counter() - start)
+            del pages
+            # Pages are made one at a time here, like responses arriving, so only the models pile up
+            tracemalloc.start()
+            parsed = [row for page in _pages(make_row, size) for row in model.parse_list(page)]
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            del parsed
+            results[f"parse {name}/{size}"] = summarize(samples, "s")
+            results[f"memory parse {name}/{size}"] = summarize([float(peak)], "bytes")
+            print(
+                f"  parse {name} ({size} rows): {statistics.median(samples):.3f}s, {peak / 1024 / 1024:.1f} MiB",
+                file=sys.stderr,
+            )
+    return results
+
+
+def _pages(make_row: Callable[[int], dict[str, Any]], size: int) -> Iterator[list[dict[str, Any]]]:
+    from lumos.common.client import PAGE_SIZE
+
+    for start in range(0, size, PAGE_SIZE):
+        yield [make_row(i) for i in range(start, min(start + PAGE_SIZE, size))]
+
+
+def environment() -> dict[str, str]:
+    from lumos import __version__
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ""
+    return {
+        "lumos": __version__,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def run(args: argparse.Namespace) -> int:
+    results: Results = {}
+    if "startup" in args.only:
+        print("Measuring startup ...", file=sys.stderr)
+        results.update(bench_startup(args.repeat))
+    if "list" in args.only:
+        print("Measuring list commands ...", file=sys.stderr)
+        results.update(bench_list(args.sizes, args.repeat))
+    if "parse" in args.only:
+        print("Measuring model parsing ...", file=sys.stderr)
+        results.update(bench_parse(args.sizes, args.repeat))
+    if "memory" in args.only:
+        print("Measuring memory ...", file=sys.stderr)
+        results.update(bench_memory(args.sizes))
+    report = {"environment": environment(), "results": results}
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(tabulate([[name, format_value(r["median"], r["unit"])] for name, r in results.items()]))
+    print(f"\nResults written to {args.output}", file=sys.stderr)
+    return 0
+
+
+def compare(args: argparse.Namespace) -> int:
+    baseline = json.loads(args.baseline.read_text())["results"]
+    current = json.loads(args.current.read_text())["results"]
+    rows = []
+    regressions = 0
+    for name in sorted(baseline.keys() | current.keys()):
+        if name not in current or name not in baseline:
+            rows.append([name, "", "", "", "missing" if name in baseline else "new"])
+            continue
+        before, after = baseline[name]["median"], current[name]["median"]
+        change = (after - before) / before if before else 0.0
+        status = "ok"
+        if change > args.threshold:
+            status = "REGRESSION"
+            regressions += 1
+        elif change < -args.threshold:
+            status = "faster"
+        unit = current[name]["unit"]
+        rows.append([name, format_value(before, unit), format_value(after, unit), f"{change:+.1%}", status])
+    print(tabulate(rows, headers=["Benchmark", "Baseline", "Current", "Change", "Status"]))
+    if regressions:
+        print(f"\n{regressions} benchmarks regressed by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def format_value(value: float, unit: str) -> str:
+    if unit == "bytes":
+        return f"{value / 1024 / 1024:.1f} MiB"
+    return f"{value * 1000:.1f} ms"
+
+
+def parse_sizes(value: str) -> list[int]:
+    return [int(size) for size in value.split(",")]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument(
+        "--sizes",
+        type=parse_sizes,
+        default=DEFAULT_SIZES,
+        help="Comma-separated dataset sizes served by the mock API, e.g. 100,1000,100000",
+    )
+    run_parser.add_argument("--repeat", type=int, default=5, help="How many times to run each timing")
+    run_parser.add_argument(
+        "--only",
+        type=lambda value: value.split(","),
+        default=["startup", "list", "parse", "memory"],
+        help="Comma-separated benchmark groups to run: startup, list, parse, memory",
+    )
+    run_parser.add_argument("--output", type=Path, default=Path("benchmark-results.json"))
+    run_parser.set_defaults(func=run)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline", type=Path)
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Fail when a benchmark's median grows by more than this fraction",
+    )
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,29 +1,110 @@
 import os
+from pathlib import Path
 
-from click_extra import Context, echo, group, option, pass_context
+from click_extra import BadParameter, Choice, Context, echo, lazy_group, option, pass_context
+from click_extra import Path as PathType
 
 from lumos import __version__
-from lumos.common.client import ApiClient
+from lumos.common.cache import response_cache
+from lumos.common.dates import OUTPUT_FORMATS, date_renderer
 from lumos.common.helpers import authenticate
 from lumos.common.helpers import login as _login
 from lumos.common.helpers import logout as _logout
 from lumos.common.helpers import setup as _setup
+from lumos.common.index import local_index
+from lumos.common.keyhelpers import current_scope
 from lumos.common.logging import logdebug
+from lumos.common.metrics import metrics
+from lumos.common.profiling import profiler
 
-client = ApiClient()
 
-
-@group(
+# Subcommand groups are only imported when they're invoked, so quick commands like
+# `lumos logout` don't pay for loading the API client, models and their dependencies
+@lazy_group(
     context_settings={"help_option_names": ["-h", "--help"]},
     version=__version__,
+    lazy_subcommands={
+        "list": "lumos.list_collections.cli.list_group",
+        "request": "lumos.request.cli.request",
+        "sync": "lumos.sync.cli.sync",
+    },
 )
 @option("--debug", is_flag=True, help="Enable debug mode", hidden=True)
+@option("--no-cache", is_flag=True, help="Don't use cached responses or the index built by `lumos sync`")
+@option("--refresh", is_flag=True, help="Ignore cached apps, permissions and groups and fetch them again")
+@option("--tz", default=None, help="Timezone to show dates in, like Europe/London or UTC. Defaults to the local one.")
+@option(
+    "--date-format",
+    default="human",
+    type=Choice(OUTPUT_FORMATS),
+    help="Show dates for people (human), as ISO 8601 (iso) or as Unix timestamps (epoch)",
+)
+@option(
+    "--metrics-file",
+    default=None,
+    type=PathType(dir_okay=False, path_type=Path),
+    help="Append the timings of every API request to this file, one JSON line each, and summarize them at exit",
+)
+@option("--profile", is_flag=True, hidden=True, help="Profile the command and print where its time went")
+@option(
+    "--profile-file",
+    default=None,
+    hidden=True,
+    type=PathType(dir_okay=False, path_type=Path),
+    help="Profile the command and save the stats here, for pstats or snakeviz",
+)
 @pass_context
-def lumos(ctx: Context, debug: bool) -> None:
+def lumos(
+    ctx: Context,
+    debug: bool,
+    no_cache: bool,
+    refresh: bool,
+    tz: str | None,
+    date_format: str,
+    metrics_file: Path | None,
+    profile: bool,
+    profile_file: Path | None,
+) -> None:
     """Lumos CLI - Command line interface for Lumos"""
     if debug:
         os.environ["DEBUG"] = "1"
         logdebug("🐞 Debug mode enabled")
+    if metrics_file:
+        try:
+            metrics.open(metrics_file)
+        except OSError as e:
+            raise BadParameter(str(e), param_hint="--metrics-file") from e
+    if metrics_file or debug:
+        metrics.enabled = True
+        ctx.call_on_close(_print_metrics)
+    if profile or profile_file:
+        profiler.start()
+        ctx.call_on_close(lambda: _print_profile(profile_file))
+    response_cache.enabled = not no_cache
+    local_index.enabled = not no_cache
+    response_cache.refresh = refresh
+    try:
+        date_renderer.configure(tz, date_format)
+    except ValueError as e:
+        raise BadParameter(str(e), param_hint="--tz") from e
+
+
+def _print_profile(path: Path | None) -> None:
+    echo(profiler.stop(), err=True)
+    if not path:
+        return
+    try:
+        profiler.save(path)
+    except OSError as e:
+        echo(f"Couldn't save the profile: {e}", err=True)
+        return
+    echo(f"Profile saved to {path}", err=True)
+
+
+def _print_metrics() -> None:
+    metrics.close()
+    if summary := metrics.summary():
+        echo(summary, err=True)
 
 
 @lumos.command("whoami", help="Show information about the currently logged in user.")
@@ -31,7 +112,9 @@ def lumos(ctx: Context, debug: bool) -> None:
 @option("--id", "show_id", is_flag=True, help="Show the current user's ID only")
 @authenticate
 def whoami(username: bool, show_id: bool) -> None:
-    user = client.get_current_user()
+    from lumos.common.client import ApiClient
+
+    user = ApiClient().get_current_user()
     if username:
         echo(user.email)
         return
@@ -39,7 +122,7 @@ def whoami(username: bool, show_id: bool) -> None:
         echo(user.id)
         return
     msg = f" 💻 Logged in as {user.given_name} {user.family_name} ({user.email})"
-    if scope := os.environ.get("SCOPE"):
+    if scope := current_scope():
         msg += f" as {scope}"
     echo(msg)
     echo(f"Your ID is {user.id}, if you need to reference it")
@@ -79,18 +162,5 @@ def logout():
     echo(" 👋 Logged out!")
 
 
-# Import and register subcommands
-def register_subcommands():
-    """Register all subcommands after the main CLI group is defined"""
-    from lumos.list_collections.cli import list_group
-    from lumos.request.cli import request
-
-    lumos.add_command(request)
-    lumos.add_command(list_group, name="list")
-
-
-# Register subcommands at module load time
-register_subcommands()
-
 if __name__ == "__main__":
     lumos()
@@ -0,0 +1,357 @@
+import asyncio
+from collections import deque
+from collections.abc import AsyncIterator, Iterable
+from typing import Any
+from uuid import UUID
+
+try:
+    import httpx
+except ImportError as e:
+    raise ImportError("AsyncApiClient needs httpx. Install it with `pip install 'lumos[async]'`.") from e
+
+from lumos.common.client import MAX_RATE_LIMIT_RETRIES, ApiRequestsMixin, api_url, page_plan
+from lumos.common.errors import NotFoundError, error_for_status
+from lumos.common.jsonio import loads
+from lumos.common.keyhelpers import Credentials, current_credentials
+from lumos.common.models import AccessRequest, App, AppSetting, Group, Permission, SupportRequestStatus, User
+from lumos.common.ratelimit import RateLimiter, rate_limiter
+
+# Requests in flight at once, across every coroutine using the client
+MAX_CONCURRENCY = 20
+TIMEOUT = 30.0
+
+
+class AsyncApiClient(ApiRequestsMixin):
+    """Non-blocking Lumos API client for asyncio services.
+
+    Mirrors ApiClient, but raises LumosError subclasses instead of printing and exiting,
+    and never prompts. Responses aren't cached and `lumos sync`'s index isn't used, so
+    results are always fresh. Use it as an async context manager so connections are closed:
+
+        async with AsyncApiClient(api_key) as client:
+            statuses = await asyncio.gather(*(client.get_request_status(id) for id in ids))
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        url: str | None = None,
+        max_concurrency: int = MAX_CONCURRENCY,
+        timeout: float = TIMEOUT,
+        limiter: RateLimiter | None = rate_limiter,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url or api_url()
+        self.max_concurrency = max_concurrency
+        self._limiter = limiter
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._current_user_id: UUID | None = None
+        self._http = httpx.AsyncClient(
+            base_url=self.url,
+            headers=Credentials(api_key).headers if api_key else current_credentials().headers,
+            limits=httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency),
+            timeout=timeout,
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def get(self, endpoint: str, params: dict | None = None) -> Any:
+        return await self._request("GET", endpoint, params=params)
+
+    async def post(self, endpoint: str, body: dict[str, Any]) -> Any:
+        return await self._request("POST", endpoint, body=body)
+
+    async def delete(self, endpoint: str, params: dict | None = None) -> Any:
+        return await self._request("DELETE", endpoint, params=params)
+
+    async def get_paged(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        page_size: int = 100,
+        page: int = 1,
+    ) -> tuple[list[dict[str, Any]], int, int, int, int]:
+        response = await self.get(endpoint, params={**(params or {}), "size": page_size, "page": page})
+        if not response:
+            return [], 0, 0, 0, 0
+        return (
+            response["items"],
+            len(response["items"]),
+            int(response["total"]),
+            int(response["page"]),
+            int(response["pages"]),
+        )
+
+    async def iter_pages(
+        self, endpoint: str, params: dict | None = None, limit: int | None = None
+    ) -> AsyncIterator[list[dict[str, Any]]]:
+        """Yields every page of results in order, fetching the rest concurrently once the first says how many.
+
+        With `limit`, only the pages holding the first `limit` results are fetched.
+        """
+        page_size, max_pages = page_plan(limit)
+        results, _, total, _, pages = await self.get_paged(endpoint, params=params, page=1, page_size=page_size)
+        if total == 0:
+            return
+        if max_pages:
+            pages = min(pages, max_pages)
+        yield results[:limit]
+        # Results still wanted from the remaining pages, or None to take them all
+        remaining = limit - len(results) if limit else None
+        # Keep at most max_concurrency pages in flight so memory stays flat for large exports
+        in_flight: deque[asyncio.Task] = deque()
+        next_page = 2
+        try:
+            while (next_page <= pages or in_flight) and (remaining is None or remaining > 0):
+                while next_page <= pages and len(in_flight) < self.max_concurrency:
+                    page_request = self.get_paged(endpoint, params=params, page=next_page, page_size=page_size)
+                    in_flight.append(asyncio.ensure_future(page_request))
+                    next_page += 1
+                results = (await in_flight.popleft())[0]
+                yield results[:remaining]
+                if remaining is not None:
+                    remaining -= len(results)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    async def get_all(
+        self, endpoint: str, params: dict | None = None
+    ) -> tuple[list[dict[str, Any]], int, int, int, int]:
+        all_results: list[dict[str, Any]] = []
+        async for results in self.iter_pages(endpoint, params=params):
+            all_results.extend(results)
+        count = len(all_results)
+        return all_results, count, count, 1, 1
+
+    async def get_all_or_paged(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        all: bool = False,
+        page_size: int = 100,
+        page: int = 1,
+    ) -> tuple[list[dict[str, Any]], int, int, int, int]:
+        if all:
+            return await self.get_all(endpoint, params=params)
+        return await self.get_paged(endpoint, params=params, page_size=page_size, page=page)
+
+    async def get_current_user(self) -> User:
+        user = User(**await self.get("users/current"))
+        self._current_user_id = user.id
+        return user
+
+    async def get_current_user_id(self) -> UUID:
+        if self._current_user_id is None:
+            await self.get_current_user()
+        return self._current_user_id
+
+    async def get_appstore_app(self, id: UUID) -> App | None:
+        try:
+            return App(**await self.get(f"appstore/apps/{id}"))
+        except NotFoundError:
+            return None
+
+    async def get_appstore_app_setting(self, id: UUID) -> AppSetting:
+        return AppSetting(**await self.get(f"appstore/apps/{id}/settings"))
+
+    async def get_request_status(self, id: UUID) -> AccessRequest | None:
+        try:
+            return self._create_access_request(await self.get(f"appstore/access_requests/{id}"))
+        except NotFoundError:
+            return None
+
+    async def cancel_access_request(self, id: UUID, reason: str | None) -> None:
+        await self.delete(f"appstore/access_requests/{id}", {"reason": reason} if reason else {})
+
+    async def get_appstore_apps(
+        self,
+        name_search: str | None = None,
+        all: bool = False,
+        page_size: int = 100,
+        page: int = 1,
+    ) -> tuple[list[App], int, int]:
+        raw_apps, count, total, _, _ = await self.get_all_or_paged(
+            "appstore/apps", params=self._appstore_apps_params(name_search), all=all, page_size=page_size, page=page
+        )
+        return App.parse_list(raw_apps), count, total
+
+    async def iter_appstore_apps(self, name_search: str | None = None, limit: int | None = None) -> AsyncIterator[App]:
+        params = self._appstore_apps_params(name_search)
+        async for raw_apps in self.iter_pages("appstore/apps", params=params, limit=limit):
+            for app in App.parse_list(raw_apps):
+                yield app
+
+    async def get_my_apps(self, for_user: UUID | None = None) -> list[AccessRequest]:
+        access_requests, _, _, _, _ = await self.get_access_requests(
+            target_user_id=for_user or await self.get_current_user_id(),
+            status=SupportRequestStatus.PENDING_STATUSES + SupportRequestStatus.SUCCESS_STATUSES,
+            all=True,
+        )
+        return access_requests
+
+    async def get_access_requests(
+        self,
+        target_user_id: UUID | None = None,
+        status: Iterable[str] | None = None,
+        all: bool = False,
+        page_size: int = 100,
+        page: int = 1,
+        sort: str = "desc",
+    ) -> tuple[list[AccessRequest], int, int, int, int]:
+        raw_access_requests, count, total, page, pages = await self.get_all_or_paged(
+            "appstore/access_requests",
+            params=self._access_requests_params(target_user_id, status, sort),
+            all=all,
+            page=page,
+            page_size=page_size,
+        )
+        return AccessRequest.parse_list(raw_access_requests), count, total, page, pages
+
+    async def iter_access_requests(
+        self,
+        target_user_id: UUID | None = None,
+        status: Iterable[str] | None = None,
+        sort: str = "desc",
+        limit: int | None = None,
+    ) -> AsyncIterator[AccessRequest]:
+        params = self._access_requests_params(target_user_id, status, sort)
+        async for raw_access_requests in self.iter_pages("appstore/access_requests", params=params, limit=limit):
+            for access_request in AccessRequest.parse_list(raw_access_requests):
+                yield access_request
+
+    async def get_users(
+        self,
+        like: str | None = None,
+        all: bool = False,
+        page_size: int = 100,
+        page: int = 1,
+    ) -> tuple[list[User], int, int]:
+        raw_users, count, total, _, _ = await self.get_all_or_paged(
+            "users", params=self._users_params(like), all=all, page_size=page_size, page=page
+        )
+        return User.parse_list(raw_users), count, total
+
+    async def iter_users(self, like: str | None = None, limit: int | None = None) -> AsyncIterator[User]:
+        async for raw_users in self.iter_pages("users", params=self._users_params(like), limit=limit):
+            for user in User.parse_list(raw_users):
+                yield user
+
+    async def get_app_requestable_permissions(
+        self,
+        app_id: UUID,
+        search_term: str | None = None,
+        all: bool = False,
+        page_size: int = 100,
+        page: int = 1,
+    ) -> tuple[list[Permission], int, int]:
+        raw_permissions, count, total, _, _ = await self.get_all_or_paged(
+            "appstore/requestable_permissions",
+            params=self._requestable_permissions_params(app_id, search_term),
+            all=all,
+            page_size=page_size,
+            page=page,
+        )
+        return Permission.parse_list(raw_permissions), count, total
+
+    async def iter_app_requestable_permissions(
+        self, app_id: UUID | None, search_term: str | None = None, limit: int | None = None
+    ) -> AsyncIterator[Permission]:
+        params = self._requestable_permissions_params(app_id, search_term)
+        async for raw_permissions in self.iter_pages("appstore/requestable_permissions", params=params, limit=limit):
+            for permission in Permission.parse_list(raw_permissions):
+                yield permission
+
+    async def get_app_requestable_permission(self, permission_id: UUID) -> Permission | None:
+        try:
+            return Permission.model_validate(await self.get(f"appstore/requestable_permissions/{permission_id}"))
+        except NotFoundError:
+            return None
+
+    async def get_app_requestable_permissions_by_id(
+        self, permission_ids: Iterable[UUID]
+    ) -> dict[UUID, Permission | None]:
+        """Looks up many permissions concurrently, mapping IDs that don't exist to None."""
+        ids = list(dict.fromkeys(permission_ids))
+        permissions = await asyncio.gather(*(self.get_app_requestable_permission(id) for id in ids))
+        return dict(zip(ids, permissions, strict=True))
+
+    async def get_groups(
+        self,
+        app_id: UUID | None,
+        search_term: str | None = None,
+        all: bool = False,
+        page_size: int = 25,
+        page: int = 1,
+    ) -> tuple[list[Group], int, int]:
+        raw_groups, count, total, _, _ = await self.get_all_or_paged(
+            "groups", params=self._groups_params(app_id, search_term), all=all, page_size=page_size, page=page
+        )
+        return Group.parse_list(raw_groups), count, total
+
+    async def iter_groups(
+        self, app_id: UUID | None, search_term: str | None = None, limit: int | None = None
+    ) -> AsyncIterator[Group]:
+        params = self._groups_params(app_id, search_term)
+        async for raw_groups in self.iter_pages("groups", params=params, limit=limit):
+            for group in Group.parse_list(raw_groups):
+                yield group
+
+    async def create_access_request(
+        self,
+        app_id: UUID,
+        note: str,
+        expiration_in_seconds: int | None,
+        permission_ids: list[UUID] | None = None,
+        target_user_id: UUID | None = None,
+    ) -> AccessRequest | None:
+        body = self._access_request_body(app_id, note, expiration_in_seconds, permission_ids, target_user_id)
+        response = await self.post("appstore/access_request", body)
+        return AccessRequest(**response[0]) if response else None
+
+    async def _request(
+        self,
+        method: str,
+        endpoint: str,
+        params: dict | None = None,
+        body: dict | None = None,
+    ) -> Any:
+        """Sends a request, riding out rate limits, and raises a LumosError for any error status."""
+        async with self._semaphore:
+            attempt = 0
+            while True:
+                if self._limiter and (wait := self._limiter.reserve()) > 0:
+                    await asyncio.sleep(wait)
+                response = await self._http.request(method, f"/{endpoint}", params=params, json=body)
+                if response.status_code != 429:
+                    if self._limiter:
+                        self._limiter.record_success(response.headers)
+                    break
+                attempt += 1
+                if attempt > MAX_RATE_LIMIT_RETRIES:
+                    break
+                if self._limiter:
+                    # The next reserve() waits until every caller may resume
+                    self._limiter.record_rate_limited(response.headers, attempt)
+                else:
+                    await asyncio.sleep(min(2.0 ** (attempt - 1), 60.0))
+        if response.is_success:
+            return None if response.status_code == 204 else loads(response.content)
+        raise error_for_status(response.status_code, _detail(response))
+
+
+def _detail(response: httpx.Response) -> str | None:
+    try:
+        body = loads(response.content)
+    except ValueError:
+        return None
+    detail = body.get("detail") if isinstance(body, dict) else None
+    return str(detail) if detail else None
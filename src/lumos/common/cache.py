@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import re
+import time
+from collections.abc import Mapping
+from contextlib import suppress
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from lumos.common.jsonio import dumps, loads
+from lumos.common.keyhelpers import cache_dir_path, current_credentials
+from lumos.common.logging import logdebug
+
+# How long, in seconds, a cached response is used without asking the server. Endpoints with
+# a TTL of 0 change often, so their responses are only kept for conditional requests.
+CACHE_TTLS: list[tuple[re.Pattern[str], int]] = [
+    (re.compile(r"^appstore/apps$"), 60 * 60),
+    (re.compile(r"^appstore/apps/[^/]+$"), 60 * 60),
+    (re.compile(r"^appstore/apps/[^/]+/settings$"), 15 * 60),
+    (re.compile(r"^appstore/requestable_permissions(/[^/]+)?$"), 15 * 60),
+    (re.compile(r"^groups$"), 15 * 60),
+    (re.compile(r"^appstore/access_requests(/[^/]+)?$"), 0),
+    (re.compile(r"^users$"), 0),
+]
+# Least recently used entries are dropped past this many
+MAX_ENTRIES = 500
+# Writes between evictions, which list and stat the whole directory. The first write of a
+# run always evicts, so short commands keep the cache in check too.
+EVICT_EVERY = 100
+
+
+@dataclass
+class CacheEntry:
+    path: Path
+    payload: Any
+    fresh: bool
+    etag: str | None = None
+    last_modified: str | None = None
+
+    def conditional_headers(self) -> dict[str, str] | None:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers or None
+
+
+class ResponseCache:
+    """On-disk cache of GET responses, keyed by API, endpoint, parameters and API key."""
+
+    def __init__(self, directory: Path | None = None, max_entries: int = MAX_ENTRIES, evict_every: int = EVICT_EVERY):
+        self._directory = directory
+        self.max_entries = max_entries
+        self.evict_every = evict_every
+        self._writes = 0
+        # --no-cache turns off reads and writes, --refresh only skips reads
+        self.enabled = True
+        self.refresh = False
+
+    @property
+    def directory(self) -> Path:
+        return self._directory or cache_dir_path()
+
+    def ttl(self, endpoint: str) -> int | None:
+        for pattern, ttl in CACHE_TTLS:
+            if pattern.match(endpoint):
+                return ttl
+        return None
+
+    def caches(self, endpoint: str) -> bool:
+        return self.enabled and self.ttl(endpoint) is not None
+
+    def lookup(self, url: str, endpoint: str, params: dict[str, Any]) -> CacheEntry | None:
+        """Returns the cached response, even a stale one, as long as it can still be revalidated."""
+        if not self.enabled or self.refresh or (ttl := self.ttl(endpoint)) is None:
+            return None
+        path = self._path(url, endpoint, params)
+        try:
+            raw_entry = loads(path.read_bytes())
+        except (OSError, ValueError):
+            return None
+        entry = CacheEntry(
+            path=path,
+            payload=raw_entry["payload"],
+            fresh=time.time() - raw_entry["stored_at"] < ttl,
+            etag=raw_entry.get("etag"),
+            last_modified=raw_entry.get("last_modified"),
+        )
+        if not entry.fresh and not entry.conditional_headers():
+            return None
+        # Touch the entry so eviction drops the least recently used ones first. Another
+        # process may have evicted it since it was read, which doesn't stop it being used.
+        with suppress(OSError):
+            os.utime(path)
+        return entry
+
+    def put(
+        self,
+        url: str,
+        endpoint: str,
+        params: dict[str, Any],
+        payload: Any,
+        headers: Mapping[str, str] | None = None,
+    ) -> None:
+        if not self.enabled or payload is None or (ttl := self.ttl(endpoint)) is None:
+            return
+        etag = headers.get("ETag") if headers else None
+        last_modified = headers.get("Last-Modified") if headers else None
+        if ttl == 0 and not etag and not last_modified:
+            return
+        self._write(
+            self._path(url, endpoint, params),
+            {
+                "endpoint": endpoint,
+                "stored_at": time.time(),
+                "etag": etag,
+                "last_modified": last_modified,
+                "payload": payload,
+            },
+        )
+
+    def touch(self, entry: CacheEntry) -> None:
+        """Marks an entry as fresh again after the server confirmed it hasn't changed."""
+        try:
+            raw_entry = loads(entry.path.read_bytes())
+        except (OSError, ValueError):
+            return
+        raw_entry["stored_at"] = time.time()
+        self._write(entry.path, raw_entry)
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def _path(self, url: str, endpoint: str, params: dict[str, Any]) -> Path:
+        # The key's fingerprint covers its scope, and keeps each key's responses apart
+        fingerprint = current_credentials().fingerprint
+        key = json.dumps([url, endpoint, params, fingerprint], sort_keys=True, default=str)
+        return self.directory / f"{hashlib.sha256(key.encode()).hexdigest()}.json"
+
+    def _write(self, path: Path, raw_entry: dict[str, Any]) -> None:
+        try:
+            path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{os.getpid()}.{id(raw_entry)}.tmp")
+            tmp_path.write_text(dumps(raw_entry), encoding="utf-8")
+            tmp_path.replace(path)
+            if self._writes % self.evict_every == 0:
+                self._evict(path.parent)
+            self._writes += 1
+        except OSError as e:
+            logdebug(f"CACHE: could not write {path}: {e}")
+
+    def _evict(self, directory: Path) -> None:
+        entries = list(directory.glob("*.json"))
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda p: p.stat().st_mtime)
+        for path in entries[: len(entries) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+
+response_cache = ResponseCache()
@@ -1,17 +1,24 @@
 import os
+import threading
 import time
-import webbrowser
 from abc import abstractmethod
-from typing import Any, ClassVar
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, ClassVar
 from uuid import UUID
 
-import requests
 from click_extra import confirm, echo
 
 from lumos import __version__
-from lumos.common.client_helpers import check_version_header
-from lumos.common.keyhelpers import write_key
-from lumos.common.logging import logdebug_request, logdebug_response
+from lumos.common.cache import response_cache
+from lumos.common.client_helpers import check_version_header, connection_stats
+from lumos.common.index import local_index
+from lumos.common.jsonio import loads
+from lumos.common.keyhelpers import current_credentials, current_scope, write_key
+from lumos.common.logging import debug_enabled, logdebug, logdebug_request, logdebug_response
+from lumos.common.memo import Memo, MemoKey
+from lumos.common.metrics import metrics, reset_connection_times, timed_adapter
 from lumos.common.models import (
     AccessRequest,
     App,
@@ -21,19 +28,107 @@ from lumos.common.models import (
     SupportRequestStatus,
     User,
 )
+from lumos.common.profiling import phase
+from lumos.common.ratelimit import rate_limiter
+
+if TYPE_CHECKING:
+    import requests
+
+# Number of keep-alive connections kept open per host
+POOL_MAXSIZE = 10
+# Page size used when fetching every result
+PAGE_SIZE = 100
+# Default number of pages fetched at once by get_all
+MAX_CONCURRENCY = 4
+# How many 429s in a row a single request rides out before giving up
+MAX_RATE_LIMIT_RETRIES = 10
+
+# Lookups ApiClient remembers for the rest of the process. TTLs match the response cache's.
+CURRENT_USER: MemoKey[User] = MemoKey("current_user")
+APP: MemoKey[App | None] = MemoKey("app", ttl=60 * 60)
+APP_SETTING: MemoKey[AppSetting] = MemoKey("app_setting", ttl=15 * 60)
+PERMISSION: MemoKey[Permission | None] = MemoKey("permission", ttl=15 * 60)
+# Changed by our own writes, so forgotten whenever a request is made or cancelled
+MY_APPS: MemoKey[list[AccessRequest]] = MemoKey("my_apps", ttl=60)
+
+
+class LoginRequired(SystemExit):
+    """A 401 on a thread other than the main one, which can't log in again.
+
+    Logging in prompts and opens a browser, so only the main thread does it. Code that
+    hands API calls to other threads catches this and makes the call again itself.
+    Anywhere else it exits like any other failed request.
+    """
+
+
+def page_plan(limit: int | None) -> tuple[int, int | None]:
+    """Page size and page count that fetch at least `limit` results in as few, and as small, pages as possible."""
+    if not limit:
+        return PAGE_SIZE, None
+    pages = -(-limit // PAGE_SIZE)
+    return -(-limit // pages), pages
+
+
+def api_url() -> str:
+    if os.environ.get("DEV_MODE") and (url := os.environ.get("API_URL")):
+        return url
+    return "https://api.lumos.com"
 
 
 class BaseClient:
     url: str
+    max_concurrency: int = MAX_CONCURRENCY
+    _session: ClassVar["requests.Session | None"] = None
+    _session_lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(self, url: str):
         self.url = url
 
-    def get(self, endpoint: str, params: dict | None = None):
-        """Function to call an API endpoint and return the response."""
+    @property
+    def session(self) -> "requests.Session":
+        """Keep-alive session shared by every client in the process."""
+        if BaseClient._session is None:
+            with BaseClient._session_lock:
+                if BaseClient._session is None:
+                    # requests is imported on first use so commands that never call the API start faster
+                    import requests
+
+                    session = requests.Session()
+                    adapter = timed_adapter(pool_connections=POOL_MAXSIZE, pool_maxsize=POOL_MAXSIZE)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    BaseClient._session = session
+        return BaseClient._session
+
+    def get(self, endpoint: str, params: dict | None = None, missing_ok: bool = False):
+        """Function to call an API endpoint and return the response.
+
+        With `missing_ok`, a 404 returns None instead of exiting.
+        """
         if params is None:
             params = {}
-        return self._send_request("GET", endpoint, params=params)
+        entry = response_cache.lookup(self.url, endpoint, params)
+        if entry and entry.fresh:
+            logdebug(f"CACHE: hit for {endpoint}")
+            return entry.payload
+        # A stale copy can still be reused if the server says it hasn't changed
+        response = self._request(
+            "GET",
+            endpoint,
+            params=params,
+            headers=entry.conditional_headers() if entry else None,
+            cache_status="miss" if response_cache.caches(endpoint) else None,
+            missing_ok=missing_ok,
+        )
+        if response.status_code == 404:
+            return None
+        if response.status_code == 304 and entry:
+            response_cache.touch(entry)
+            return entry.payload
+        with phase("parse"):
+            payload = None if response.status_code == 204 else loads(response.content)
+        response_cache.put(self.url, endpoint, params, payload, response.headers)
+        return payload
 
     def get_paged(
         self,
@@ -57,34 +152,83 @@ class BaseClient:
             )
         return [], 0, 0, 0, 0
 
-    def get_all(
+    def iter_pages(
         self,
         endpoint: str,
         params: dict | None = None,
-    ) -> tuple[list[dict[str, Any]], int, int, int, int]:
-        """Function to call an API endpoint and return all the results."""
+        limit: int | None = None,
+    ) -> Iterator[list[dict[str, Any]]]:
+        """Function to call an API endpoint and yield every page of results, in order.
+
+        With `limit`, only the pages holding the first `limit` results are fetched, sized
+        so that a small limit costs a single small request.
+        """
         if params is None:
             params = {}
+        page_size, max_pages = page_plan(limit)
+        results, _, total, _, pages = self.get_paged(endpoint, params=params, page=1, page_size=page_size)
+        if total == 0:
+            return
+        if max_pages:
+            pages = min(pages, max_pages)
+        if (
+            pages > 1
+            and min(total, limit or total) > 5000
+            and not confirm(
+                f"Warning: {total} results found. This may take a while. Do you want to continue?",
+                default=True,
+            )
+        ):
+            raise SystemExit(1)
+        yield results[:limit]
+        if pages <= 1:
+            return
+        # Results still wanted from the remaining pages, or None to take them all
+        remaining = limit - len(results) if limit else None
+
+        # The first page tells us how many there are, so fetch the rest in parallel, keeping
+        # at most max_concurrency pages in flight so memory stays flat for large exports
+        def fetch(page: int) -> list[dict[str, Any]]:
+            return self.get_paged(endpoint, params=params, page=page, page_size=page_size)[0]
+
+        executor = ThreadPoolExecutor(max_workers=min(self.max_concurrency, pages - 1))
+        in_flight: deque[tuple[int, Future[list[dict[str, Any]]]]] = deque()
+        next_page = 2
+        try:
+            while next_page <= pages and len(in_flight) < self.max_concurrency:
+                in_flight.append((next_page, executor.submit(fetch, next_page)))
+                next_page += 1
+            while in_flight and (remaining is None or remaining > 0):
+                page, future = in_flight.popleft()
+                with phase("fetch"):
+                    try:
+                        results = future.result()
+                    except LoginRequired:
+                        # A worker can't log in again, but this thread may be able to
+                        results = fetch(page)
+                if next_page <= pages:
+                    in_flight.append((next_page, executor.submit(fetch, next_page)))
+                    next_page += 1
+                yield results[:remaining]
+                if remaining is not None:
+                    remaining -= len(results)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def get_all(
+        self,
+        endpoint: str,
+        params: dict | None = None,
+        parse: Callable[[list[dict[str, Any]]], list[Any]] | None = None,
+    ) -> tuple[list[Any], int, int, int, int]:
+        """Function to call an API endpoint and return all the results.
+
+        With `parse`, each page is turned into models as it arrives, so its raw JSON
+        can be freed before the next one instead of holding both for every row.
+        """
         all_results: list[Any] = []
-        page = 1
-        while True:
-            results, _, total, _, pages = self.get_paged(endpoint, params=params, page=page, page_size=100)
-            if total == 0:
-                break
-            all_results.extend(results)
-            if page == pages:
-                break
-            if (
-                page == 1
-                and total > 5000
-                and not confirm(
-                    f"Warning: {total} results found. This may take a while. Do you want to continue?",
-                    default=True,
-                )
-            ):
-                raise SystemExit(1)
-            page += 1
-            time.sleep(0.15)
+        for results in self.iter_pages(endpoint, params=params):
+            all_results.extend(parse(results) if parse else results)
         count = len(all_results)
         return all_results, count, count, 1, 1
 
@@ -95,13 +239,15 @@ class BaseClient:
         all: bool = False,
         page_size: int = 100,
         page: int = 1,
-    ) -> tuple[list[dict[str, Any]], int, int, int, int]:
+        parse: Callable[[list[dict[str, Any]]], list[Any]] | None = None,
+    ) -> tuple[list[Any], int, int, int, int]:
         if params is None:
             params = {}
         """Function to call an API endpoint and return all the results."""
         if all:
-            return self.get_all(endpoint, params=params)
-        return self.get_paged(endpoint, params=params, page_size=page_size, page=page)
+            return self.get_all(endpoint, params=params, parse=parse)
+        results, count, total, page, pages = self.get_paged(endpoint, params=params, page_size=page_size, page=page)
+        return parse(results) if parse else results, count, total, page, pages
 
     def post(self, endpoint: str, body: dict[str, Any]):
         """Function to call an API endpoint and return the response."""
@@ -118,34 +264,79 @@ class BaseClient:
         endpoint: str,
         body: dict | None = None,
         params: dict | None = None,
-        retry: int = 0,
     ):
+        response = self._request(method, endpoint, body, params)
+        if response.status_code == 204:
+            return None
+        with phase("parse"):
+            return loads(response.content)
+
+    def _request(
+        self,
+        method: str,
+        endpoint: str,
+        body: dict | None = None,
+        params: dict | None = None,
+        headers: dict[str, str] | None = None,
+        cache_status: str | None = None,
+        retry: int = 0,
+        missing_ok: bool = False,
+    ) -> "requests.Response":
+        """Sends a request, retrying on rate limits and expired logins, and exits on any error."""
         if params is None:
             params = {}
         if retry > 3:
             echo("Too many retries. Exiting.", err=True)
             raise SystemExit(1)
-        url, headers = self._get_url_and_headers(endpoint)
-        logdebug_request(url, headers, body, params, method)
+        url, default_headers = self._get_url_and_headers(endpoint)
+        request_headers = {**default_headers, **headers} if headers else default_headers
+        logdebug_request(url, request_headers, body, params, method)
+
+        rate_limited = 0
+        while True:
+            waited = rate_limiter.acquire()
+            reset_connection_times()
+            started_at = time.time()
+            start = time.perf_counter()
+            with phase("fetch"):
+                response = self.session.request(method, url, headers=request_headers, json=body, params=params)
+            metrics.record_response(
+                method,
+                endpoint,
+                response,
+                started_at=started_at,
+                wait=waited,
+                total=time.perf_counter() - start,
+                rate_limited=rate_limited,
+                retry=retry,
+                cache=cache_status,
+            )
 
-        response = requests.request(method, url, headers=headers, json=body, params=params)
+            logdebug_response(response, cache_status)
+            if debug_enabled():
+                # Walks every connection pool, so only when someone will see it
+                opened, reused = connection_stats(self.session)
+                logdebug(f"CONNECTIONS: {opened} opened, {reused} reused")
 
-        logdebug_response(response)
+            if response.status_code != 429:
+                rate_limiter.record_success(response.headers)
+                break
+            rate_limited += 1
+            if rate_limited > MAX_RATE_LIMIT_RETRIES:
+                echo("Too many retries. Exiting.", err=True)
+                raise SystemExit(1)
+            delay = rate_limiter.record_rate_limited(response.headers, rate_limited)
+            echo(f"We're being rate limited. Waiting {delay:.1f}s.", err=True)
 
         if not check_version_header(response):
             raise SystemExit(1)
 
         if response.ok:
-            if response.status_code == 204:
-                return None
-            return response.json()
-        if response.status_code == 429:
-            echo("We're being rate limited. Waiting a sec.", err=True)
-            retry += 1
-            time.sleep(retry)
-            return self._send_request(method, endpoint, body, params, retry)
+            return response
         if response.status_code == 401:
-            if retry > 1 or not (scope := os.environ.get("SCOPE")):
+            if threading.current_thread() is not threading.main_thread():
+                raise LoginRequired("Something went wrong with authorization. Try logging in again.")
+            if retry > 1 or not (scope := current_scope()):
                 echo(
                     "Something went wrong with authorization. Try logging in again.",
                     err=True,
@@ -156,12 +347,14 @@ class BaseClient:
                 err=True,
             )
             AuthClient().authenticate(scope == "admin")
-            return self._send_request(method, endpoint, body, params, retry + 1)
+            return self._request(method, endpoint, body, params, headers, cache_status, retry + 1, missing_ok)
         if response.status_code == 403:
             echo("You don't have permission to do that.", err=True)
             raise SystemExit(1)
 
         if response.status_code == 404:
+            if missing_ok:
+                return response
             echo("Not found.", err=True)
             raise SystemExit(1)
 
@@ -174,7 +367,7 @@ class BaseClient:
         raise SystemExit(1)
 
     @abstractmethod
-    def _get_url_and_headers(self, endpoint: str) -> tuple[str, dict[str, str]]:
+    def _get_url_and_headers(self, endpoint: str) -> tuple[str, Mapping[str, str]]:
         pass
 
 
@@ -191,7 +384,7 @@ class AuthClient(BaseClient):
             auth_url = os.environ.get("AUTH_URL")
         super().__init__(auth_url or "https://b.app.lumosidentity.com")
 
-    def _get_url_and_headers(self, endpoint: str) -> tuple[str, dict[str, str]]:
+    def _get_url_and_headers(self, endpoint: str) -> tuple[str, Mapping[str, str]]:
         return f"{self.url}/b/oauth/{endpoint}", self.HEADERS
 
     def _get_client_id(self) -> str:
@@ -214,7 +407,7 @@ class AuthClient(BaseClient):
         }
         logdebug_request(url, headers, None, params, "POST")
 
-        response = requests.post(url, headers=headers, params=params)
+        response = self.session.post(url, headers=headers, params=params)
         if not check_version_header(response):
             raise SystemExit(1)
 
@@ -232,6 +425,8 @@ class AuthClient(BaseClient):
             if "localhost:3000" in verification_uri_complete:
                 verification_uri_complete = verification_uri_complete.replace("localhost:3000", "localhost:8080")
 
+        import webbrowser
+
         webbrowser.open(verification_uri_complete)
 
         token_data = {
@@ -252,7 +447,7 @@ class AuthClient(BaseClient):
                 " ⏰ Waiting" + ("." * (wait % 10)) + (" " * (10 - (wait % 10))),
                 end="\r",
             )
-            token_response = requests.post(token_url, headers=headers, data=token_data)
+            token_response = self.session.post(token_url, headers=headers, data=token_data)
             if token_response.status_code == 400:
                 echo(f"Bad request: {token_response.json()}")
                 raise SystemExit(1)
@@ -271,49 +466,112 @@ class AuthClient(BaseClient):
         write_key(token, scope)
 
 
-class ApiClient(BaseClient):
-    def __init__(self):
-        api_url: str | None = None
-        if os.environ.get("DEV_MODE"):
-            api_url = os.environ.get("API_URL")
-        super().__init__(api_url or "https://api.lumos.com")
-
-    def _get_url_and_headers(self, endpoint: str) -> tuple[str, dict[str, str]]:
-        api_key = os.environ.get("API_KEY")
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Accept": "application/json",
-            "User-Agent": f"lumos-cli/{__version__}",
+class ApiRequestsMixin:
+    """Query parameters, request bodies and response parsing shared by ApiClient and AsyncApiClient."""
+
+    def _create_access_request(self, raw_request: dict | None) -> AccessRequest | None:
+        if not raw_request:
+            return None
+        return AccessRequest.model_validate(raw_request)
+
+    def _appstore_apps_params(self, name_search: str | None) -> dict[str, Any]:
+        params: dict[str, Any] = {}
+        if name_search:
+            params["name_search"] = name_search
+        return params
+
+    def _access_requests_params(
+        self,
+        target_user_id: UUID | None,
+        status: Iterable[str] | None,
+        sort: str = "desc",
+    ) -> dict[str, Any]:
+        params: dict[str, Any] = {"sort": sort}
+        if target_user_id:
+            params["target_user_id"] = str(target_user_id)
+        statuses = sorted({str(s) for s in status or []})
+        # Asking for every status is the same as not filtering, and lets the server skip it.
+        # Sorted so the same filter always makes the same cache key.
+        if statuses and not set(SupportRequestStatus.ALL_STATUSES) <= set(statuses):
+            params["statuses"] = statuses
+        return params
+
+    def _users_params(self, like: str | None) -> dict[str, Any]:
+        params: dict[str, Any] = {}
+        if like:
+            params["search_term"] = like
+        return params
+
+    def _requestable_permissions_params(self, app_id: UUID | None, search_term: str | None) -> dict[str, Any]:
+        params: dict[str, Any] = {"in_app_store": True}
+        if app_id:
+            params["app_id"] = str(app_id)
+        if search_term:
+            params["search_term"] = search_term
+        return params
+
+    def _groups_params(self, app_id: UUID | None, search_term: str | None) -> dict[str, Any]:
+        params: dict[str, Any] = {}
+        if app_id:
+            params["app_id"] = str(app_id)
+        if search_term:
+            params["name"] = search_term
+        return params
+
+    def _access_request_body(
+        self,
+        app_id: UUID,
+        note: str,
+        expiration_in_seconds: int | None,
+        permission_ids: list[UUID] | None,
+        target_user_id: UUID | None,
+    ) -> dict[str, Any]:
+        body: dict[str, Any] = {
+            "app_id": str(app_id),
+            "note": note,
         }
-        return f"{self.url}/{endpoint}", headers
+        if permission_ids:
+            body["requestable_permission_ids"] = [str(p) for p in permission_ids]
+        if expiration_in_seconds:
+            body["expiration_in_seconds"] = expiration_in_seconds
+        if target_user_id:
+            body["target_user_id"] = str(target_user_id)
+        return body
+
+
+class ApiClient(ApiRequestsMixin, BaseClient):
+    def __init__(self):
+        super().__init__(api_url())
+        self.memo = Memo()
+
+    def _get_url_and_headers(self, endpoint: str) -> tuple[str, Mapping[str, str]]:
+        return f"{self.url}/{endpoint}", current_credentials().headers
 
     def get_current_user_id(self) -> UUID:
-        if not os.environ.get("USER_ID"):
-            user = self.get_current_user()
-            os.environ["USER_ID"] = str(user.id)
-            return user.id
-        return UUID(os.environ["USER_ID"])
+        return self.get_current_user().id
 
     def get_current_user(self) -> User:
+        return self.memo.get(CURRENT_USER, None, self._get_current_user)
+
+    def _get_current_user(self) -> User:
         user = self.get("users/current")
         if user:
-            os.environ["USER_ID"] = user["id"]
             return User(**user)
         echo("You are not logged in", err=True)
         raise SystemExit(1)
 
     def get_appstore_app(self, id: UUID) -> App | None:
-        raw_app = self.get(f"appstore/apps/{id}")
-        if raw_app:
-            return App(**raw_app)
-        return None
+        def load() -> App | None:
+            raw_app = self.get(f"appstore/apps/{id}")
+            return App(**raw_app) if raw_app else None
+
+        return self.memo.get(APP, id, load)
 
     def get_appstore_app_setting(self, id: UUID) -> AppSetting:
-        raw_setting = self.get(f"appstore/apps/{id}/settings")
-        return AppSetting(**raw_setting)
+        return self.memo.get(APP_SETTING, id, lambda: AppSetting(**self.get(f"appstore/apps/{id}/settings")))
 
-    def get_request_status(self, id: UUID) -> AccessRequest | None:
-        raw_request = self.get(f"appstore/access_requests/{id}")
+    def get_request_status(self, id: UUID, missing_ok: bool = False) -> AccessRequest | None:
+        raw_request = self.get(f"appstore/access_requests/{id}", missing_ok=missing_ok)
         return self._create_access_request(raw_request)
 
     def cancel_access_request(self, id: UUID, reason: str | None) -> None:
@@ -321,11 +579,7 @@ class ApiClient(BaseClient):
         if reason:
             params["reason"] = reason
         self.delete(f"appstore/access_requests/{id}", params)
-
-    def _create_access_request(self, raw_request: dict | None) -> AccessRequest | None:
-        if not raw_request:
-            return None
-        return AccessRequest(**raw_request)
+        self.memo.invalidate(MY_APPS)
 
     def get_appstore_apps(
         self,
@@ -334,53 +588,71 @@ class ApiClient(BaseClient):
         page_size: int = 100,
         page: int = 1,
     ) -> tuple[list[App], int, int]:
-        endpoint = "appstore/apps"
-        params: dict[str, Any] = {}
-        if name_search:
-            params["name_search"] = name_search
-        raw_apps, count, total, _, _ = self.get_all_or_paged(
-            endpoint, params=params, all=all, page_size=page_size, page=page
+        if indexed := local_index.search("apps", self.url, name_search, all=all, page_size=page_size, page=page):
+            return indexed
+        apps, count, total, _, _ = self.get_all_or_paged(
+            "appstore/apps",
+            params=self._appstore_apps_params(name_search),
+            all=all,
+            page_size=page_size,
+            page=page,
+            parse=App.parse_list,
         )
-        apps: list[App] = []
-        for item in raw_apps:
-            apps.append(App(**item))
         return apps, count, total
 
-    def get_my_apps(self, for_user: UUID | None = None) -> list[App]:
+    def iter_appstore_apps(
+        self,
+        name_search: str | None = None,
+        use_index: bool = True,
+        limit: int | None = None,
+    ) -> Iterator[App]:
+        if use_index and (indexed := local_index.search("apps", self.url, name_search, all=True)):
+            yield from indexed[0][:limit]
+            return
+        params = self._appstore_apps_params(name_search)
+        for raw_apps in self.iter_pages("appstore/apps", params=params, limit=limit):
+            yield from App.parse_list(raw_apps)
+
+    def get_my_apps(self, for_user: UUID | None = None, limit: int | None = None) -> list[AccessRequest]:
         user = for_user or self.get_current_user_id()
         statuses = SupportRequestStatus.PENDING_STATUSES + SupportRequestStatus.SUCCESS_STATUSES
-        access_requests, _, _, _, _ = self.get_access_requests(
-            target_user_id=user,
-            status=statuses,
-            all=True,
+        return self.memo.get(
+            MY_APPS,
+            (user, limit),
+            lambda: list(self.iter_access_requests(target_user_id=user, status=statuses, limit=limit)),
         )
-        return access_requests
 
     def get_access_requests(
         self,
         target_user_id: UUID | None = None,
-        status: list[str] | None = None,
+        status: Iterable[str] | None = None,
         all: bool = False,
         page_size: int = 100,
         page: int = 1,
+        sort: str = "desc",
     ) -> tuple[list[AccessRequest], int, int, int, int]:
-        params: dict[str, Any] = {"sort": "desc"}
-        if target_user_id:
-            params["target_user_id"] = str(target_user_id)
-        if status and len(status) > 0:
-            params["statuses"] = [str(s) for s in status]
-
         endpoint = "appstore/access_requests"
-        raw_access_requests, count, total, page, pages = self.get_all_or_paged(
-            endpoint, params=params, all=all, page=page, page_size=page_size
+        access_requests, count, total, page, pages = self.get_all_or_paged(
+            endpoint,
+            params=self._access_requests_params(target_user_id, status, sort),
+            all=all,
+            page=page,
+            page_size=page_size,
+            parse=AccessRequest.parse_list,
         )
-        access_requests: list[AccessRequest] = []
-        for item in raw_access_requests:
-            access_request = self._create_access_request(item)
-            if access_request:
-                access_requests.append(access_request)
         return access_requests, count, total, page, pages
 
+    def iter_access_requests(
+        self,
+        target_user_id: UUID | None = None,
+        status: Iterable[str] | None = None,
+        sort: str = "desc",
+        limit: int | None = None,
+    ) -> Iterator[AccessRequest]:
+        params = self._access_requests_params(target_user_id, status, sort)
+        for raw_access_requests in self.iter_pages("appstore/access_requests", params=params, limit=limit):
+            yield from AccessRequest.parse_list(raw_access_requests)
+
     def get_users(
         self,
         like: str | None = None,
@@ -388,19 +660,25 @@ class ApiClient(BaseClient):
         page_size: int = 100,
         page: int = 1,
     ) -> tuple[list[User], int, int]:
-        endpoint = "users"
-        params: dict[str, Any] = {}
-        if like:
-            params["search_term"] = like
-        raw_users, count, total, _, _ = self.get_all_or_paged(
-            endpoint, params=params, all=all, page_size=page_size, page=page
+        if indexed := local_index.search("users", self.url, like, all=all, page_size=page_size, page=page):
+            return indexed
+        users, count, total, _, _ = self.get_all_or_paged(
+            "users", params=self._users_params(like), all=all, page_size=page_size, page=page, parse=User.parse_list
         )
-
-        users: list[User] = []
-        for item in raw_users:
-            users.append(User(**item))
         return users, count, total
 
+    def iter_users(
+        self,
+        like: str | None = None,
+        use_index: bool = True,
+        limit: int | None = None,
+    ) -> Iterator[User]:
+        if use_index and (indexed := local_index.search("users", self.url, like, all=True)):
+            yield from indexed[0][:limit]
+            return
+        for raw_users in self.iter_pages("users", params=self._users_params(like), limit=limit):
+            yield from User.parse_list(raw_users)
+
     def get_app_requestable_permissions(
         self,
         app_id: UUID,
@@ -409,19 +687,37 @@ class ApiClient(BaseClient):
         page_size: int = 100,
         page: int = 1,
     ) -> tuple[list[Permission], int, int]:
-        endpoint = "appstore/requestable_permissions"
-        params: dict[str, Any] = {
-            "app_id": str(app_id),
-            "in_app_store": True,
-        }
-        if search_term:
-            params["search_term"] = search_term
-
-        raw_permissions, count, total, _, _ = self.get_all_or_paged(
-            endpoint, params=params, all=all, page_size=page_size, page=page
+        if indexed := local_index.search(
+            "permissions", self.url, search_term, app_id=str(app_id), all=all, page_size=page_size, page=page
+        ):
+            return indexed
+        permissions, count, total, _, _ = self.get_all_or_paged(
+            "appstore/requestable_permissions",
+            params=self._requestable_permissions_params(app_id, search_term),
+            all=all,
+            page_size=page_size,
+            page=page,
+            parse=Permission.parse_list,
         )
+        return permissions, count, total
 
-        return [self._create_permission(item) for item in raw_permissions], count, total
+    def iter_app_requestable_permissions(
+        self,
+        app_id: UUID | None,
+        search_term: str | None = None,
+        use_index: bool = True,
+        limit: int | None = None,
+    ) -> Iterator[Permission]:
+        if use_index and (
+            indexed := local_index.search(
+                "permissions", self.url, search_term, app_id=str(app_id) if app_id else None, all=True
+            )
+        ):
+            yield from indexed[0][:limit]
+            return
+        params = self._requestable_permissions_params(app_id, search_term)
+        for raw_permissions in self.iter_pages("appstore/requestable_permissions", params=params, limit=limit):
+            yield from Permission.parse_list(raw_permissions)
 
     def get_groups(
         self,
@@ -431,30 +727,74 @@ class ApiClient(BaseClient):
         page_size: int = 25,
         page: int = 1,
     ) -> tuple[list[Group], int, int]:
-        endpoint = "groups"
-        params: dict[str, Any] = {}
-        if app_id:
-            params["app_id"] = str(app_id)
-        if search_term:
-            params["name"] = search_term
-
-        raw_permissions, count, total, _, _ = self.get_all_or_paged(
-            endpoint, params=params, all=all, page_size=page_size, page=page
+        if indexed := local_index.search(
+            "groups",
+            self.url,
+            search_term,
+            app_id=str(app_id) if app_id else None,
+            all=all,
+            page_size=page_size,
+            page=page,
+        ):
+            return indexed
+        groups, count, total, _, _ = self.get_all_or_paged(
+            "groups",
+            params=self._groups_params(app_id, search_term),
+            all=all,
+            page_size=page_size,
+            page=page,
+            parse=Group.parse_list,
         )
+        return groups, count, total
 
-        return [Group(**item) for item in raw_permissions], count, total
+    def iter_groups(
+        self,
+        app_id: UUID | None,
+        search_term: str | None = None,
+        use_index: bool = True,
+        limit: int | None = None,
+    ) -> Iterator[Group]:
+        if use_index and (
+            indexed := local_index.search(
+                "groups", self.url, search_term, app_id=str(app_id) if app_id else None, all=True
+            )
+        ):
+            yield from indexed[0][:limit]
+            return
+        params = self._groups_params(app_id, search_term)
+        for raw_groups in self.iter_pages("groups", params=params, limit=limit):
+            yield from Group.parse_list(raw_groups)
 
     def get_app_requestable_permission(self, permission_id: UUID) -> Permission | None:
-        item = self.get(f"appstore/requestable_permissions/{permission_id}")
-        if not item:
-            return None
-        return self._create_permission(item)
-
-    def _create_permission(self, raw_permission: dict) -> Permission:
-        permission = Permission(**raw_permission)
-        durations = raw_permission["request_config"]["request_fulfillment_config"]["time_based_access"]
-        permission.duration_options = durations
-        return permission
+        return self.get_app_requestable_permissions_by_id([permission_id])[permission_id]
+
+    def get_app_requestable_permissions_by_id(self, permission_ids: Iterable[UUID]) -> dict[UUID, Permission | None]:
+        """Looks up many permissions at once, mapping IDs that don't exist to None.
+
+        The API can't filter the permissions list by ID, so each one is fetched by itself,
+        all at the same time, and remembered so asking again costs nothing.
+        """
+
+        def fetch(id: UUID) -> Permission | None:
+            item = self.get(f"appstore/requestable_permissions/{id}", missing_ok=True)
+            return Permission.model_validate(item) if item else None
+
+        def lookup(id: UUID) -> Permission | None:
+            return self.memo.get(PERMISSION, id, lambda: fetch(id))
+
+        ids = list(dict.fromkeys(permission_ids))
+        if len(ids) == 1:
+            return {ids[0]: lookup(ids[0])}
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(ids) or 1)) as executor:
+            futures = {id: executor.submit(lookup, id) for id in ids}
+        permissions: dict[UUID, Permission | None] = {}
+        for id, future in futures.items():
+            try:
+                permissions[id] = future.result()
+            except LoginRequired:
+                # A worker can't log in again, but this thread may be able to
+                permissions[id] = lookup(id)
+        return permissions
 
     def create_access_request(
         self,
@@ -464,16 +804,8 @@ class ApiClient(BaseClient):
         permission_ids: list[UUID] | None = None,
         target_user_id: UUID | None = None,
     ) -> AccessRequest | None:
-        body: dict[str, Any] = {
-            "app_id": str(app_id),
-            "note": note,
-        }
-        if permission_ids:
-            body["requestable_permission_ids"] = [str(p) for p in permission_ids]
-        if expiration_in_seconds:
-            body["expiration_in_seconds"] = expiration_in_seconds
-        if target_user_id:
-            body["target_user_id"] = str(target_user_id)
+        body = self._access_request_body(app_id, note, expiration_in_seconds, permission_ids, target_user_id)
         response = self.post("appstore/access_request", body)
+        self.memo.invalidate(MY_APPS)
 
         return AccessRequest(**response[0]) if response else None
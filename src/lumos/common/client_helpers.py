@@ -1,34 +1,47 @@
-import os
+from functools import lru_cache
+from typing import TYPE_CHECKING
 
-import requests
 from click_extra import secho
 
 from lumos import __version__
 
+if TYPE_CHECKING:
+    import requests
 
-def check_version_header(response: requests.Response) -> bool:
-    if os.environ.get("WARNED"):
+# Set once the update warning has been shown, so it's only shown once per run
+warned = False
+# Versions the server asked for that this CLI already satisfies. The server sends the
+# same one with every response, so after the first it's a set lookup.
+_satisfied_versions: set[str] = set()
+
+
+def check_version_header(response: "requests.Response") -> bool:
+    if warned:
         return True
     if not (version_header_string := response.headers.get("X-CLI-Version")):
         return True
+    if version_header_string in _satisfied_versions:
+        return True
 
-    current_version = parse_version(__version__)
     header_version = parse_version(version_header_string)
-    cont, error_message = check_version(current_version, header_version)
+    cont, error_message = check_version(_client_version(), header_version)
 
     if error_message:
         secho(error_message, fg="cyan" if cont else "red")
+    elif cont:
+        _satisfied_versions.add(version_header_string)
     return cont
 
 
 def check_version(current_version: list[int], header_version: list[int]) -> tuple[bool, str | None]:
+    global warned
     if current_version[0] < header_version[0]:
         return (
             False,
             "A new version of the CLI is available. Please run `brew upgrade lumos` to proceed.",
         )
     if current_version[0] == header_version[0] and current_version[1] < header_version[1]:
-        os.environ["WARNED"] = "1"
+        warned = True
         return (
             True,
             "There's an update available to the CLI. Please run `brew upgrade lumos`.",
@@ -38,3 +51,24 @@ def check_version(current_version: list[int], header_version: list[int]) -> tupl
 
 def parse_version(version: str) -> list[int]:
     return [int(v) for v in version.split(".")]
+
+
+@lru_cache(maxsize=1)
+def _client_version() -> list[int]:
+    return parse_version(__version__)
+
+
+def connection_stats(session: "requests.Session") -> tuple[int, int]:
+    """Returns how many connections the session has opened and how many requests reused one."""
+    opened = sent = 0
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pools = adapter.poolmanager.pools
+        # the pool container refuses direct iteration, keys() returns a snapshot
+        for key in pools.keys():  # noqa: SIM118
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            opened += pool.num_connections
+            sent += pool.num_requests
+    return opened, max(sent - opened, 0)
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone, tzinfo
+from functools import lru_cache
+
+# How dates are written in tables and CSV output
+OUTPUT_FORMATS = ["human", "iso", "epoch"]
+HUMAN_FORMAT = "%a %b %d, %Y %I:%M %p %Z"
+# Rendered dates remembered per renderer. Requests share many timestamps, like expiry dates.
+CACHE_SIZE = 4096
+
+
+class DateRenderer:
+    """Turns the API's UTC timestamps into text in the chosen timezone and format.
+
+    The timezone is looked up once, when it's chosen, and each distinct timestamp is
+    parsed and formatted once. With no timezone, dates are shown in the local one.
+    """
+
+    def __init__(self, tz: str | None = None, date_format: str = "human"):
+        self.configure(tz, date_format)
+
+    def configure(self, tz: str | None = None, date_format: str = "human") -> None:
+        """Raises ValueError for a timezone or format that doesn't exist."""
+        if date_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown date format {date_format!r}")
+        self.tz = _timezone(tz)
+        self.date_format = date_format
+        self.render = lru_cache(maxsize=CACHE_SIZE)(self._render)
+
+    def _render(self, value: str | None) -> str:
+        if not value:
+            return ""
+        parsed = parse_timestamp(value)
+        if self.date_format == "epoch":
+            return str(int(parsed.timestamp()))
+        # astimezone() with no zone uses the local one, with the right offset for that date
+        local = parsed.astimezone(self.tz)
+        if self.date_format == "iso":
+            return local.isoformat()
+        return local.strftime(HUMAN_FORMAT)
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parses an API timestamp. Timestamps without an offset are in UTC."""
+    # fromisoformat only learned to read a trailing Z in Python 3.11
+    parsed = datetime.fromisoformat(value.removesuffix("Z"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def _timezone(name: str | None) -> tzinfo | None:
+    if not name or name.lower() == "local":
+        return None
+    if name.upper() == "UTC":
+        return timezone.utc
+    # pytz is only imported when a named zone is asked for
+    import pytz
+
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError as e:
+        raise ValueError(f"Unknown timezone {name!r}") from e
+
+
+date_renderer = DateRenderer()
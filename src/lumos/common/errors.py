@@ -0,0 +1,54 @@
+class LumosError(Exception):
+    """Base class for errors raised by the Lumos API clients."""
+
+
+class ApiError(LumosError):
+    """The API answered with an error status."""
+
+    def __init__(self, status_code: int, message: str, detail: str | None = None):
+        super().__init__(f"{message} {detail}" if detail else message)
+        self.status_code = status_code
+        self.message = message
+        self.detail = detail
+
+
+class AuthenticationError(ApiError):
+    """The API key or login is missing, expired or revoked (401)."""
+
+
+class PermissionDeniedError(ApiError):
+    """The authenticated user isn't allowed to do this (403)."""
+
+
+class NotFoundError(ApiError):
+    """The requested resource doesn't exist (404)."""
+
+
+class ConflictError(ApiError):
+    """The request conflicts with an existing one (409)."""
+
+
+class RequestValidationError(ApiError):
+    """The API rejected the request body or parameters (422)."""
+
+
+class RateLimitedError(ApiError):
+    """The API kept rate limiting the request after every retry (429)."""
+
+
+ERRORS_BY_STATUS: dict[int, tuple[type[ApiError], str]] = {
+    401: (AuthenticationError, "Something went wrong with authorization. Try logging in again."),
+    403: (PermissionDeniedError, "You don't have permission to do that."),
+    404: (NotFoundError, "Not found."),
+    409: (ConflictError, "An error occurred (status code 409)"),
+    422: (RequestValidationError, "An error occurred (status code 422)"),
+    429: (RateLimitedError, "Too many retries."),
+}
+
+
+def error_for_status(status_code: int, detail: str | None = None) -> ApiError:
+    """Builds the typed error for an API error status, with the same messages the CLI prints."""
+    error_class, message = ERRORS_BY_STATUS.get(
+        status_code, (ApiError, f"An error occurred (status code {status_code})")
+    )
+    return error_class(status_code, message, detail)
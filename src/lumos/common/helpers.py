@@ -1,12 +1,14 @@
 import functools
-import os
+from typing import TYPE_CHECKING
 
 from click_extra import confirm, echo, prompt
-from pick import pick
 
-from lumos.common.client import AuthClient
-from lumos.common.keyhelpers import key_file_path, read_key, write_key
-from lumos.common.models import App, Permission, SupportRequestStatus
+from lumos.common.cache import response_cache
+from lumos.common.index import local_index
+from lumos.common.keyhelpers import forget_key, key_file_path, read_key, write_key
+
+if TYPE_CHECKING:
+    from lumos.common.models import App, Permission, SupportRequestStatus
 
 
 def authenticate(func):
@@ -34,6 +36,8 @@ def setup(show_prompt: bool = False, show_overwrite_prompt: bool = False):
         default=True,
     ):
         raise SystemExit(1)
+    from pick import pick
+
     selected, _ = pick(["OAuth 2.0", "API key"], "How do you want to authenticate?")
     if selected == "API key":
         echo(" ⚙️ Go to your Lumos account > Settings > API Tokens > Add an API Token, and copy the token.")
@@ -46,17 +50,22 @@ def setup(show_prompt: bool = False, show_overwrite_prompt: bool = False):
 
 
 def login(admin: bool | None = False):
+    from lumos.common.client import AuthClient
+
     AuthClient().authenticate(admin or False)
 
 
 def logout():
     key_file = key_file_path()
     key_file.unlink(missing_ok=True)
-    if os.environ.get("API_KEY"):
-        os.environ["API_KEY"] = None
+    response_cache.clear()
+    local_index.clear()
+    forget_key()
+
 
+def get_statuses(status: list["SupportRequestStatus"], pending: bool, past: bool) -> set["SupportRequestStatus"]:
+    from lumos.common.models import SupportRequestStatus
 
-def get_statuses(status: list[SupportRequestStatus], pending: bool, past: bool) -> set[SupportRequestStatus]:
     if not status:
         status = []
     if pending:
@@ -73,8 +82,8 @@ def get_statuses(status: list[SupportRequestStatus], pending: bool, past: bool)
 
 
 def check_current_apps(
-    apps: list[App], selected_app: App, selected_permissions: list[Permission] | None
-) -> tuple[App, str | None]:
+    apps: list["App"], selected_app: "App", selected_permissions: list["Permission"] | None
+) -> tuple["App", str | None]:
     for app in apps:
         if str(app.app_id) == str(selected_app.id):
             if len(app.requestable_permissions) > 0 and selected_permissions:
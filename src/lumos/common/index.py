@@ -0,0 +1,194 @@
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from lumos.common.keyhelpers import current_credentials, index_file_path
+from lumos.common.logging import logdebug
+
+if TYPE_CHECKING:
+    from lumos.common.models import LumosModel
+
+# Synced data younger than this answers lookups instead of the API
+INDEX_MAX_AGE = 60 * 60
+
+# Resources that can be synced, and the fields searched with --like
+INDEXED_KINDS: dict[str, tuple[str, ...]] = {
+    "users": ("given_name", "family_name", "email"),
+    "apps": ("user_friendly_label",),
+    "permissions": ("label",),
+    "groups": ("name", "description"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    kind TEXT NOT NULL,
+    id TEXT NOT NULL,
+    app_id TEXT,
+    search_text TEXT NOT NULL,
+    raw TEXT NOT NULL,
+    UNIQUE (kind, id)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS records_fts USING fts5(search_text, content='records', content_rowid='rowid');
+CREATE TRIGGER IF NOT EXISTS records_ai AFTER INSERT ON records BEGIN
+    INSERT INTO records_fts (rowid, search_text) VALUES (new.rowid, new.search_text);
+END;
+CREATE TRIGGER IF NOT EXISTS records_ad AFTER DELETE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text);
+END;
+CREATE TRIGGER IF NOT EXISTS records_au AFTER UPDATE ON records BEGIN
+    INSERT INTO records_fts (records_fts, rowid, search_text) VALUES ('delete', old.rowid, old.search_text);
+    INSERT INTO records_fts (rowid, search_text) VALUES (new.rowid, new.search_text);
+END;
+CREATE TABLE IF NOT EXISTS sync_state (
+    kind TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    credentials TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+class SyncResult(NamedTuple):
+    added: int
+    updated: int
+    removed: int
+    total: int
+
+
+class LocalIndex:
+    """SQLite mirror of users, apps, requestable permissions and groups, filled by `lumos sync`."""
+
+    def __init__(self, path: Path | None = None):
+        self._path = path
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        # --no-cache stops lookups from reading synced data
+        self.enabled = True
+
+    @property
+    def path(self) -> Path:
+        return self._path or index_file_path()
+
+    def sync(self, kind: str, url: str, models: Iterable["LumosModel"]) -> SyncResult:
+        """Mirrors the given models into the index, only writing rows that changed."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("CREATE TEMP TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY)")
+                conn.execute("DELETE FROM seen")
+                existing = conn.execute("SELECT COUNT(*) FROM records WHERE kind = ?", (kind,)).fetchone()[0]
+                changed = 0
+                for model in models:
+                    changed += conn.execute(
+                        "INSERT INTO records (kind, id, app_id, search_text, raw) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (kind, id) DO UPDATE SET app_id = excluded.app_id, "
+                        "search_text = excluded.search_text, raw = excluded.raw WHERE raw != excluded.raw",
+                        (
+                            kind,
+                            str(model.id),
+                            str(getattr(model, "app_id", "")) or None,
+                            _search_text(kind, model),
+                            model.model_dump_json(),
+                        ),
+                    ).rowcount
+                    conn.execute("INSERT OR IGNORE INTO seen (id) VALUES (?)", (str(model.id),))
+                removed = conn.execute(
+                    "DELETE FROM records WHERE kind = ? AND id NOT IN (SELECT id FROM seen)", (kind,)
+                ).rowcount
+                total = conn.execute("SELECT COUNT(*) FROM records WHERE kind = ?", (kind,)).fetchone()[0]
+                conn.execute(
+                    "INSERT OR REPLACE INTO sync_state (kind, url, credentials, synced_at) VALUES (?, ?, ?, ?)",
+                    (kind, url, current_credentials().fingerprint, time.time()),
+                )
+        added = total - (existing - removed)
+        return SyncResult(added=added, updated=changed - added, removed=removed, total=total)
+
+    def synced_at(self, kind: str, url: str) -> float | None:
+        """When the kind was last synced from this API with the current API key, if ever."""
+        if not self.enabled or not self.path.exists():
+            return None
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT synced_at FROM sync_state WHERE kind = ? AND url = ? AND credentials = ?",
+                    (kind, url, current_credentials().fingerprint),
+                )
+                .fetchone()
+            )
+        return row[0] if row else None
+
+    def is_fresh(self, kind: str, url: str, max_age: float = INDEX_MAX_AGE) -> bool:
+        synced_at = self.synced_at(kind, url)
+        return synced_at is not None and time.time() - synced_at < max_age
+
+    def search(
+        self,
+        kind: str,
+        url: str,
+        like: str | None = None,
+        app_id: str | None = None,
+        all: bool = False,
+        page_size: int = 100,
+        page: int = 1,
+    ) -> tuple[list["LumosModel"], int, int] | None:
+        """Answers a lookup from the index, or returns None when it isn't fresh enough to."""
+        if not self.is_fresh(kind, url):
+            return None
+        where = "kind = ?"
+        args: list[str | int] = [kind]
+        if app_id:
+            where += " AND app_id = ?"
+            args.append(app_id)
+        if like and (query := _fts_query(like)):
+            where += " AND rowid IN (SELECT rowid FROM records_fts WHERE records_fts MATCH ?)"
+            args.append(query)
+        sql = f"SELECT raw FROM records WHERE {where} ORDER BY rowid"
+        if not all:
+            sql += " LIMIT ? OFFSET ?"
+        with self._lock:
+            conn = self._connect()
+            total = conn.execute(f"SELECT COUNT(*) FROM records WHERE {where}", args).fetchone()[0]
+            rows = conn.execute(sql, args if all else [*args, page_size, page_size * (page - 1)]).fetchall()
+        model = _model(kind)
+        results = model.parse_json_list([raw for (raw,) in rows])
+        logdebug(f"INDEX: {len(results)} of {total} {kind} answered locally")
+        return results, len(results), len(results) if all else total
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self.path.unlink(missing_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self.path.chmod(0o600)
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+
+def _search_text(kind: str, model: "LumosModel") -> str:
+    return " ".join(str(getattr(model, field)) for field in INDEXED_KINDS[kind])
+
+
+def _model(kind: str) -> type["LumosModel"]:
+    # Imported here so the CLI can start without loading pydantic
+    from lumos.common.models import App, Group, Permission, User
+
+    return {"users": User, "apps": App, "permissions": Permission, "groups": Group}[kind]
+
+
+def _fts_query(like: str) -> str:
+    """Turns free text into an FTS query matching every word as a prefix."""
+    return " ".join(f'"{token}"*' for token in re.findall(r"\w+", like))
+
+
+local_index = LocalIndex()
@@ -0,0 +1,124 @@
+"""JSON decoding and encoding for API responses, the cache and command output.
+
+orjson is used when it's installed (`pip install 'lumos[speedups]'`), then msgspec if
+you've installed it yourself, and the standard library otherwise. Every backend writes the same documents. Models
+are written by pydantic itself, so nested models come out as nested objects.
+"""
+
+import json
+from datetime import date, datetime, time
+from enum import Enum
+from typing import Any
+from uuid import UUID
+
+
+class JsonBackend:
+    """The standard library's json module. Always available."""
+
+    name = "json"
+
+    def loads(self, data: bytes | str) -> Any:
+        return json.loads(data)
+
+    def dumps(self, obj: Any, indent: bool = False) -> str:
+        if indent:
+            return json.dumps(obj, indent=2, ensure_ascii=False, default=_default)
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=_default)
+
+
+class OrjsonBackend(JsonBackend):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def loads(self, data: bytes | str) -> Any:
+        return self._orjson.loads(data)
+
+    def dumps(self, obj: Any, indent: bool = False) -> str:
+        option = self._orjson.OPT_INDENT_2 if indent else 0
+        return self._orjson.dumps(obj, default=_default, option=option).decode()
+
+
+class MsgspecBackend(JsonBackend):
+    name = "msgspec"
+
+    def __init__(self):
+        # Not in any extra, since orjson is picked first whenever both are installed
+        import msgspec  # pyright: ignore[reportMissingImports]
+
+        self._json = msgspec.json
+        self._decode_error = msgspec.DecodeError
+        self._decoder = msgspec.json.Decoder()
+        self._encoder = msgspec.json.Encoder(enc_hook=_default)
+
+    def loads(self, data: bytes | str) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as e:
+            # Callers catch ValueError, like the other backends raise
+            raise ValueError(str(e)) from e
+
+    def dumps(self, obj: Any, indent: bool = False) -> str:
+        encoded = self._encoder.encode(obj)
+        return (self._json.format(encoded, indent=2) if indent else encoded).decode()
+
+
+BACKENDS: dict[str, type[JsonBackend]] = {
+    "orjson": OrjsonBackend,
+    "msgspec": MsgspecBackend,
+    "json": JsonBackend,
+}
+
+
+def load_backend(name: str | None = None) -> JsonBackend:
+    """Returns the named backend, or the fastest one installed."""
+    if name:
+        return BACKENDS[name]()
+    for backend in BACKENDS.values():
+        try:
+            return backend()
+        except ImportError:
+            continue
+    return JsonBackend()
+
+
+def _default(obj: Any) -> Any:
+    # Called for anything the backend can't write by itself
+    from pydantic import BaseModel
+
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, datetime | date | time):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+# Picked on first use, so commands that never read or write JSON don't import a backend
+backend: JsonBackend | None = None
+
+
+def get_backend() -> JsonBackend:
+    global backend
+    if backend is None:
+        backend = load_backend()
+    return backend
+
+
+def loads(data: bytes | str) -> Any:
+    return get_backend().loads(data)
+
+
+def dumps(obj: Any, indent: bool = False) -> str:
+    from pydantic import BaseModel
+
+    if isinstance(obj, BaseModel):
+        # pydantic-core writes models faster than any backend can, in the same layout
+        return obj.model_dump_json(indent=2 if indent else None)
+    return get_backend().dumps(obj, indent)
@@ -1,21 +1,69 @@
+import hashlib
 import os
+from collections.abc import Mapping
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 
+from lumos import __version__
 from lumos.common.logging import logdebug
 
 
+@dataclass(frozen=True)
+class Credentials:
+    """The API key in use, the scope it was issued for, and the headers every API request sends.
+
+    The headers are built once, when the key is read or written, and can't be changed, so
+    every client can send the same mapping with every request. The fingerprint tells keys
+    apart without revealing them, so what's cached or indexed with one key isn't used with
+    another.
+    """
+
+    api_key: str | None
+    scope: str = ""
+    headers: Mapping[str, str] = field(init=False, repr=False, compare=False)
+    fingerprint: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json",
+            "User-Agent": f"lumos-cli/{__version__}",
+        }
+        object.__setattr__(self, "headers", MappingProxyType(headers))
+        fingerprint = hashlib.sha256(f"{self.scope}:{self.api_key}".encode()).hexdigest()[:16]
+        object.__setattr__(self, "fingerprint", fingerprint)
+
+
+# Used until a key is read, so requests still go out, and are refused
+NO_CREDENTIALS = Credentials(api_key=None)
+# Set once the key is read or written, and shared by every client. Kept here rather than
+# written to the environment, so commands we start never see it.
+_credentials: Credentials | None = None
+
+
 def key_file_path() -> Path:
     if os.environ.get("DEV_MODE"):
         return Path.home() / ".lumos-dev"
     return Path.home() / ".lumos"
 
 
+def cache_dir_path() -> Path:
+    key_file = key_file_path()
+    return key_file.with_name(f"{key_file.name}-cache")
+
+
+def index_file_path() -> Path:
+    key_file = key_file_path()
+    return key_file.with_name(f"{key_file.name}-index.db")
+
+
 def write_key(key: str | None, scope: str | None = None) -> None:
+    global _credentials
     if not key:
         return
 
-    os.environ["API_KEY"] = key
-    os.environ["SCOPE"] = scope or ""
+    _credentials = Credentials(api_key=key, scope=scope or "")
 
     if scope:
         key = f"{scope}:{key}"
@@ -27,15 +75,35 @@ def write_key(key: str | None, scope: str | None = None) -> None:
 
 
 def read_key() -> str:
-    api_key = os.environ.get("API_KEY")
-    if api_key:
+    global _credentials
+    if _credentials:
+        return _credentials.api_key
+
+    # A key in the environment wins over the key file. It's only read, never written back.
+    if api_key := os.environ.get("API_KEY"):
+        _credentials = Credentials(api_key=api_key, scope=os.environ.get("SCOPE", ""))
         return api_key
 
     key_file = key_file_path()
     with key_file.open("r") as f:
         api_key = f.read().strip()
+    scope = ""
     if api_key.count(":") == 1:
         scope, api_key = api_key.split(":")
-        os.environ["SCOPE"] = scope
-    os.environ["API_KEY"] = api_key
+    _credentials = Credentials(api_key=api_key, scope=scope)
     return api_key
+
+
+def current_credentials() -> Credentials:
+    """The credentials in use, or NO_CREDENTIALS if the key hasn't been read yet."""
+    return _credentials or NO_CREDENTIALS
+
+
+def current_scope() -> str:
+    """The scope of the key in use, or "" if it has none or hasn't been read yet."""
+    return current_credentials().scope
+
+
+def forget_key() -> None:
+    global _credentials
+    _credentials = None
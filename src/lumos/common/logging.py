@@ -1,11 +1,21 @@
 import os
+import re
 
 from click_extra import secho
 
+# Tokens in response bodies, shown cut short
+TOKEN_PATTERN = re.compile(rb'("access_token"\s*:\s*")([^"]{0,5})[^"]*"')
+
+
+def debug_enabled() -> bool:
+    return bool(os.environ.get("DEBUG"))
+
 
 def logdebug_request(url, headers, body, params, method) -> None:
+    if not debug_enabled():
+        return
     logdebug(method + " " + url)
-    headers_copy = headers.copy()
+    headers_copy = dict(headers)
     if headers_copy.get("Authorization"):
         headers_copy["Authorization"] = headers_copy["Authorization"][:12] + "..."
     logdebug("HEADERS: " + str(headers_copy))
@@ -13,18 +23,21 @@ def logdebug_request(url, headers, body, params, method) -> None:
     logdebug("PARAMETERS: " + str(params))
 
 
-def logdebug_response(response) -> None:
+def logdebug_response(response, cache_status: str | None = None) -> None:
+    # Shows the body as it came, rather than parsing it a second time just to log it
+    if not debug_enabled():
+        return
     logdebug("\nRESPONSE: " + str(response.status_code))
-    try:
-        json = response.json()
-        if json.get("access_token"):
-            json["access_token"] = json["access_token"][:5] + "..."
-        logdebug("HEADERS: " + str(response.headers))
-        logdebug("CONTENT: " + str(json))
-    except Exception:
-        logdebug("CONTENT: " + str(response.content))
+    if response.status_code == 304:
+        logdebug("CACHE: 304 not modified")
+        return
+    if cache_status:
+        logdebug("CACHE: " + cache_status)
+    logdebug("HEADERS: " + str(response.headers))
+    content = TOKEN_PATTERN.sub(rb'\1\2..."', response.content)
+    logdebug("CONTENT: " + content.decode(errors="replace"))
 
 
 def logdebug(msg: str) -> None:
-    if os.environ.get("DEBUG"):
+    if debug_enabled():
         secho(msg, fg="red")
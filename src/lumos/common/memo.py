@@ -0,0 +1,58 @@
+import threading
+import time
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class MemoKey(Generic[T]):
+    """One kind of lookup a client remembers, like "app by ID", and how long an answer is trusted.
+
+    A `ttl` of None keeps answers for the life of the client.
+    """
+
+    name: str
+    ttl: float | None = None
+
+
+class Memo:
+    """Answers to a client's lookups, kept in memory for the rest of the process.
+
+    Entries are stored under a MemoKey and the lookup's arguments, so `memo.get(APP, id, ...)`
+    always gives back the type APP was declared with. Writes through the client invalidate
+    the keys whose answers they change. Safe to share between threads. Two threads asking
+    for the same missing entry at once may both look it up, and the last answer is kept.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[Hashable, tuple[float | None, Any]]] = {}
+
+    def get(self, key: MemoKey[T], args: Hashable, load: Callable[[], T]) -> T:
+        """Returns the remembered answer, or calls `load` and remembers what it returns."""
+        with self._lock:
+            entry = self._entries.get(key.name, {}).get(args)
+        if entry is not None and (entry[0] is None or entry[0] > self._clock()):
+            return entry[1]
+        value = load()
+        self.set(key, args, value)
+        return value
+
+    def set(self, key: MemoKey[T], args: Hashable, value: T) -> None:
+        expires_at = None if key.ttl is None else self._clock() + key.ttl
+        with self._lock:
+            self._entries.setdefault(key.name, {})[args] = (expires_at, value)
+
+    def invalidate(self, *keys: MemoKey) -> None:
+        """Forgets every answer remembered under the given keys."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key.name, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
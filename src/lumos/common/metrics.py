@@ -0,0 +1,195 @@
+"""Timings of every API request, for finding out where a run's time goes.
+
+Each time a request is sent, we record how long it waited on the rate limiter or a
+429, how long opening a new connection took, how long the server took to answer and
+to send the body, and how big the body was. `lumos --metrics-file PATH` appends each
+record to PATH as a JSON line, and a summary is printed at exit with `--metrics-file`
+or `--debug`.
+"""
+
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, TextIO
+
+from lumos.common.jsonio import dumps
+
+if TYPE_CHECKING:
+    import requests
+    from requests.adapters import HTTPAdapter
+
+# How long the connection the current thread just opened took, if it opened one
+_connection_times = threading.local()
+
+
+@dataclass
+class RequestMetric:
+    """One request sent to the API. Durations are in seconds."""
+
+    method: str
+    endpoint: str
+    status: int
+    # Unix time the request was sent
+    started_at: float
+    # Held back by the rate limiter, including backing off after a 429
+    wait: float
+    # DNS lookup and TCP connect, and the TLS handshake. None when a pooled connection was reused.
+    connect: float | None
+    tls: float | None
+    # From sending the request until the response headers arrived, not counting connecting
+    ttfb: float
+    download: float
+    total: float
+    bytes: int
+    # How many 429s this request had already had, and how many times it was sent again after logging in
+    rate_limited: int
+    retry: int
+    cache: str | None = None
+
+
+class Metrics:
+    """Every request's RequestMetric, kept while enabled and written out as they happen."""
+
+    def __init__(self):
+        self.enabled = False
+        self.records: list[RequestMetric] = []
+        self._file: TextIO | None = None
+        self._lock = threading.Lock()
+
+    def open(self, path: Path) -> None:
+        self._file = path.open("a", encoding="utf-8")
+        self.enabled = True
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def record_response(
+        self,
+        method: str,
+        endpoint: str,
+        response: "requests.Response",
+        started_at: float,
+        wait: float,
+        total: float,
+        rate_limited: int = 0,
+        retry: int = 0,
+        cache: str | None = None,
+    ) -> None:
+        if not self.enabled:
+            return
+        connect = getattr(_connection_times, "connect", None)
+        tls = getattr(_connection_times, "tls", None)
+        elapsed = response.elapsed.total_seconds()
+        self.record(
+            RequestMetric(
+                method=method,
+                endpoint=endpoint,
+                status=response.status_code,
+                started_at=started_at,
+                wait=wait,
+                connect=connect,
+                tls=tls,
+                ttfb=max(elapsed - (connect or 0) - (tls or 0), 0.0),
+                download=max(total - elapsed, 0.0),
+                total=total,
+                bytes=len(response.content),
+                rate_limited=rate_limited,
+                retry=retry,
+                cache=cache,
+            )
+        )
+
+    def record(self, metric: RequestMetric) -> None:
+        with self._lock:
+            self.records.append(metric)
+            if self._file is not None:
+                self._file.write(dumps(asdict(metric)) + "\n")
+                self._file.flush()
+
+    def summary(self) -> str | None:
+        """One line on how the requests went, or None if there weren't any."""
+        if not self.records:
+            return None
+        latencies = sorted(r.total for r in self.records)
+        received = sum(r.bytes for r in self.records)
+        waited = sum(r.wait for r in self.records)
+        rate_limited = sum(1 for r in self.records if r.status == 429)
+        opened = sum(1 for r in self.records if r.connect is not None)
+        return (
+            f"METRICS: {_plural(len(self.records), 'request')}, p50 {_ms(percentile(latencies, 50))}, "
+            f"p95 {_ms(percentile(latencies, 95))}, {received / 1024:.1f} KiB received, "
+            f"{waited:.1f}s waiting on rate limits ({rate_limited} rate limited), "
+            f"{_plural(opened, 'connection')} opened"
+        )
+
+
+def percentile(values: list[float], p: float) -> float:
+    """The nearest-rank percentile of sorted values."""
+    rank = max(-(-len(values) * p // 100), 1)
+    return values[int(rank) - 1]
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}ms"
+
+
+def _plural(count: int, noun: str) -> str:
+    return f"{count} {noun}{'' if count == 1 else 's'}"
+
+
+def reset_connection_times() -> None:
+    """Forgets the last connection the current thread opened, before it sends another request."""
+    _connection_times.connect = None
+    _connection_times.tls = None
+
+
+def timed_adapter(**kwargs) -> "HTTPAdapter":
+    """An HTTPAdapter whose new connections record how long they took to open."""
+    # Imported here, like everywhere else, so the CLI starts without loading requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class TimedHTTPConnection(HTTPConnection):
+        def _new_conn(self):
+            start = time.perf_counter()
+            try:
+                return super()._new_conn()
+            finally:
+                _connection_times.connect = time.perf_counter() - start
+
+    class TimedHTTPSConnection(HTTPSConnection):
+        def _new_conn(self):
+            start = time.perf_counter()
+            try:
+                return super()._new_conn()
+            finally:
+                _connection_times.connect = time.perf_counter() - start
+
+        def connect(self):
+            # Opens the socket with _new_conn, then does the TLS handshake
+            start = time.perf_counter()
+            super().connect()
+            _connection_times.tls = time.perf_counter() - start - (_connection_times.connect or 0)
+
+    class TimedHTTPConnectionPool(HTTPConnectionPool):
+        ConnectionCls = TimedHTTPConnection
+
+    class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+        ConnectionCls = TimedHTTPSConnection
+
+    class TimedHTTPAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {
+                "http": TimedHTTPConnectionPool,
+                "https": TimedHTTPSConnectionPool,
+            }
+
+    return TimedHTTPAdapter(**kwargs)
+
+
+metrics = Metrics()
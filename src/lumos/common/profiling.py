@@ -0,0 +1,110 @@
+"""Profiling for `lumos --profile`, to see where a slow command spends its time.
+
+Code that fetches, parses or renders is tagged with `phase`, which times it while
+profiling is on and costs a flag check otherwise. Like cProfile, phases only count
+the thread the command runs in, and they don't overlap. Fetching the next page while
+rendering counts as fetching, and so does waiting for a page a worker thread fetched,
+so the phases split up the time the command took.
+"""
+
+import io
+import threading
+import time
+from contextlib import ContextDecorator
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import cProfile
+
+# Functions listed in the report
+REPORT_LIMIT = 30
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.phases: dict[str, list[float]] = {}
+        self._profile: cProfile.Profile | None = None
+        self._stack: list[list] = []
+        self._thread: int | None = None
+
+    def start(self) -> None:
+        import cProfile
+
+        self._thread = threading.get_ident()
+        self.enabled = True
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> str:
+        """Stops profiling and returns the report."""
+        import pstats
+
+        self.enabled = False
+        if self._profile is None:
+            return ""
+        self._profile.disable()
+        out = io.StringIO()
+        out.write("PROFILE: time by phase\n")
+        for name, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+            out.write(f"  {name:<8} {seconds:8.3f}s  {int(calls)} calls\n")
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_LIMIT)
+        return out.getvalue()
+
+    def save(self, path: Path) -> None:
+        """Saves the stats of the last run, for pstats or snakeviz."""
+        if self._profile is not None:
+            self._profile.dump_stats(path)
+
+    def enter(self, name: str) -> None:
+        """Starts timing a phase, pausing the one it's nested in."""
+        if threading.get_ident() != self._thread:
+            return
+        now = time.perf_counter()
+        stack = self._stack
+        if stack:
+            # The enclosing phase stops counting while this one runs
+            self._add(stack[-1][0], now - stack[-1][1], 0)
+        stack.append([name, now])
+
+    def exit(self, name: str) -> None:
+        """Stops timing a phase and resumes the one it's nested in."""
+        if threading.get_ident() != self._thread:
+            return
+        now = time.perf_counter()
+        stack = self._stack
+        # Nothing to close if profiling started inside this phase
+        if not stack or stack[-1][0] != name:
+            return
+        name, started = stack.pop()
+        self._add(name, now - started, 1)
+        if stack:
+            stack[-1][1] = now
+
+    def _add(self, name: str, seconds: float, calls: int) -> None:
+        totals = self.phases.setdefault(name, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+
+
+class phase(ContextDecorator):  # noqa: N801
+    """Tags a block, or every call of a function, as one phase of a command, like "fetch"."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "phase":
+        if profiler.enabled:
+            profiler.enter(self.name)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        # The same instance is entered by every call of a decorated function, so what's
+        # open is tracked in the profiler's stack rather than here
+        if profiler.enabled:
+            profiler.exit(self.name)
+
+
+profiler = Profiler()
@@ -0,0 +1,139 @@
+import random
+import threading
+import time
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+
+# Requests per second we start at, and the bounds the rate adapts within
+INITIAL_RATE = 5.0
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+# Requests per second added after every successful response
+RATE_INCREASE = 0.5
+# Longest we back off for a 429 without a Retry-After header
+MAX_BACKOFF = 60.0
+
+
+class RateLimiter:
+    """Token bucket shared by every request in the process.
+
+    The rate ramps up after each successful response and halves on a 429, so bulk
+    jobs settle at whatever pace the server allows. A 429 or an exhausted
+    rate-limit budget pauses every caller until the server says to resume.
+    """
+
+    def __init__(
+        self,
+        rate: float = INITIAL_RATE,
+        min_rate: float = MIN_RATE,
+        max_rate: float = MAX_RATE,
+    ):
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._rate = rate
+        self._tokens = 1.0
+        self._updated_at = time.monotonic()
+        self._resume_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def acquire(self) -> float:
+        """Blocks until a request may be sent and returns how long it waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self._resume_at - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return waited
+                    wait = (1 - self._tokens) / self._rate
+            time.sleep(wait)
+            waited += wait
+
+    def reserve(self) -> float:
+        """Takes a token without blocking and returns how long to wait before sending.
+
+        For event loops, which can't block in acquire() and sleep for the returned delay instead.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(self._resume_at - now, 0.0)
+            if self._tokens < 0:
+                wait = max(wait, -self._tokens / self._rate)
+            return wait
+
+    def record_success(self, headers: Mapping[str, str]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            remaining, reset = _parse_rate_limit_headers(headers)
+            if remaining is not None and remaining <= 0 and reset:
+                self._resume_at = max(self._resume_at, now + reset)
+                return
+            self._rate = min(self.max_rate, self._rate + RATE_INCREASE)
+            if remaining is not None and reset:
+                # Don't spend the remaining budget faster than the window allows
+                self._rate = max(self.min_rate, min(self._rate, remaining / reset))
+
+    def record_rate_limited(self, headers: Mapping[str, str], attempt: int) -> float:
+        """Slows down after a 429 and returns how long every caller will now wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._rate = max(self.min_rate, self._rate / 2)
+            self._tokens = 0.0
+            delay = _parse_retry_after(headers.get("Retry-After"))
+            if delay is None:
+                delay = min(MAX_BACKOFF, 2.0 ** (attempt - 1))
+            # Jitter so concurrent workers don't all retry in the same instant
+            delay *= 1 + random.uniform(0, 0.25)
+            self._resume_at = max(self._resume_at, now + delay)
+            return self._resume_at - now
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(max(self._rate, 1.0), self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_rate_limit_headers(headers: Mapping[str, str]) -> tuple[float | None, float | None]:
+    """Returns the remaining request budget and seconds until it resets, when the API reports them."""
+    remaining = reset = None
+    for prefix in ("X-RateLimit-", "RateLimit-"):
+        try:
+            if (value := headers.get(f"{prefix}Remaining")) is not None:
+                remaining = float(value)
+            if (value := headers.get(f"{prefix}Reset")) is not None:
+                reset = float(value)
+                # Some APIs send an epoch timestamp rather than seconds from now
+                if reset > 1_000_000_000:
+                    reset = reset - time.time()
+                reset = max(reset, 0.0)
+        except ValueError:
+            continue
+        if remaining is not None or reset is not None:
+            break
+    return remaining, reset
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,186 @@
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from lumos.common.client import ApiClient
+from lumos.common.dates import parse_timestamp
+from lumos.common.jsonio import dumps, loads
+from lumos.common.models import AccessRequest, SupportRequestStatus
+
+# Bumped whenever the file layout changes, so old checkpoints start over instead of misreading
+VERSION = 1
+# Statuses a request never leaves. A completed request that grants access for a limited
+# time still changes once, when that access expires.
+FINAL_STATUSES = {
+    SupportRequestStatus.MANAGER_DENIED,
+    SupportRequestStatus.DENIED,
+    SupportRequestStatus.EXPIRED,
+    SupportRequestStatus.CANCELLED,
+    SupportRequestStatus.DENIED_PROVISIONING,
+    SupportRequestStatus.TIME_BASED_EXPIRED,
+    SupportRequestStatus.REVERTED,
+    SupportRequestStatus.COMPLETED,
+}
+
+
+class CheckpointError(Exception):
+    """A checkpoint file that can't be used for this query, with a message saying why."""
+
+
+@dataclass
+class OpenRequest:
+    """A request seen on an earlier run whose status can still change."""
+
+    status: str
+    requested_at: str
+    expires_at: str | None = None
+
+    @property
+    def pending(self) -> bool:
+        return self.status in SupportRequestStatus.PENDING_STATUSES
+
+    def due(self, now: datetime) -> bool:
+        """Completed requests only need another look once their access has expired."""
+        if self.status != SupportRequestStatus.COMPLETED:
+            return True
+        return self.expires_at is not None and parse_timestamp(self.expires_at) <= now
+
+
+@dataclass
+class Checkpoint:
+    """What `lumos list requests --since-checkpoint` saw last time it ran.
+
+    Holds the newest `requested_at` seen, the requests made at exactly that time, and
+    every request whose status could still change, so the next run only has to fetch
+    what's new and recheck what's open.
+    """
+
+    path: Path
+    query: dict[str, Any]
+    newest: str | None = None
+    newest_ids: set[str] = field(default_factory=set)
+    open_requests: dict[str, OpenRequest] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: Path, query: dict[str, Any]) -> "Checkpoint":
+        """Reads the checkpoint, or starts a new one if the file doesn't exist yet."""
+        if not path.exists():
+            return cls(path=path, query=query)
+        try:
+            raw = loads(path.read_bytes())
+        except (OSError, ValueError) as e:
+            raise CheckpointError(f"Can't read checkpoint {path}: {e}") from e
+        if raw.get("version") != VERSION:
+            return cls(path=path, query=query)
+        if raw["query"] != query:
+            raise CheckpointError(
+                f"Checkpoint {path} was written for different filters ({raw['query']}). "
+                "Use the same filters, or a new checkpoint file."
+            )
+        return cls(
+            path=path,
+            query=query,
+            newest=raw["newest"],
+            newest_ids=set(raw["newest_ids"]),
+            open_requests={id: OpenRequest(**entry) for id, entry in raw["open"].items()},
+        )
+
+    def record(self, access_request: AccessRequest) -> None:
+        id = str(access_request.id)
+        if self.newest is None or access_request.requested_at > self.newest:
+            self.newest = access_request.requested_at
+            self.newest_ids = {id}
+        elif access_request.requested_at == self.newest:
+            self.newest_ids.add(id)
+        if access_request.status in FINAL_STATUSES and not (
+            access_request.status == SupportRequestStatus.COMPLETED and access_request.expires_at
+        ):
+            self.open_requests.pop(id, None)
+        else:
+            self.open_requests[id] = OpenRequest(
+                status=access_request.status,
+                requested_at=access_request.requested_at,
+                expires_at=access_request.expires_at,
+            )
+
+    def save(self) -> None:
+        raw = {
+            "version": VERSION,
+            "query": self.query,
+            "newest": self.newest,
+            "newest_ids": sorted(self.newest_ids),
+            "open": {id: entry.__dict__ for id, entry in sorted(self.open_requests.items())},
+        }
+        # Written to a temporary file first, so a run killed mid-write leaves the last checkpoint intact
+        tmp_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(dumps(raw, indent=True) + "\n", encoding="utf-8")
+        tmp_path.replace(self.path)
+
+
+def iter_changes(
+    client: ApiClient,
+    checkpoint: Checkpoint,
+    target_user_id: UUID | None = None,
+    status: Iterable[str] | None = None,
+    now: datetime | None = None,
+) -> Iterator[AccessRequest]:
+    """Yields requests made since the checkpoint, newest first, then older ones whose status changed.
+
+    New requests are read until the first one the checkpoint has already seen, since the
+    API sorts newest first. Open requests that were pending are rechecked against the
+    pending list, and only the ones that left it, or whose access has expired since,
+    are fetched one by one. The checkpoint is updated as requests are yielded, but not saved.
+    """
+    now = now or datetime.now(timezone.utc)
+    # Recording new requests moves the checkpoint forward, so compare against where it started
+    since, seen_at_since = checkpoint.newest, set(checkpoint.newest_ids)
+    open_before = dict(checkpoint.open_requests)
+
+    for access_request in client.iter_access_requests(target_user_id=target_user_id, status=status, sort="desc"):
+        if since is not None and access_request.requested_at <= since:
+            if access_request.requested_at < since:
+                break
+            # Made at the same time as the newest request last run, so only new if we didn't see it
+            if str(access_request.id) in seen_at_since:
+                continue
+        open_before.pop(str(access_request.id), None)
+        checkpoint.record(access_request)
+        yield access_request
+
+    to_fetch = [id for id, entry in open_before.items() if not entry.pending and entry.due(now)]
+    if pending := {id: entry for id, entry in open_before.items() if entry.pending}:
+        oldest = min(entry.requested_at for entry in pending.values())
+        for access_request in client.iter_access_requests(
+            target_user_id=target_user_id, status=SupportRequestStatus.PENDING_STATUSES, sort="desc"
+        ):
+            if access_request.requested_at < oldest:
+                break
+            if (entry := pending.pop(str(access_request.id), None)) is None:
+                continue
+            if access_request.status != entry.status:
+                checkpoint.record(access_request)
+                yield access_request
+        # Whatever isn't pending anymore has moved on
+        to_fetch += list(pending)
+
+    if not to_fetch:
+        return
+    with ThreadPoolExecutor(max_workers=min(client.max_concurrency, len(to_fetch))) as executor:
+        # Any other failure exits before the checkpoint is saved, so the next run checks again
+        fetched = executor.map(lambda id: client.get_request_status(UUID(id), missing_ok=True), to_fetch)
+        for id, access_request in zip(to_fetch, fetched, strict=True):
+            if access_request is None:
+                # Deleted, or no longer visible to us
+                checkpoint.open_requests.pop(id, None)
+                continue
+            if access_request.status != open_before[id].status:
+                checkpoint.record(access_request)
+                yield access_request
+            elif access_request.status == SupportRequestStatus.COMPLETED:
+                # Still completed after its access expired, so there's nothing left to wait for
+                checkpoint.open_requests.pop(id, None)
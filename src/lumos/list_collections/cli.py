@@ -1,13 +1,23 @@
-from json import dumps
+from collections.abc import Iterable, Iterator
+from datetime import datetime
+from itertools import chain, islice
+from pathlib import Path
+from textwrap import indent
 from uuid import UUID
 
-from click_extra import group, option
+from click_extra import Choice, DateTime, IntRange, echo, group, option
+from click_extra import Path as PathType
 from tabulate import tabulate
 
 from lumos.common.client import ApiClient
 from lumos.common.helpers import authenticate, get_statuses
+from lumos.common.jsonio import dumps
 from lumos.common.models import AccessRequest, LumosModel
+from lumos.common.profiling import phase
+from lumos.list_collections.checkpoint import Checkpoint, CheckpointError, iter_changes
 
+# Accepted by --since and --until
+DATE_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
 client = ApiClient()
 
 
@@ -19,8 +29,11 @@ def list_group():
 
 @list_group.command("users", help="List users in Lumos")
 @option("--like", default=None, help="Search by name or email")
+@option("--limit", default=None, type=IntRange(min=1), help="Show at most this many, fetching no more than that")
 @option("--csv", is_flag=True, help="Output as CSV")
 @option("--json", "output_json", is_flag=True, help="Output as JSON")
+@option("--ndjson", is_flag=True, help="Output as newline-delimited JSON, one object per line")
+@option("--compact", is_flag=True, help="Output as JSON on a single line, without indentation")
 @option("--paginate/--no-paginate", default=True, help="Pagination")
 @option("--page-size", default=100, help="Page size")
 @option("--page", default=1, help="Page")
@@ -28,22 +41,29 @@ def list_group():
 @authenticate
 def list_users(
     like: str | None,
+    limit: int | None,
     csv: bool,
     output_json: bool,
+    ndjson: bool,
+    compact: bool,
     paginate: bool,
     page_size: int,
     page: int,
     id_only: bool,
 ) -> None:
-    all = csv or output_json or not paginate
-    users, count, total = client.get_users(like=like, all=all, page=page, page_size=page_size)
+    if csv or output_json or ndjson or compact or limit:
+        users_iter = client.iter_users(like=like, limit=limit)
+        if csv or output_json or ndjson or compact:
+            display_stream("users", users_iter, csv, output_json, ndjson, compact)
+        else:
+            display_all("users", users_iter, id_only=id_only)
+        return
+    users, count, total = client.get_users(like=like, all=not paginate, page=page, page_size=page_size)
     display(
         "users",
         users,
         count,
         total,
-        csv,
-        output_json,
         page=page,
         page_size=page_size,
         id_only=id_only,
@@ -53,8 +73,11 @@ def list_users(
 @list_group.command("permissions", help="List permissions for a given app")
 @option("--app", required=True, type=str, help="App UUID")
 @option("--like", default=None, help="Filters permissions")
+@option("--limit", default=None, type=IntRange(min=1), help="Show at most this many, fetching no more than that")
 @option("--csv", is_flag=True, help="Output as CSV")
 @option("--json", "output_json", is_flag=True, help="Output as JSON")
+@option("--ndjson", is_flag=True, help="Output as newline-delimited JSON, one object per line")
+@option("--compact", is_flag=True, help="Output as JSON on a single line, without indentation")
 @option("--paginate/--no-paginate", default=True, help="Pagination")
 @option("--page-size", default=100, help="Page size")
 @option("--page", default=1, help="Page")
@@ -63,17 +86,26 @@ def list_users(
 def list_permissions(
     app: str,
     like: str | None,
+    limit: int | None,
     csv: bool,
     output_json: bool,
+    ndjson: bool,
+    compact: bool,
     paginate: bool,
     page_size: int,
     page: int,
     id_only: bool,
 ) -> None:
     app_uuid = UUID(app)
-    all = csv or output_json or not paginate
+    if csv or output_json or ndjson or compact or limit:
+        permissions_iter = client.iter_app_requestable_permissions(app_id=app_uuid, search_term=like, limit=limit)
+        if csv or output_json or ndjson or compact:
+            display_stream("permissions", permissions_iter, csv, output_json, ndjson, compact)
+        else:
+            display_all("permissions", permissions_iter, id_only=id_only)
+        return
     permissions, count, total = client.get_app_requestable_permissions(
-        app_id=app_uuid, search_term=like, all=all, page=page, page_size=page_size
+        app_id=app_uuid, search_term=like, all=not paginate, page=page, page_size=page_size
     )
 
     display(
@@ -81,8 +113,6 @@ def list_permissions(
         permissions,
         count,
         total,
-        csv,
-        output_json,
         page=page,
         page_size=page_size,
         id_only=id_only,
@@ -97,8 +127,11 @@ def list_permissions(
     help="App ID to filter groups by. If not provided, lists all groups.",
 )
 @option("--like", default=None, help="Filters groups")
+@option("--limit", default=None, type=IntRange(min=1), help="Show at most this many, fetching no more than that")
 @option("--csv", is_flag=True, help="Output as CSV")
 @option("--json", "output_json", is_flag=True, help="Output as JSON")
+@option("--ndjson", is_flag=True, help="Output as newline-delimited JSON, one object per line")
+@option("--compact", is_flag=True, help="Output as JSON on a single line, without indentation")
 @option("--paginate/--no-paginate", default=True, help="Pagination")
 @option("--page-size", default=100, help="Page size")
 @option("--page", default=1, help="Page")
@@ -107,24 +140,33 @@ def list_permissions(
 def list_groups(
     app: str | None,
     like: str | None,
+    limit: int | None,
     csv: bool,
     output_json: bool,
+    ndjson: bool,
+    compact: bool,
     paginate: bool,
     page_size: int,
     page: int,
     id_only: bool,
 ) -> None:
     app_uuid = UUID(app) if app else None
-    all = csv or output_json or not paginate
-    groups, count, total = client.get_groups(app_id=app_uuid, search_term=like, all=all, page=page, page_size=page_size)
+    if csv or output_json or ndjson or compact or limit:
+        groups_iter = client.iter_groups(app_id=app_uuid, search_term=like, limit=limit)
+        if csv or output_json or ndjson or compact:
+            display_stream("groups", groups_iter, csv, output_json, ndjson, compact)
+        else:
+            display_all("groups", groups_iter, id_only=id_only)
+        return
+    groups, count, total = client.get_groups(
+        app_id=app_uuid, search_term=like, all=not paginate, page=page, page_size=page_size
+    )
 
     display(
         "groups",
         groups,
         count,
         total,
-        csv,
-        output_json,
         page=page,
         page_size=page_size,
         id_only=id_only,
@@ -150,8 +192,34 @@ def list_groups(
 )
 @option("--pending", is_flag=True, help="Show only pending requests")
 @option("--past", is_flag=True, help="Show only past requests")
+@option("--app", default=None, type=str, help="Show only requests for this app UUID")
+@option(
+    "--since",
+    default=None,
+    type=DateTime(DATE_FORMATS),
+    help="Show only requests made at or after this UTC date or time, e.g. 2024-06-01 or 2024-06-01T09:00:00",
+)
+@option(
+    "--until", default=None, type=DateTime(DATE_FORMATS), help="Show only requests made before this UTC date or time"
+)
+@option(
+    "--sort",
+    default="desc",
+    type=Choice(["desc", "asc"]),
+    help="Newest (desc) or oldest (asc) requests first",
+)
+@option(
+    "--since-checkpoint",
+    default=None,
+    type=PathType(dir_okay=False, path_type=Path),
+    help="Only show requests that are new or changed since the last run with this checkpoint file, "
+    "then update it. The file is created on the first run.",
+)
+@option("--limit", default=None, type=IntRange(min=1), help="Show at most this many, fetching no more than that")
 @option("--csv", is_flag=True, help="Output as CSV")
 @option("--json", "output_json", is_flag=True, help="Output as JSON")
+@option("--ndjson", is_flag=True, help="Output as newline-delimited JSON, one object per line")
+@option("--compact", is_flag=True, help="Output as JSON on a single line, without indentation")
 @option("--paginate/--no-paginate", default=True, help="Pagination")
 @option("--page-size", default=100, help="Page size")
 @option("--page", default=1, help="Page")
@@ -163,8 +231,16 @@ def list_requests(
     status: tuple,
     pending: bool,
     past: bool,
+    app: str | None,
+    since: datetime | None,
+    until: datetime | None,
+    sort: str,
+    since_checkpoint: Path | None,
+    limit: int | None,
     csv: bool,
     output_json: bool,
+    ndjson: bool,
+    compact: bool,
     paginate: bool,
     page_size: int,
     page: int,
@@ -178,25 +254,64 @@ def list_requests(
 
     status_list = list(status) if status else None
     status_set = get_statuses(status_list, pending, past)
+    app_uuid = UUID(app) if app else None
 
-    all = csv or output_json or not paginate
+    if since_checkpoint:
+        if since or until or limit or sort != "desc":
+            echo("--since-checkpoint can't be combined with --since, --until, --limit or --sort asc", err=True)
+            raise SystemExit(1)
+        display_changes(since_checkpoint, user_uuid, status_set, app_uuid, csv, output_json, ndjson, compact, id_only)
+        return
+
+    if csv or output_json or ndjson or compact or app_uuid or since or until or limit:
+        # The API sorts for us, so rows can be written as they arrive and the filters it doesn't
+        # support can stop paging as soon as the rest are out of range
+        filtered = bool(app_uuid or since or until)
+        access_requests_iter = filter_access_requests(
+            client.iter_access_requests(
+                target_user_id=user_uuid, status=status_set, sort=sort, limit=None if filtered else limit
+            ),
+            app_id=app_uuid,
+            since=since,
+            until=until,
+            sort=sort,
+        )
+        if limit and filtered:
+            # Filtered out rows don't count, so keep paging until enough rows match
+            access_requests_iter = islice(access_requests_iter, limit)
+        if csv or output_json or ndjson or compact:
+            display_stream("requests", access_requests_iter, csv, output_json, ndjson, compact)
+            return
+        if limit:
+            display_all("requests", access_requests_iter, id_only=id_only)
+            return
+        matches = list(access_requests_iter)
+        shown = matches[(page - 1) * page_size : page * page_size] if paginate else matches
+        display(
+            "requests",
+            shown,
+            len(shown),
+            len(matches),
+            page_size=page_size,
+            page=page if paginate else 1,
+            id_only=id_only,
+            search=False,
+        )
+        return
     access_requests, count, total, _, _ = client.get_access_requests(
         target_user_id=user_uuid,
         status=status_set,
-        all=all,
+        all=not paginate,
         page=page,
         page_size=page_size,
+        sort=sort,
     )
 
-    access_requests = sorted(access_requests, key=lambda x: x.requested_at, reverse=True)
-
     display(
         "requests",
         access_requests,
         count,
         total,
-        csv,
-        output_json,
         page_size=page_size,
         page=page,
         id_only=id_only,
@@ -207,8 +322,11 @@ def list_requests(
 @list_group.command("apps", help="List apps in the appstore")
 @option("--like", default=None, help="Filters apps by search term")
 @option("--mine", is_flag=True, help="Show only my apps.")
+@option("--limit", default=None, type=IntRange(min=1), help="Show at most this many, fetching no more than that")
 @option("--csv", is_flag=True, help="Output as CSV")
 @option("--json", "output_json", is_flag=True, help="Output as JSON")
+@option("--ndjson", is_flag=True, help="Output as newline-delimited JSON, one object per line")
+@option("--compact", is_flag=True, help="Output as JSON on a single line, without indentation")
 @option("--paginate/--no-paginate", default=True, help="Pagination")
 @option("--page-size", default=100, help="Page size")
 @option("--page", default=1, help="Page")
@@ -217,16 +335,18 @@ def list_requests(
 def list_apps(
     like: str | None,
     mine: bool,
+    limit: int | None,
     csv: bool,
     output_json: bool,
+    ndjson: bool,
+    compact: bool,
     paginate: bool,
     page_size: int,
     page: int,
     id_only: bool,
 ) -> None:
-    all = csv or output_json or not paginate
     if mine:
-        access_requests = client.get_my_apps()
+        access_requests = client.get_my_apps(limit=limit)
         if len(access_requests) > 0:
             print(
                 tabulate(
@@ -238,27 +358,107 @@ def list_apps(
         else:
             print("No apps found.")
         return
-    apps, count, total = client.get_appstore_apps(name_search=like, all=all, page_size=page_size, page=page)
+    if csv or output_json or ndjson or compact or limit:
+        apps_iter = client.iter_appstore_apps(name_search=like, limit=limit)
+        if csv or output_json or ndjson or compact:
+            display_stream("apps", apps_iter, csv, output_json, ndjson, compact)
+        else:
+            display_all("apps", apps_iter, id_only=id_only)
+        return
+    apps, count, total = client.get_appstore_apps(name_search=like, all=not paginate, page_size=page_size, page=page)
     display(
         "apps",
         apps,
         count,
         total,
-        csv,
-        output_json,
         page=page,
         page_size=page_size,
         id_only=id_only,
     )
 
 
+def filter_access_requests(
+    access_requests: Iterable[AccessRequest],
+    app_id: UUID | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    sort: str = "desc",
+) -> Iterator[AccessRequest]:
+    """Applies the filters the API doesn't support, stopping once the sort order rules out more matches."""
+    for access_request in access_requests:
+        requested_at = datetime.fromisoformat(access_request.requested_at.removesuffix("Z")).replace(tzinfo=None)
+        if since and requested_at < since:
+            if sort == "desc":
+                return
+            continue
+        if until and requested_at >= until:
+            if sort == "asc":
+                return
+            continue
+        if app_id and access_request.app_id != app_id:
+            continue
+        yield access_request
+
+
+def display_changes(
+    checkpoint_path: Path,
+    target_user_id: UUID | None,
+    status: set[str] | None,
+    app_id: UUID | None,
+    csv: bool,
+    json: bool,
+    ndjson: bool,
+    compact: bool,
+    id_only: bool,
+) -> None:
+    """Writes the requests that are new or changed since the checkpoint, then moves the checkpoint forward."""
+    query = {
+        "target_user_id": str(target_user_id) if target_user_id else None,
+        "status": sorted(status) if status else None,
+        "app": str(app_id) if app_id else None,
+    }
+    try:
+        checkpoint = Checkpoint.load(checkpoint_path, query)
+    except CheckpointError as e:
+        echo(str(e), err=True)
+        raise SystemExit(1) from e
+    since = f"since {checkpoint.newest}" if checkpoint.newest else "on the first run"
+    changes = filter_access_requests(iter_changes(client, checkpoint, target_user_id, status), app_id=app_id)
+    written = 0
+
+    def counted() -> Iterator[AccessRequest]:
+        nonlocal written
+        for access_request in changes:
+            written += 1
+            yield access_request
+
+    if not (csv or json or ndjson or compact):
+        rows = list(counted())
+        display("requests", rows, len(rows), len(rows), page=1, page_size=len(rows), id_only=id_only)
+    elif (first := next(changes, None)) is None:
+        # Scripts read the output on every run, and most runs find nothing, so write an empty document
+        if not (csv or ndjson):
+            print("[]")
+    else:
+        written = 1
+        display_stream("requests", chain([first], counted()), csv, json, ndjson, compact)
+    # Only saved once everything was written, so an interrupted run is repeated in full next time
+    checkpoint.save()
+    echo(f"{written} new or changed requests {since}", err=True)
+
+
+def display_all(description: str, data: Iterable[LumosModel], id_only: bool = False) -> None:
+    """Shows every row as one table, for results that were already cut down to size."""
+    rows = list(data)
+    display(description, rows, len(rows), len(rows), page=1, page_size=len(rows), id_only=id_only)
+
+
+@phase("render")
 def display(
     description: str,
     data: list[LumosModel],
     count: int,
     total: int,
-    csv: bool,
-    json: bool,
     page: int,
     page_size: int,
     id_only: bool = False,
@@ -267,17 +467,9 @@ def display(
     if len(data) == 0:
         print(f"No {description} found.")
         return
-    if csv:
-        for row in data:
-            print(",".join([str(cell).replace(", ", "|") for cell in row.tabulate()]))
-        return
-    if json:
-        print(dumps([d.__dict__ for d in data], default=str, indent=2))
-        return
     if id_only:
-        if len(data) > 0:
-            for row in data:
-                print(row.tabulate()[0])
+        for row in data:
+            print(row.tabulate()[0])
         return
     headers = data[0].headers()
     print(tabulate([d.tabulate() for d in data], headers=headers), "\n")
@@ -287,3 +479,41 @@ def display(
             print(f"There are {remaining} more {description} that match your search. Use --like to search.\n")
         else:
             print(f"There are {remaining} more {description} not shown.\n")
+
+
+@phase("render")
+def display_stream(
+    description: str,
+    data: Iterable[LumosModel],
+    csv: bool,
+    json: bool,
+    ndjson: bool,
+    compact: bool = False,
+) -> None:
+    """Writes each row as soon as it arrives, so output starts after the first page is fetched."""
+    rows = iter(data)
+    if (first := next(rows, None)) is None:
+        print(f"No {description} found.")
+        return
+    if csv:
+        for row in chain([first], rows):
+            print(",".join([str(cell).replace(", ", "|") for cell in row.tabulate()]))
+        return
+    if ndjson:
+        for row in chain([first], rows):
+            print(dumps(row))
+        return
+    if compact:
+        print("[", end="")
+        for row in rows:
+            print(dumps(first), end=",")
+            first = row
+        print(dumps(first) + "]")
+        return
+    # Same layout as dumping the whole list with indent=2, one element at a time
+    print("[")
+    for row in rows:
+        print(indent(dumps(first, indent=True), "  ") + ",")
+        first = row
+    print(indent(dumps(first, indent=True), "  "))
+    print("]")
@@ -0,0 +1,235 @@
+import csv
+import hashlib
+import json
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, TypeVar
+from uuid import UUID
+
+from lumos.common.client import ApiClient
+from lumos.common.models import App, Permission, User
+from lumos.request.durations import parse_duration
+
+T = TypeVar("T")
+
+# Separates several permissions in one CSV cell
+PERMISSION_SEPARATOR = ";"
+
+
+class BulkRowError(Exception):
+    """A row that can't be submitted, with a message saying why."""
+
+
+@dataclass
+class BulkRow:
+    """One access request to submit, as written in the input file."""
+
+    number: int
+    app: str
+    reason: str
+    permissions: list[str] = field(default_factory=list)
+    user: str | None = None
+    length: str | None = None
+
+    @property
+    def key(self) -> str:
+        """Identifies the row in the journal by its content, so edited or reordered rows are matched correctly."""
+        content = json.dumps([self.app, self.permissions, self.user, self.reason, self.length])
+        return hashlib.sha256(content.encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_dict(cls, number: int, raw: dict[str, Any]) -> "BulkRow":
+        raw = {k.strip().lower(): v for k, v in raw.items() if k}
+        app = (raw.get("app") or "").strip()
+        reason = (raw.get("reason") or "").strip()
+        if not app:
+            raise BulkRowError(f"row {number}: missing app")
+        if not reason:
+            raise BulkRowError(f"row {number}: missing reason")
+        permissions = raw.get("permissions", raw.get("permission")) or []
+        if isinstance(permissions, str):
+            permissions = permissions.split(PERMISSION_SEPARATOR)
+        length = raw.get("length")
+        return cls(
+            number=number,
+            app=app,
+            reason=reason,
+            permissions=[p.strip() for p in permissions if p.strip()],
+            user=(raw.get("user") or "").strip() or None,
+            length=str(length).strip() if length not in (None, "") else None,
+        )
+
+
+@dataclass
+class ResolvedRequest:
+    app: App
+    permissions: list[Permission]
+    user_id: UUID | None
+    expiration: int | None
+
+
+def read_rows(path: Path) -> list[BulkRow]:
+    """Reads a CSV file with a header row, or a JSON Lines file, into rows to submit."""
+    rows: list[BulkRow] = []
+    with path.open(newline="") as f:
+        if path.suffix.lower() in (".jsonl", ".ndjson"):
+            for number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        raw = json.loads(line)
+                    except ValueError as e:
+                        raise BulkRowError(f"row {number}: invalid JSON ({e})") from e
+                    rows.append(BulkRow.from_dict(number, raw))
+        else:
+            for number, raw in enumerate(csv.DictReader(f), start=1):
+                rows.append(BulkRow.from_dict(number, raw))
+    return rows
+
+
+class Journal:
+    """Append-only record of submitted rows, so an interrupted run can resume without duplicates."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self.submitted: dict[str, str] = {}
+        if path.exists():
+            with path.open() as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # The last line may be cut short if the previous run was killed mid-write
+                        continue
+                    if entry.get("status") == "submitted":
+                        self.submitted[entry["key"]] = entry.get("request_id", "")
+
+    def record(self, row: BulkRow, status: str, **details: Any) -> None:
+        entry = {"row": row.number, "key": row.key, "status": status, **details}
+        with self._lock, self.path.open("a") as f:
+            f.write(json.dumps(entry, default=str) + "\n")
+            f.flush()
+            if status == "submitted":
+                self.submitted[row.key] = str(details.get("request_id", ""))
+
+
+class LookupCache:
+    """Resolves app, permission and user names once per run, however many rows and workers ask."""
+
+    def __init__(self, client: ApiClient):
+        self.client = client
+        self._lock = threading.Lock()
+        self._results: dict[tuple, Future] = {}
+
+    def resolve(self, row: BulkRow) -> ResolvedRequest:
+        app = self.app(row.app)
+        permissions = [self.permission(app, p) for p in row.permissions]
+        user_id = self.user(row.user) if row.user else None
+        return ResolvedRequest(
+            app=app,
+            permissions=permissions,
+            user_id=user_id,
+            expiration=self.expiration(app, permissions, row.length),
+        )
+
+    def app(self, name: str) -> App:
+        return self._get(("app", name.lower()), lambda: self._find_app(name))
+
+    def permission(self, app: App, name: str) -> Permission:
+        return self._get(("permission", app.id, name.lower()), lambda: self._find_permission(app, name))
+
+    def user(self, name: str) -> UUID:
+        return self._get(("user", name.lower()), lambda: self._find_user(name))
+
+    def durations(self, app: App) -> list[str]:
+        return self._get(
+            ("durations", app.id),
+            lambda: self.client.get_appstore_app_setting(app.id).provisioning.time_based_access,
+        )
+
+    def expiration(self, app: App, permissions: list[Permission], length: str | None) -> int | None:
+        if not length or length.lower() == "unlimited":
+            return None
+        if length.isdigit():
+            return int(length)
+        options = permissions[0].duration_options if permissions else self.durations(app)
+        wanted = length.replace(" ", "").lower()
+        durations: dict[str, tuple[str, int | None]] = {}
+        for option in options:
+            seconds, key = parse_duration(option)
+            durations[key] = (option, seconds)
+        if wanted in durations:
+            return durations[wanted][1]
+        # A prefix like "2d" is fine, as long as it fits only one option
+        matches = [durations[key] for key in durations if key.startswith(wanted)]
+        if len(matches) == 1:
+            return matches[0][1]
+        if matches:
+            raise BulkRowError(f"length '{length}' could be any of: {', '.join(option for option, _ in matches)}")
+        raise BulkRowError(f"length '{length}' is not one of: {', '.join(options) or 'none'}")
+
+    def _get(self, key: tuple, load: Callable[[], T]) -> T:
+        """Runs load once per key; concurrent callers for the same key wait for the first."""
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+        if owner:
+            try:
+                future.set_result(load())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
+
+    def _find_app(self, name: str) -> App:
+        if app_id := _as_uuid(name):
+            if app := self.client.get_appstore_app(app_id):
+                return app
+            raise BulkRowError(f"app {name} not found")
+        apps, _, _ = self.client.get_appstore_apps(name_search=name, all=True)
+        return _pick_one(apps, name, "app", lambda a: [a.user_friendly_label])
+
+    def _find_permission(self, app: App, name: str) -> Permission:
+        if permission_id := _as_uuid(name):
+            permission = self.client.get_app_requestable_permission(permission_id)
+            if permission and permission.app_id == str(app.id):
+                return permission
+            raise BulkRowError(f"permission {name} not found for {app.user_friendly_label}")
+        permissions, _, _ = self.client.get_app_requestable_permissions(app_id=app.id, search_term=name, all=True)
+        return _pick_one(permissions, name, "permission", lambda p: [p.label])
+
+    def _find_user(self, name: str) -> UUID:
+        if user_id := _as_uuid(name):
+            return user_id
+        users, _, _ = self.client.get_users(like=name, all=True)
+        user: User = _pick_one(users, name, "user", lambda u: [u.email, f"{u.given_name} {u.family_name}"])
+        return user.id
+
+
+def iter_pending(rows: list[BulkRow], journal: Journal) -> Iterator[BulkRow]:
+    for row in rows:
+        if row.key not in journal.submitted:
+            yield row
+
+
+def _pick_one(candidates: list[T], name: str, what: str, labels: Callable[[T], list[str]]) -> T:
+    """Picks the candidate whose label matches exactly, or the only candidate there is."""
+    exact = [c for c in candidates if name.lower() in (label.lower() for label in labels(c))]
+    if len(exact) == 1:
+        return exact[0]
+    if len(candidates) == 1:
+        return candidates[0]
+    if not candidates:
+        raise BulkRowError(f"no {what} matches '{name}'")
+    raise BulkRowError(f"'{name}' matches {len(candidates)} {what}s, use an ID instead")
+
+
+def _as_uuid(value: str) -> UUID | None:
+    try:
+        return UUID(value)
+    except ValueError:
+        return None
@@ -1,13 +1,16 @@
-import re
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
 from uuid import UUID
 
-from click_extra import Context, confirm, echo, group, option, pass_context, prompt
+from click_extra import Context, IntRange, confirm, echo, group, option, pass_context, prompt
+from click_extra import Path as PathType
 from pick import pick
 from tabulate import tabulate
 
-from lumos.common.client import ApiClient
-from lumos.common.helpers import authenticate
+from lumos.common.client import ApiClient, LoginRequired
+from lumos.common.helpers import authenticate, check_current_apps
+from lumos.common.jsonio import dumps
 from lumos.common.models import (
     AccessRequest,
     App,
@@ -16,6 +19,11 @@ from lumos.common.models import (
     SupportRequestStatus,
     User,
 )
+from lumos.request.bulk import BulkRow, BulkRowError, Journal, LookupCache, iter_pending, read_rows
+from lumos.request.durations import parse_duration
+from lumos.request.picker import MAX_CANDIDATES, Candidates
+from lumos.request.prefetch import Prefetch
+from lumos.request.watch import RequestWatcher
 
 POLLING_INTERVAL = 6
 client = ApiClient()
@@ -87,33 +95,44 @@ def request(
 ) -> None:
     """Request access to an app."""
     if ctx.invoked_subcommand is None:
+        prefetch = Prefetch()
+        # Whatever is still waiting to be fetched when the wizard ends isn't needed anymore
+        ctx.call_on_close(prefetch.close)
         for_user_uuid = None
         if for_me is not True and mine is not True:
             if user_like is not None or not confirm("This request is for you?", default=True):
                 for_user_uuid = select_user(user_like)
         elif for_user:
             for_user_uuid = UUID(for_user)
+        # For the duplicate check at the end, loaded while the app and permissions are picked.
+        # Limited so it never stops to ask whether to fetch everything.
+        prefetch.start("my_apps", client.get_my_apps, for_user_uuid, limit=MAX_CANDIDATES)
 
         # Validate parameters or interactively input them
         app_uuid = UUID(app) if app else None
         selected_app: App = get_valid_app(app_uuid, app_like)
+        permission_uuids = [UUID(p) for p in permission] if permission else None
+        # Permissions to pick from load while the settings are fetched, in case the settings
+        # show them, and are dropped if they don't
+        permissions = None if permission_uuids else permission_candidates(selected_app)
         app_settings = client.get_appstore_app_setting(selected_app.id)
         duration_options = set(app_settings.provisioning.time_based_access)
         selected_permissions = None
 
-        permission_uuids = [UUID(p) for p in permission] if permission else None
-
         if app_settings.provisioning.groups_provisioning == ProvisioningMethodOption.GROUPS_AND_VISIBLE:
             selected_permissions = select_permissions(
                 selected_app,
                 app_settings.provisioning.allow_multiple_permission_selection,
                 permission_uuids,
                 permission_like,
+                candidates=permissions,
             )
             if selected_permissions:
                 duration_options = set(selected_permissions[0].duration_options)
                 for perm in selected_permissions[1:]:
                     duration_options = duration_options.intersection(perm.duration_options)
+        elif permissions is not None:
+            permissions.close()
 
         duration, duration_friendly = get_duration(duration_options, length)
 
@@ -123,6 +142,8 @@ def request(
         if wait is None:
             wait = confirm("Do you want to wait for the request to complete?", default=True)
 
+        warn_if_duplicate(prefetch, selected_app, selected_permissions)
+
         echo("\nAPP")
         echo(f"   {selected_app.user_friendly_label} [{selected_app.id}]")
         if selected_permissions:
@@ -192,7 +213,10 @@ def status(
 ) -> None:
     access_request: AccessRequest | None
     if last:
-        access_requests, count, _, _, _ = client.get_access_requests(target_user_id=client.get_current_user_id())
+        # Only the newest request is needed, so ask for a single row
+        access_requests, count, _, _, _ = client.get_access_requests(
+            target_user_id=client.get_current_user_id(), page_size=1
+        )
         if count == 0:
             echo("No pending requests found")
             return
@@ -267,6 +291,63 @@ def _poll(request_id: UUID, wait_max: int = 120):
     echo(f"Use `lumos request status --request-id {request_id}` to check the status later.")
 
 
+@request.command(
+    "watch",
+    help="Watch many requests until they finish, writing each status change as a line of JSON",
+)
+@option("--request-id", "request_ids", multiple=True, help="Request ID. Repeat to watch several")
+@option(
+    "--journal",
+    default=None,
+    type=PathType(exists=True, dir_okay=False, path_type=Path),
+    help="Watch every request submitted by `lumos request bulk`, as recorded in its journal",
+)
+@option("--pending", is_flag=True, help="Watch every pending request you can see")
+@option("--mine", is_flag=True, help="With --pending, only watch requests for me")
+@option("--for-user", default=None, type=str, help="With --pending, only watch requests for this user UUID")
+@option(
+    "--timeout",
+    default=None,
+    type=IntRange(min=1),
+    help="Give up after this many minutes. By default, waits until every request finishes",
+)
+@authenticate
+def watch(
+    request_ids: tuple[str, ...],
+    journal: Path | None,
+    pending: bool,
+    mine: bool,
+    for_user: str | None,
+    timeout: int | None,
+) -> None:
+    ids = [UUID(id) for id in request_ids]
+    if journal:
+        ids += [UUID(id) for id in Journal(journal).submitted.values() if id]
+    if not ids and not pending:
+        echo("Provide --request-id, --journal or --pending", err=True)
+        raise SystemExit(1)
+
+    watcher = RequestWatcher(client)
+    for id in ids:
+        watcher.add(id)
+    if pending:
+        target_user_id = client.get_current_user_id() if mine else UUID(for_user) if for_user else None
+        pending_requests, _, _, _, _ = client.get_access_requests(
+            target_user_id=target_user_id, status=SupportRequestStatus.PENDING_STATUSES, all=True
+        )
+        for access_request in pending_requests:
+            if event := watcher.add_known(access_request):
+                print(dumps(event), flush=True)
+    if not watcher.requests:
+        echo("No pending requests found", err=True)
+        return
+
+    for event in watcher.run(timeout * 60 if timeout else None):
+        print(dumps(event), flush=True)
+        if event["event"] == "timeout":
+            raise SystemExit(1)
+
+
 @request.command("cancel", help="Cancel a request by ID")
 @option("--request-id", default=None, type=str, help="Request ID")
 @option("--reason", default=None, help="Reason for cancellation")
@@ -304,59 +385,149 @@ def cancel(request_id: str | None, reason: str | None) -> None:
     echo("Request cancelled! 🚫")
 
 
+@request.command(
+    "bulk",
+    help="Submit many requests from a CSV or JSON Lines file with app, permissions, user, reason and length columns",
+)
+@option(
+    "--file",
+    "file",
+    required=True,
+    type=PathType(exists=True, dir_okay=False, path_type=Path),
+    help="CSV file with a header row, or a .jsonl file with one request per line",
+)
+@option(
+    "--journal",
+    default=None,
+    type=PathType(dir_okay=False, path_type=Path),
+    help="Where to record progress so an interrupted run can resume. Defaults to the file name plus .journal",
+)
+@option(
+    "--workers",
+    default=client.max_concurrency,
+    type=IntRange(1, 16),
+    help="How many requests to submit at once",
+)
+@option("--dry-run", is_flag=True, help="Resolve every row and show what would be requested, without requesting")
+@authenticate
+def bulk(file: Path, journal: Path | None, workers: int, dry_run: bool) -> None:
+    try:
+        rows = read_rows(file)
+    except BulkRowError as e:
+        echo(f"Invalid file: {e}", err=True)
+        raise SystemExit(1) from e
+    progress = Journal(journal or file.with_name(f"{file.name}.journal"))
+    pending = list(iter_pending(rows, progress))
+    skipped = len(rows) - len(pending)
+    if skipped:
+        echo(f"Skipping {skipped} requests already submitted according to {progress.path}")
+
+    if pending:
+        # Rows are submitted from worker threads, which can't log in again, so make sure the
+        # login is still good before starting them
+        client.get_current_user_id()
+    lookups = LookupCache(client)
+
+    def submit(row: BulkRow) -> tuple[list[str] | None, str | None]:
+        """Returns the resolved request on a dry run, or why the row failed."""
+        try:
+            resolved = lookups.resolve(row)
+            if dry_run:
+                return [
+                    str(row.number),
+                    resolved.app.user_friendly_label,
+                    ", ".join(p.label for p in resolved.permissions),
+                    str(resolved.user_id or "me"),
+                    str(resolved.expiration or "Unlimited"),
+                ], None
+            response = client.create_access_request(
+                app_id=resolved.app.id,
+                note=row.reason,
+                expiration_in_seconds=resolved.expiration,
+                permission_ids=[p.id for p in resolved.permissions] or None,
+                target_user_id=resolved.user_id,
+            )
+        except BulkRowError as e:
+            error = str(e)
+        except LoginRequired:
+            # Not a failure of the row: it's submitted again once the main thread logs in
+            raise
+        except SystemExit:
+            # The client has already printed why the API refused it
+            error = "rejected by the API"
+        else:
+            if response:
+                progress.record(row, "submitted", request_id=response.id)
+                return None, None
+            error = "no request was created"
+        if not dry_run:
+            progress.record(row, "failed", error=error)
+        return None, error
+
+    resolved_rows: list[list[str]] = []
+    failed: list[list[str]] = []
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {executor.submit(submit, row): row for row in pending}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                resolved_row, error = future.result()
+            except LoginRequired:
+                resolved_row, error = submit(futures[future])
+            if resolved_row:
+                resolved_rows.append(resolved_row)
+            if error:
+                failed.append([str(futures[future].number), error])
+            print(f"⏳ Processed {done} of {len(pending)} requests ...", end="\r")
+    finally:
+        executor.shutdown(cancel_futures=True)
+    print(" " * 60, end="\r")
+
+    failed.sort(key=lambda r: int(r[0]))
+    if dry_run:
+        resolved_rows.sort(key=lambda r: int(r[0]))
+        print(tabulate(resolved_rows, headers=["Row", "App", "Permissions", "User", "Length"]), "\n")
+    else:
+        echo(
+            f"{len(pending) - len(failed)} requests submitted, {len(failed)} failed, {skipped} skipped. "
+            f"Progress is in {progress.path}"
+        )
+    if failed:
+        print(tabulate(failed, headers=["Row", "Error"]), "\n")
+        if not dry_run:
+            echo("Fix the failed rows and run the same command again to retry them.")
+        raise SystemExit(1)
+
+
 def select_user(user_like: str | None = None) -> UUID:
-    users: list[User] = []
-    for_user: User | None = None
-    while for_user is None:
-        while True:
-            users, count, total = client.get_users(like=user_like)
-            if total == 0:
-                if user_like:
-                    echo(f"No users found for '{user_like}'")
-                    user_like = prompt("🔍 Give me something to search on")
-                else:
-                    echo("No users found")
-                    raise SystemExit(1)
-            elif count == 1:
-                for_user = users[0]
-                break
-            elif count < total:
-                echo("Too many users to show.")
-                user_like = prompt("🔍 Give me something to search on")
-            else:
-                break
-        if not for_user:
-            description = "Select user (use ENTER to confirm)"
-            for_user, _ = pick(users, description)
+    users: Candidates[User] = Candidates("users", lambda like, limit: client.iter_users(like=like, limit=limit))
+    matches = users.narrow(user_like)
+    if not matches:
+        echo("No users found")
+        raise SystemExit(1)
+    if len(matches) == 1:
+        for_user = matches[0]
+    else:
+        for_user, _ = pick(matches, "Select user (use ENTER to confirm)")
     echo(f"USER: {for_user.email} [{for_user.id}]\n")
     return for_user.id
 
 
 def get_valid_app(app_id: UUID | None = None, app_like: str | None = None) -> App:
-    app = None
-    while not app_id or not (app := client.get_appstore_app(app_id)):
-        apps: list[App] = []
-        while True:
-            print("\n⏳ Loading your apps ...", end="\r")
-            apps, count, total = client.get_appstore_apps(name_search=app_like, page_size=25)
-            print("                          ", end="\r")
-            if total == 0:
-                if app_like:
-                    app_like = prompt(f"No apps found for '{app_like}'\n🔍 Give me something to search on")
-                else:
-                    echo("No apps found")
-                    raise SystemExit(1)
-            elif count < total:
-                echo("")
-                app_like = prompt("Too many apps to show.\n🔍 Give me something to search on")
-            else:
-                break
-        if count == 1:
-            app = apps[0]
+    # An app picked from the list is already valid, so only an app passed by ID is looked up
+    app = client.get_appstore_app(app_id) if app_id else None
+    if app is None:
+        apps: Candidates[App] = Candidates(
+            "apps", lambda like, limit: client.iter_appstore_apps(name_search=like, limit=limit)
+        )
+        matches = apps.narrow(app_like)
+        if not matches:
+            echo("No apps found")
+            raise SystemExit(1)
+        if len(matches) == 1:
+            app = matches[0]
         else:
-            app, _ = pick(apps, "Select an app (press ENTER to confirm)")
-        if app:
-            app_id = app.id
+            app, _ = pick(matches, "Select an app (press ENTER to confirm)")
     echo(f"APP: {app.user_friendly_label} [{app.id}]\n")
     return app
 
@@ -366,32 +537,20 @@ def select_permissions(
     allow_multiple_permission_selection: bool,
     permission_ids: list[UUID] | None,
     permission_like: str | None = None,
+    candidates: Candidates[Permission] | None = None,
 ) -> list[Permission] | None:
     valid_permissions = get_valid_permissions(app, permission_ids, allow_multiple_permission_selection)
     if len(valid_permissions) > 0:
         return valid_permissions
+    candidates = candidates or permission_candidates(app)
     done_selecting = False
     valid_permissions_dict: dict[str, Permission] = {}
     while not done_selecting:
-        permissions: list[Permission] = []
-        while True:
-            print("\n⏳ Loading permissions for app ...", end="\r")
-            permissions, count, total = client.get_app_requestable_permissions(
-                app_id=app.id, search_term=permission_like, page_size=25
-            )
-            print("                                    ", end="\r")
-            if total == 0:
-                if permission_like:
-                    permission_like = prompt(
-                        f"No permissions found for '{permission_like}'\n🔍 Give me something to search on"
-                    )
-                else:
-                    echo("No permissions found (you're just requesting the app)")
-                    return None
-            elif count < total:
-                permission_like = prompt("Too many permissions to show.\n🔍 Give me something to search on")
-            else:
-                break
+        permissions = candidates.narrow(permission_like)
+        if not permissions:
+            echo("No permissions found (you're just requesting the app)")
+            return None
+        count = len(permissions)
         if count > 1:
             already_selected = ", ".join([p.label for p in valid_permissions_dict.values()])
             if allow_multiple_permission_selection:
@@ -418,23 +577,48 @@ def select_permissions(
     return list(valid_permissions_dict.values())
 
 
+def permission_candidates(app: App) -> Candidates[Permission]:
+    """Starts loading the permissions that can be requested for the app."""
+    return Candidates(
+        "permissions",
+        lambda like, limit: client.iter_app_requestable_permissions(app_id=app.id, search_term=like, limit=limit),
+    )
+
+
+def warn_if_duplicate(prefetch: Prefetch, app: App, permissions: list[Permission] | None) -> None:
+    """Warns when the user already has a pending or granted request for the same access."""
+    try:
+        my_apps = prefetch.get("my_apps")
+    except SystemExit:
+        # The client has already printed why, and the API still checks when the request is made
+        return
+    existing, message = check_current_apps(my_apps, app, permissions)
+    if message:
+        echo(f"\n⚠️  {message} (ID {existing.id}, {existing.status})", err=True)
+
+
 def get_valid_permissions(
     app: App,
     permission_ids: list[UUID] | None,
     allow_multiple_permission_selection: bool,
 ) -> list[Permission]:
-    valid_permissions: list[Permission] = []
+    """Looks up every permission passed with --permission at once, and exits saying what's wrong with each bad one."""
     if not permission_ids:
         return []
+    errors = []
     if len(permission_ids) > 1 and not allow_multiple_permission_selection:
-        return []
-    for permission_id in permission_ids:
-        if not (permission := client.get_app_requestable_permission(permission_id)):
-            return []
-        if not permission.app_id.__eq__(app.id):
-            return []
-        valid_permissions.append(permission)
-    return valid_permissions
+        errors.append(f"{app.user_friendly_label} only allows one permission per request")
+    permissions = client.get_app_requestable_permissions_by_id(permission_ids)
+    for permission_id, permission in permissions.items():
+        if permission is None:
+            errors.append(f"Permission {permission_id} not found")
+        elif permission.app_id != str(app.id):
+            errors.append(f"Permission {permission_id} ({permission.label}) isn't for {app.user_friendly_label}")
+    if errors:
+        for error in errors:
+            echo(error, err=True)
+        raise SystemExit(1)
+    return [permission for permission in permissions.values() if permission]
 
 
 def select_duration(durations: set[str], duration_friendly: str | None) -> tuple[int | None, str]:
@@ -451,24 +635,11 @@ def select_duration(durations: set[str], duration_friendly: str | None) -> tuple
             min_selection_count=1,
         )
 
-    time_in_seconds = None
-    if match := re.match(r"(\d+) ", selected):
-        time_in_seconds = int(match.group(1)) * 60 * 60
-        if re.match(r".*days", selected):
-            time_in_seconds = 24 * time_in_seconds
+    time_in_seconds, _ = parse_duration(selected)
     echo(f"DURATION: {selected}{f' ({time_in_seconds} seconds)' if time_in_seconds else ''}")
     return time_in_seconds, selected
 
 
-def parse_duration(duration: str) -> tuple[int | None, str]:
-    time_in_seconds = None
-    if match := re.match(r"(\d+) ", duration):
-        time_in_seconds = int(match.group(1)) * 60 * 60
-        if re.match(r".* d", duration):
-            time_in_seconds = 24 * time_in_seconds
-    return time_in_seconds, duration.replace(" ", "").lower()
-
-
 def get_duration(possible_durations: set[str], input_length: str | None) -> tuple[int | None, str]:
     duration_friendly: str | None = None
     durations = {}
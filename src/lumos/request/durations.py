@@ -0,0 +1,14 @@
+import re
+
+
+def parse_duration(duration: str) -> tuple[int | None, str]:
+    """Returns how many seconds a duration option like "12 hours" or "2 days" lasts, and its key.
+
+    The key is the option lowercased without spaces, like "2days", for matching what users type.
+    """
+    time_in_seconds = None
+    if match := re.match(r"(\d+) ", duration):
+        time_in_seconds = int(match.group(1)) * 60 * 60
+        if re.match(r".* d", duration):
+            time_in_seconds = 24 * time_in_seconds
+    return time_in_seconds, duration.replace(" ", "").lower()
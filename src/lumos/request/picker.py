@@ -0,0 +1,156 @@
+import threading
+from collections.abc import Callable, Iterable
+from typing import Generic, TypeVar
+
+from click_extra import prompt
+
+from lumos.common.client import LoginRequired
+from lumos.common.index import INDEXED_KINDS
+
+T = TypeVar("T")
+
+# Most choices shown in a picker at once. More than this and we ask for something to search on.
+PICK_LIMIT = 25
+# Most users, apps or permissions loaded up front. Past this, searches go to the API instead.
+# Loading no more than this keeps us out of the client's "This may take a while" prompt,
+# which asks for more than 5000 results.
+MAX_CANDIDATES = 5000
+
+
+class Candidates(Generic[T]):
+    """Everything one interactive picker can offer, loaded once and searched locally.
+
+    Loading starts in the background as soon as the candidates are created, so it overlaps
+    with whatever the user is doing. Every search after that is answered from memory, ranked
+    by how well it matches, so narrowing a search down costs no requests. When all
+    MAX_CANDIDATES load there may be more, so each search asks the API for the matches instead.
+
+    `load(like, limit)` yields the candidates matching `like`, or all of them when it's None.
+    """
+
+    def __init__(self, kind: str, load: Callable[[str | None, int], Iterable[T]]):
+        self.kind = kind
+        self._load = load
+        self._fields = INDEXED_KINDS[kind]
+        self._items: list[tuple[str, T]] = []
+        self._error: BaseException | None = None
+        self._closed = False
+        self.complete = False
+        self._thread = threading.Thread(target=self._run, name=f"load-{kind}", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            for item in self._load(None, MAX_CANDIDATES):
+                if self._closed:
+                    return
+                self._items.append((self._text(item), item))
+            self.complete = len(self._items) < MAX_CANDIDATES
+        except BaseException as e:
+            # Raised again in the thread that searches, which is the one that can exit
+            self._error = e
+
+    def close(self) -> None:
+        """Stops loading candidates that turned out not to be needed."""
+        self._closed = True
+
+    def _text(self, item: T) -> str:
+        return " ".join(str(getattr(item, field)) for field in self._fields).lower()
+
+    def wait(self) -> None:
+        """Blocks until loading is done, showing how far along it is."""
+        self._thread.join(0.2)
+        while self._thread.is_alive():
+            print(f"⏳ Loading {self.kind} ({len(self._items)} so far) ...", end="\r")
+            self._thread.join(0.2)
+        print(" " * 60, end="\r")
+        if isinstance(self._error, LoginRequired):
+            # Logging in again can only happen on the main thread, so load here instead
+            self._error = None
+            self._items = []
+            self._run()
+        if self._error is not None:
+            raise self._error
+
+    def search(self, like: str | None = None) -> list[T]:
+        """Returns the candidates matching every word of `like`, best match first.
+
+        Candidates that only have the letters of a word spread out are left out when any
+        candidate has every word whole, since short words are spread through most long lists.
+        """
+        self.wait()
+        items = self._items
+        if like and not self.complete:
+            items = [(self._text(item), item) for item in self._load(like, MAX_CANDIDATES)]
+        if not like or not like.split():
+            return [item for _, item in items]
+        query = like.lower().split()
+        whole: list[tuple[int, int, int, T]] = []
+        spread: list[tuple[int, int, int, T]] = []
+        for text, item in items:
+            if (score := fuzzy_score(query, text)) is not None:
+                matches = whole if all(word in text for word in query) else spread
+                matches.append((-score, len(text), len(matches), item))
+        scored = whole or spread
+        scored.sort(key=lambda entry: entry[:3])
+        return [item for *_, item in scored]
+
+    def narrow(self, like: str | None = None) -> list[T]:
+        """Asks for something to search on until few enough candidates match to pick from.
+
+        Returns an empty list when there are no candidates at all.
+        """
+        while True:
+            matches = self.search(like)
+            if not matches:
+                if not like:
+                    return []
+                like = prompt(f"No {self.kind} found for '{like}'\n🔍 Give me something to search on")
+            elif len(matches) > PICK_LIMIT:
+                found = f"{MAX_CANDIDATES} or more" if len(matches) >= MAX_CANDIDATES else str(len(matches))
+                like = prompt(f"{found} {self.kind} found. Too many to show.\n🔍 Give me something to search on")
+            else:
+                return matches
+
+
+def fuzzy_score(query: list[str], text: str) -> int | None:
+    """Scores how well lowercase `text` matches every word of `query`, or None if it doesn't.
+
+    A word found whole scores higher than one whose letters are spread out, and higher
+    still at the start of a word in `text`, so "ada" ranks "Ada Lovelace" above "Adam",
+    and "Adam" above "Canada".
+    """
+    score = 0
+    for word in query:
+        if (word_score := _word_score(word, text)) is None:
+            return None
+        score += word_score
+    return score
+
+
+def _word_score(word: str, text: str) -> int | None:
+    start = text.find(word)
+    if start != -1:
+        score = 10 * len(word)
+        best = score
+        while start != -1:
+            if start == 0 or not text[start - 1].isalnum():
+                end = start + len(word)
+                whole_word = end == len(text) or not text[end].isalnum()
+                best = max(best, score + (20 if start == 0 else 15) + (5 if whole_word else 0))
+            start = text.find(word, start + 1)
+        return best
+    # Not found whole, so look for its letters in order, rewarding runs and word starts
+    score = 0
+    position = -1
+    for char in word:
+        found = text.find(char, position + 1)
+        if found == -1:
+            return None
+        score += 1
+        if found == position + 1:
+            score += 2
+        if found == 0 or not text[found - 1].isalnum():
+            score += 3
+        position = found
+    return score
@@ -0,0 +1,51 @@
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+from lumos.common.client import LoginRequired
+
+
+class Prefetch:
+    """Starts API calls the request wizard is about to need, while the user is still answering prompts.
+
+    Each call is started under a key with `start`, and `get` waits for its result. Errors,
+    including the client exiting, are raised by `get`, so a prefetch nobody asks for never
+    fails the command. Calls that need to log in again are run again by `get`, since only
+    the main thread may open the browser to log in. `close` drops whatever hasn't started.
+
+    Calls run in daemon threads, like the picker's loading, so one still running when the
+    wizard ends doesn't hold up the exit.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self._slots = threading.Semaphore(max_workers)
+        self._calls: dict[Hashable, tuple[Future, Callable[[], Any]]] = {}
+
+    def start(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        if key in self._calls:
+            return
+        future: Future = Future()
+        self._calls[key] = (future, lambda: fn(*args, **kwargs))
+        threading.Thread(target=self._run, args=(key,), name=f"prefetch-{key}", daemon=True).start()
+
+    def _run(self, key: Hashable) -> None:
+        future, call = self._calls[key]
+        with self._slots:
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(call())
+            except BaseException as e:
+                future.set_exception(e)
+
+    def get(self, key: Hashable) -> Any:
+        future, call = self._calls[key]
+        try:
+            return future.result()
+        except LoginRequired:
+            return call()
+
+    def close(self) -> None:
+        for future, _ in self._calls.values():
+            future.cancel()
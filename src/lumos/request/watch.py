@@ -0,0 +1,203 @@
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from lumos.common.client import PAGE_SIZE, ApiClient, LoginRequired
+from lumos.common.models import AccessRequest, SupportRequestStatus
+
+# Seconds between checks on a request. The gap doubles every time its status hasn't
+# changed, up to the maximum, and drops back to the minimum when it does change.
+MIN_INTERVAL = 5.0
+MAX_INTERVAL = 60.0
+BACKOFF_FACTOR = 2.0
+
+
+@dataclass
+class WatchedRequest:
+    id: UUID
+    status: str | None = None
+    app_name: str | None = None
+    target_user_id: UUID | None = None
+    requested_at: str | None = None
+    interval: float = MIN_INTERVAL
+    next_check: float = 0.0
+    missing: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.missing or (self.status is not None and self.status not in SupportRequestStatus.PENDING_STATUSES)
+
+
+class RequestWatcher:
+    """Follows many access requests until they all leave the pending statuses.
+
+    Requests due for a check are refreshed together by paging through the pending
+    requests list, newest first, and stopping once every due request has been seen.
+    Requests that dropped off that list are looked up the same way among every recent
+    request to learn how they finished, and only fetched one by one as a last resort.
+    """
+
+    def __init__(
+        self,
+        client: ApiClient,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.client = client
+        self.clock = clock
+        self.sleep = sleep
+        self.requests: dict[UUID, WatchedRequest] = {}
+
+    @property
+    def pending(self) -> list[WatchedRequest]:
+        return [r for r in self.requests.values() if not r.done]
+
+    def add(self, id: UUID) -> None:
+        """Watches a request whose status isn't known yet, so the first refresh looks it up."""
+        self.requests.setdefault(id, WatchedRequest(id=id))
+
+    def add_known(self, access_request: AccessRequest) -> dict[str, Any] | None:
+        """Watches a request that was just listed, and returns the event for its current status."""
+        watched = self.requests.setdefault(access_request.id, WatchedRequest(id=access_request.id))
+        return self._update(watched, access_request, self.clock())
+
+    def run(self, timeout: float | None = None) -> Iterator[dict[str, Any]]:
+        """Yields an event for every status change until no request is pending or the timeout passes."""
+        deadline = self.clock() + timeout if timeout else None
+        while pending := self.pending:
+            now = self.clock()
+            if deadline is not None and now >= deadline:
+                yield _event("timeout", pending=[str(r.id) for r in pending])
+                return
+            due = [r for r in pending if r.next_check <= now]
+            if not due:
+                wake_at = min(r.next_check for r in pending)
+                self.sleep(min(wake_at, deadline) - now if deadline is not None else wake_at - now)
+                continue
+            yield from self.refresh(due)
+
+    def refresh(self, due: list[WatchedRequest]) -> Iterator[dict[str, Any]]:
+        target_user_ids = {r.target_user_id for r in due}
+        # Only filter by user when they all agree, otherwise one scan covers everyone
+        target_user_id = next(iter(target_user_ids)) if len(target_user_ids) == 1 else None
+        oldest = None if any(r.requested_at is None for r in due) else min(r.requested_at for r in due)
+        due_ids = {r.id for r in due}
+        found = self._scan(target_user_id, SupportRequestStatus.PENDING_STATUSES, due_ids, oldest)
+
+        now = self.clock()
+        for access_request in found.values():
+            watched = self.requests.get(access_request.id)
+            if (
+                watched
+                and not watched.done
+                and (event := self._update(watched, access_request, now, watched.id in due_ids))
+            ):
+                yield event
+
+        # Whatever isn't pending anymore has finished. Look for it among every recent request,
+        # as long as we know how far back to look, and fetch anything still missing one by one.
+        left = [r for r in due if r.id not in found]
+        if left and all(r.requested_at for r in left):
+            oldest = min(r.requested_at for r in left)
+            found = self._scan(target_user_id, None, {r.id for r in left}, oldest)
+        else:
+            found = {}
+        statuses: dict[UUID, AccessRequest | None] = dict(found)
+        if missing := [r for r in left if r.id not in found]:
+            statuses.update(self._get_statuses([r.id for r in missing]))
+        now = self.clock()
+        for watched in left:
+            if watched.id not in statuses:
+                # The API failed to return it, so try again on its next check
+                watched.next_check = now + watched.interval
+            elif (access_request := statuses[watched.id]) is None:
+                watched.missing = True
+                yield _event("not_found", id=str(watched.id))
+            elif event := self._update(watched, access_request, now):
+                yield event
+
+    def _scan(
+        self,
+        target_user_id: UUID | None,
+        status: list[str] | None,
+        wanted: set[UUID],
+        oldest: str | None,
+    ) -> dict[UUID, AccessRequest]:
+        """Pages through requests, newest first, until every wanted one is seen or can't be."""
+        found: dict[UUID, AccessRequest] = {}
+        page = 1
+        while True:
+            access_requests, count, _, _, pages = self.client.get_access_requests(
+                target_user_id=target_user_id,
+                status=status,
+                page_size=PAGE_SIZE,
+                page=page,
+            )
+            for access_request in access_requests:
+                found[access_request.id] = access_request
+            if wanted <= found.keys() or page >= pages or count == 0:
+                return found
+            # Requests are sorted newest first, so older pages can't hold the ones we want
+            if oldest and access_requests[-1].requested_at < oldest:
+                return found
+            page += 1
+
+    def _get_statuses(self, ids: list[UUID]) -> dict[UUID, AccessRequest | None]:
+        """Fetches requests one by one, with None for those that are gone.
+
+        Requests the API fails to return are left out, rather than taken for gone.
+        """
+        statuses: dict[UUID, AccessRequest | None] = {}
+        with ThreadPoolExecutor(max_workers=min(self.client.max_concurrency, len(ids))) as executor:
+            futures = {id: executor.submit(self.client.get_request_status, id, missing_ok=True) for id in ids}
+        for id, future in futures.items():
+            try:
+                statuses[id] = future.result()
+            except LoginRequired:
+                # Only the main thread can log in again
+                statuses[id] = self.client.get_request_status(id, missing_ok=True)
+            except SystemExit:
+                # The client has already printed why
+                continue
+        return statuses
+
+    def _update(
+        self,
+        watched: WatchedRequest,
+        access_request: AccessRequest,
+        now: float,
+        due: bool = True,
+    ) -> dict[str, Any] | None:
+        previous = watched.status
+        watched.status = access_request.status
+        watched.app_name = access_request.app_name
+        watched.target_user_id = access_request.target_user.id
+        watched.requested_at = access_request.requested_at
+        changed = previous != watched.status
+        if changed:
+            watched.interval = MIN_INTERVAL
+        elif due:
+            watched.interval = min(watched.interval * BACKOFF_FACTOR, MAX_INTERVAL)
+        else:
+            # Seen in passing while refreshing others, so keep its schedule
+            return None
+        watched.next_check = now + watched.interval
+        if not changed:
+            return None
+        return _event(
+            "status",
+            id=str(watched.id),
+            app_name=watched.app_name,
+            target_user_id=str(watched.target_user_id),
+            previous_status=previous,
+            status=watched.status,
+            done=watched.done,
+        )
+
+
+def _event(name: str, **details: Any) -> dict[str, Any]:
+    return {"event": name, "at": datetime.now(timezone.utc).isoformat(timespec="seconds"), **details}
@@ -0,0 +1 @@
+from .cli import sync as sync
@@ -0,0 +1,41 @@
+from click_extra import Choice, command, echo, option
+from tabulate import tabulate
+
+from lumos.common.client import ApiClient
+from lumos.common.helpers import authenticate
+from lumos.common.index import INDEXED_KINDS, local_index
+
+client = ApiClient()
+
+
+@command(
+    "sync",
+    help="Mirror users, apps, permissions and groups into a local index so searches answer in milliseconds.",
+)
+@option(
+    "--only",
+    multiple=True,
+    type=Choice(list(INDEXED_KINDS)),
+    help="Only sync these resources. Can be repeated.",
+)
+@option("--clear", is_flag=True, help="Delete the local index instead of syncing")
+@authenticate
+def sync(only: tuple, clear: bool) -> None:
+    if clear:
+        local_index.clear()
+        echo("Local index deleted.")
+        return
+    sources = {
+        "users": lambda: client.iter_users(use_index=False),
+        "apps": lambda: client.iter_appstore_apps(use_index=False),
+        "permissions": lambda: client.iter_app_requestable_permissions(app_id=None, use_index=False),
+        "groups": lambda: client.iter_groups(app_id=None, use_index=False),
+    }
+    rows = []
+    for kind in only or INDEXED_KINDS:
+        print(f"⏳ Syncing {kind} ...", end="\r")
+        result = local_index.sync(kind, client.url, sources[kind]())
+        print("                          ", end="\r")
+        rows.append([kind, result.added, result.updated, result.removed, result.total])
+    print(tabulate(rows, headers=["Resource", "Added", "Updated", "Removed", "Total"]), "\n")
+    echo(f"Index is at {local_index.path}")
@@ -0,0 +1,211 @@
+import asyncio
+import json
+from uuid import UUID
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from lumos.common.async_client import AsyncApiClient  # noqa: E402
+from lumos.common.errors import (  # noqa: E402
+    ApiError,
+    AuthenticationError,
+    ConflictError,
+    NotFoundError,
+    PermissionDeniedError,
+    RateLimitedError,
+    error_for_status,
+)
+from lumos.common.ratelimit import RateLimiter  # noqa: E402
+
+URL = "https://api.lumos.com"
+
+
+def user(i: int) -> dict:
+    return {"id": str(UUID(int=i)), "given_name": f"G{i}", "family_name": "F", "email": f"u{i}@example.com"}
+
+
+def access_request(i: int, status: str = "PENDING") -> dict:
+    return {
+        "id": str(UUID(int=i)),
+        "app_id": str(UUID(int=1)),
+        "app_name": "GitHub",
+        "status": status,
+        "requested_at": "2024-01-01T00:00:00",
+        "expires_at": None,
+        "requester_user": user(1),
+        "supporter_user": None,
+        "target_user": user(1),
+    }
+
+
+def paged_users(total: int):
+    def handler(request):
+        page = int(request.url.params["page"])
+        size = int(request.url.params["size"])
+        items = [user(i) for i in range((page - 1) * size, min(page * size, total))]
+        return httpx.Response(
+            200, json={"items": items, "total": total, "page": page, "size": size, "pages": -(-total // size)}
+        )
+
+    return handler
+
+
+def make_client(handler, **kwargs) -> AsyncApiClient:
+    kwargs.setdefault("limiter", None)
+    return AsyncApiClient(api_key="key", url=URL, transport=httpx.MockTransport(handler), **kwargs)
+
+
+def test_get_users_sends_auth_and_parses_page():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return paged_users(3)(request)
+
+    async def main():
+        async with make_client(handler) as client:
+            return await client.get_users(like="ada", page_size=2)
+
+    users, count, total = asyncio.run(main())
+    assert [u.email for u in users] == ["u0@example.com", "u1@example.com"]
+    assert (count, total) == (2, 3)
+    assert seen[0].headers["Authorization"] == "Bearer key"
+    assert seen[0].url.params["search_term"] == "ada"
+
+
+def test_get_all_returns_every_page_in_order():
+    async def main():
+        async with make_client(paged_users(450), max_concurrency=2) as client:
+            return await client.get_users(all=True)
+
+    users, count, total = asyncio.run(main())
+    assert [u.id for u in users] == [UUID(int=i) for i in range(450)]
+    assert count == total == 450
+
+
+def test_iter_users_stops_at_limit():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return paged_users(450)(request)
+
+    async def main():
+        async with make_client(handler) as client:
+            return [u async for u in client.iter_users(limit=150)]
+
+    users = asyncio.run(main())
+    assert [u.id for u in users] == [UUID(int=i) for i in range(150)]
+    assert [int(r.url.params["size"]) for r in seen] == [75, 75]
+
+
+def test_concurrency_is_bounded():
+    in_flight = 0
+    most_in_flight = 0
+
+    async def handler(request):
+        nonlocal in_flight, most_in_flight
+        in_flight += 1
+        most_in_flight = max(most_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, json=access_request(UUID(request.url.path.rsplit("/", 1)[-1]).int))
+
+    async def main():
+        async with make_client(handler, max_concurrency=5) as client:
+            return await asyncio.gather(*(client.get_request_status(UUID(int=i)) for i in range(50)))
+
+    statuses = asyncio.run(main())
+    assert [s and s.id for s in statuses] == [UUID(int=i) for i in range(50)]
+    assert most_in_flight == 5
+
+
+@pytest.mark.parametrize(
+    ("status_code", "error_class"),
+    [(401, AuthenticationError), (403, PermissionDeniedError), (409, ConflictError)],
+)
+def test_errors_are_typed(status_code, error_class):
+    def handler(request):
+        return httpx.Response(status_code, json={"detail": "Already requested"})
+
+    async def main():
+        async with make_client(handler) as client:
+            await client.create_access_request(app_id=UUID(int=1), note="x", expiration_in_seconds=None)
+
+    with pytest.raises(error_class) as info:
+        asyncio.run(main())
+    assert info.value.status_code == status_code
+    assert info.value.detail == "Already requested"
+
+
+def test_not_found_lookups_return_none():
+    async def main():
+        async with make_client(lambda request: httpx.Response(404, json={"detail": "Not found"})) as client:
+            return await client.get_request_status(UUID(int=1)), await client.get_appstore_app(UUID(int=1))
+
+    assert asyncio.run(main()) == (None, None)
+
+
+def test_create_access_request_body():
+    bodies = []
+
+    def handler(request):
+        bodies.append(json.loads(request.content))
+        return httpx.Response(200, json=[access_request(9)])
+
+    async def main():
+        async with make_client(handler) as client:
+            return await client.create_access_request(
+                app_id=UUID(int=1),
+                note="onboarding",
+                expiration_in_seconds=3600,
+                permission_ids=[UUID(int=2)],
+                target_user_id=UUID(int=3),
+            )
+
+    created = asyncio.run(main())
+    assert created is not None
+    assert created.id == UUID(int=9)
+    assert bodies == [
+        {
+            "app_id": str(UUID(int=1)),
+            "note": "onboarding",
+            "requestable_permission_ids": [str(UUID(int=2))],
+            "expiration_in_seconds": 3600,
+            "target_user_id": str(UUID(int=3)),
+        }
+    ]
+
+
+def test_rate_limits_are_retried():
+    responses = [httpx.Response(429, headers={"Retry-After": "0"}), httpx.Response(200, json=user(1))]
+
+    async def main():
+        async with make_client(lambda request: responses.pop(0), limiter=RateLimiter(rate=1000)) as client:
+            return await client.get_current_user_id()
+
+    assert asyncio.run(main()) == UUID(int=1)
+
+
+def test_rate_limits_give_up_eventually(monkeypatch):
+    monkeypatch.setattr("lumos.common.async_client.MAX_RATE_LIMIT_RETRIES", 2)
+    monkeypatch.setattr("lumos.common.async_client.asyncio.sleep", _no_sleep)
+
+    async def main():
+        async with make_client(lambda request: httpx.Response(429)) as client:
+            await client.get_current_user()
+
+    with pytest.raises(RateLimitedError):
+        asyncio.run(main())
+
+
+async def _no_sleep(delay: float) -> None:
+    pass
+
+
+def test_error_for_status_falls_back_to_api_error():
+    error = error_for_status(500, "boom")
+    assert type(error) is ApiError
+    assert str(error) == "An error occurred (status code 500) boom"
+    assert isinstance(error_for_status(404), NotFoundError)
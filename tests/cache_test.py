@@ -0,0 +1,176 @@
+import io
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+from requests import Response
+
+from lumos.common import keyhelpers
+from lumos.common.cache import ResponseCache
+from lumos.common.client import ApiClient
+from lumos.common.keyhelpers import Credentials
+
+URL = "https://api.lumos.com"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ResponseCache(directory=tmp_path / "cache")
+
+
+def fresh_payload(cache, endpoint, params):
+    entry = cache.lookup(URL, endpoint, params)
+    return entry.payload if entry and entry.fresh else None
+
+
+def make_response(status_code: int, body: bytes = b"", headers: dict | None = None) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(body)
+    response.headers.update(headers or {})
+    return response
+
+
+def test_ttl_only_for_known_endpoints(cache):
+    assert cache.ttl("appstore/apps") is not None
+    assert cache.ttl("appstore/apps/123/settings") is not None
+    assert cache.ttl("appstore/requestable_permissions") is not None
+    assert cache.ttl("appstore/requestable_permissions/123") is not None
+    assert cache.ttl("groups") is not None
+    assert cache.ttl("users") == 0
+    assert cache.ttl("appstore/access_requests") == 0
+    assert cache.ttl("users/current") is None
+
+
+def test_round_trip(cache):
+    cache.put(URL, "appstore/apps", {"page": 1}, {"items": [1]})
+    assert fresh_payload(cache, "appstore/apps", {"page": 1}) == {"items": [1]}
+    assert fresh_payload(cache, "appstore/apps", {"page": 2}) is None
+    assert cache.lookup("http://localhost", "appstore/apps", {"page": 1}) is None
+
+
+def test_uncached_endpoint_is_not_stored(cache):
+    cache.put(URL, "users/current", {}, {"id": 1})
+    assert cache.lookup(URL, "users/current", {}) is None
+    assert not cache.directory.exists()
+
+
+def test_revalidated_endpoint_needs_validators(cache):
+    cache.put(URL, "users", {}, {"items": []})
+    assert cache.lookup(URL, "users", {}) is None
+    cache.put(URL, "users", {}, {"items": []}, {"ETag": '"abc"'})
+    entry = cache.lookup(URL, "users", {})
+    assert entry is not None
+    assert not entry.fresh
+    assert entry.conditional_headers() == {"If-None-Match": '"abc"'}
+
+
+def test_scope_is_part_of_key(cache, monkeypatch):
+    monkeypatch.setattr(keyhelpers, "_credentials", Credentials(api_key="key", scope="admin"))
+    cache.put(URL, "groups", {}, {"items": [1]})
+    monkeypatch.setattr(keyhelpers, "_credentials", Credentials(api_key="key", scope="user"))
+    assert cache.lookup(URL, "groups", {}) is None
+
+
+def test_api_key_is_part_of_key(cache, monkeypatch):
+    monkeypatch.setattr(keyhelpers, "_credentials", Credentials(api_key="tenant-a"))
+    cache.put(URL, "appstore/apps", {}, {"items": [1]})
+    monkeypatch.setattr(keyhelpers, "_credentials", Credentials(api_key="tenant-b"))
+    assert cache.lookup(URL, "appstore/apps", {}) is None
+    monkeypatch.setattr(keyhelpers, "_credentials", Credentials(api_key="tenant-a"))
+    assert fresh_payload(cache, "appstore/apps", {}) == {"items": [1]}
+
+
+def test_expired_entry(cache, monkeypatch):
+    cache.put(URL, "groups", {}, {"items": [1]}, {"Last-Modified": "Wed, 21 Oct 2015 07:28:00 GMT"})
+    cache.put(URL, "groups", {"page": 2}, {"items": [2]})
+    tomorrow = time.time() + 24 * 60 * 60
+    monkeypatch.setattr(time, "time", lambda: tomorrow)
+    entry = cache.lookup(URL, "groups", {})
+    assert entry is not None
+    assert not entry.fresh
+    assert entry.conditional_headers() == {"If-Modified-Since": "Wed, 21 Oct 2015 07:28:00 GMT"}
+    # Without validators a stale entry is useless
+    assert cache.lookup(URL, "groups", {"page": 2}) is None
+    cache.touch(entry)
+    assert fresh_payload(cache, "groups", {}) == {"items": [1]}
+
+
+def test_disabled_and_refresh(cache):
+    cache.put(URL, "groups", {}, {"items": [1]})
+    cache.refresh = True
+    assert cache.lookup(URL, "groups", {}) is None
+    cache.put(URL, "groups", {}, {"items": [2]})
+    cache.refresh = False
+    assert fresh_payload(cache, "groups", {}) == {"items": [2]}
+    cache.enabled = False
+    assert cache.lookup(URL, "groups", {}) is None
+
+
+def test_evicts_least_recently_used(cache):
+    cache.max_entries = 2
+    cache.evict_every = 1
+    cache.put(URL, "groups", {"page": 1}, 1)
+    cache.put(URL, "groups", {"page": 2}, 2)
+    for path in cache.directory.glob("*.json"):
+        os.utime(path, (1, 1))
+    # Reading page 1 makes it the most recently used entry
+    assert fresh_payload(cache, "groups", {"page": 1}) == 1
+    cache.put(URL, "groups", {"page": 3}, 3)
+    assert fresh_payload(cache, "groups", {"page": 1}) == 1
+    assert cache.lookup(URL, "groups", {"page": 2}) is None
+    assert fresh_payload(cache, "groups", {"page": 3}) == 3
+
+
+def test_evicts_only_every_few_writes(cache):
+    cache.max_entries = 1
+    cache.evict_every = 3
+    for page in range(1, 4):
+        cache.put(URL, "groups", {"page": page}, page)
+    entries = list(cache.directory.glob("*.json"))
+    assert len(entries) == 3
+    for path in entries:
+        os.utime(path, (1, 1))
+    cache.put(URL, "groups", {"page": 4}, 4)
+    assert len(list(cache.directory.glob("*.json"))) == 1
+    assert fresh_payload(cache, "groups", {"page": 4}) == 4
+
+
+def test_entry_evicted_while_read_is_still_used(cache):
+    cache.put(URL, "groups", {}, {"items": [1]})
+    with patch("lumos.common.cache.os.utime", side_effect=FileNotFoundError):
+        assert fresh_payload(cache, "groups", {}) == {"items": [1]}
+
+
+def test_clear(cache):
+    cache.put(URL, "groups", {}, 1)
+    cache.clear()
+    assert cache.lookup(URL, "groups", {}) is None
+
+
+def test_client_get_revalidates_with_etag(cache):
+    client = ApiClient()
+    responses = [
+        make_response(200, b'{"items": [1]}', {"ETag": '"v1"'}),
+        make_response(304),
+    ]
+    with (
+        patch("lumos.common.client.response_cache", cache),
+        patch.object(client.session, "request", side_effect=responses) as request,
+    ):
+        assert client.get("users") == {"items": [1]}
+        assert client.get("users") == {"items": [1]}
+    assert "If-None-Match" not in request.call_args_list[0].kwargs["headers"]
+    assert request.call_args_list[1].kwargs["headers"]["If-None-Match"] == '"v1"'
+
+
+def test_client_get_fresh_hit_skips_request(cache):
+    client = ApiClient()
+    cache.put(client.url, "groups", {}, {"items": [1]})
+    with (
+        patch("lumos.common.client.response_cache", cache),
+        patch.object(client.session, "request") as request,
+    ):
+        assert client.get("groups") == {"items": [1]}
+    request.assert_not_called()
@@ -5,6 +5,8 @@ These tests validate the end-user experience by testing CLI structure,
 options, and help text without making actual API calls.
 """
 
+import subprocess
+import sys
 from unittest.mock import patch
 from uuid import UUID
 
@@ -113,6 +115,7 @@ class TestMainCLI:
         # Subcommand groups
         assert "list" in result.output
         assert "request" in result.output
+        assert "sync" in result.output
 
     def test_cli_version(self, runner):
         """Test that --version displays version information."""
@@ -120,6 +123,34 @@ class TestMainCLI:
         assert result.exit_code == 0
         # Version should be displayed
 
+    def test_cli_cache_options(self, runner):
+        """Test that the cache escape hatches are listed in help."""
+        result = runner.invoke(lumos, ["--help"])
+        assert "--no-cache" in result.output
+        assert "--refresh" in result.output
+
+    def test_cli_rejects_unknown_timezone(self, runner):
+        """Test that --tz must name a real timezone."""
+        result = runner.invoke(lumos, ["--tz", "Nowhere/Land", "logout"])
+        assert result.exit_code == 2
+        assert "Unknown timezone" in result.output
+
+    def test_cli_rejects_unwritable_metrics_file(self, runner, tmp_path):
+        """Test that --metrics-file must be somewhere we can write."""
+        result = runner.invoke(lumos, ["--metrics-file", str(tmp_path / "missing" / "metrics.jsonl"), "logout"])
+        assert result.exit_code == 2
+        assert "--metrics-file" in result.output
+
+    def test_cli_imports_subcommands_lazily(self):
+        """Test that importing the CLI doesn't load the API client, models or subcommands."""
+        code = (
+            "import sys, lumos.cli; "
+            "print(sorted(m for m in sys.modules if m.startswith(('lumos.common.client', "
+            "'lumos.common.models', 'lumos.request', 'lumos.list_collections', 'lumos.sync', 'pydantic', 'pytz'))))"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "[]"
+
     def test_cli_debug_option_is_hidden(self, runner):
         """Test that --debug option exists but is hidden from help."""
         result = runner.invoke(lumos, ["--help"])
@@ -210,6 +241,23 @@ class TestListSubcommand:
         assert "apps" in result.output
 
 
+class TestSyncCommand:
+    """Test the sync command."""
+
+    def test_sync_help(self, runner):
+        """Test sync command help."""
+        result = runner.invoke(lumos, ["sync", "--help"])
+        assert result.exit_code == 0
+        assert "local index" in result.output
+
+    def test_sync_options(self, runner):
+        """Test sync command has expected options."""
+        result = runner.invoke(lumos, ["sync", "--help"])
+        assert result.exit_code == 0
+        assert "--only" in result.output
+        assert "--clear" in result.output
+
+
 class TestListUsersCommand:
     """Test the list users command."""
 
@@ -297,6 +345,10 @@ class TestListRequestsCommand:
         assert "--status" in result.output
         assert "--pending" in result.output
         assert "--past" in result.output
+        assert "--app" in result.output
+        assert "--since" in result.output
+        assert "--until" in result.output
+        assert "--sort" in result.output
         assert "--csv" in result.output
         assert "--json" in result.output
         assert "--id-only" in result.output
@@ -361,6 +413,26 @@ class TestRequestSubcommand:
 class TestRequestStatusCommand:
     """Test the request status command."""
 
+    @patch("lumos.common.helpers.setup")
+    def test_request_bulk_help(self, mock_setup, runner):
+        """Test request bulk help."""
+        result = runner.invoke(lumos, ["request", "bulk", "--help"])
+        assert result.exit_code == 0
+        assert "--file" in result.output
+        assert "--journal" in result.output
+        assert "--workers" in result.output
+        assert "--dry-run" in result.output
+
+    @patch("lumos.common.helpers.setup")
+    def test_request_watch_help(self, mock_setup, runner):
+        """Test request watch help."""
+        result = runner.invoke(lumos, ["request", "watch", "--help"])
+        assert result.exit_code == 0
+        assert "--request-id" in result.output
+        assert "--journal" in result.output
+        assert "--pending" in result.output
+        assert "--timeout" in result.output
+
     @patch("lumos.common.helpers.setup")
     def test_request_status_help(self, mock_setup, runner):
         """Test request status help."""
@@ -503,6 +575,41 @@ class TestCLIOutputFormats:
         assert "--json" in result.output
         assert "--id-only" in result.output
 
+    @pytest.mark.parametrize("subcommand", ["users", "permissions", "groups", "requests", "apps"])
+    def test_list_ndjson_output_format(self, runner, subcommand):
+        """Test that every list subcommand supports NDJSON output."""
+        result = runner.invoke(lumos, ["list", subcommand, "--help"])
+        assert "--ndjson" in result.output
+
+    @patch("lumos.common.helpers.setup")
+    @patch("lumos.list_collections.cli.client")
+    def test_list_users_json_streams_from_iterator(self, mock_client, mock_setup, runner, mock_user):
+        """Test that --json output reads users from the streaming iterator."""
+        mock_client.iter_users.return_value = iter([mock_user])
+        result = runner.invoke(lumos, ["list", "users", "--json"])
+        assert result.exit_code == 0
+        assert "test@example.com" in result.output
+        mock_client.iter_users.assert_called_once_with(like=None, limit=None)
+        mock_client.get_users.assert_not_called()
+
+    @pytest.mark.parametrize("subcommand", ["users", "permissions", "groups", "requests", "apps"])
+    def test_list_limit_option(self, runner, subcommand):
+        """Test that every list subcommand supports --limit."""
+        result = runner.invoke(lumos, ["list", subcommand, "--help"])
+        assert "--limit" in result.output
+
+    @patch("lumos.common.helpers.setup")
+    @patch("lumos.list_collections.cli.client")
+    def test_list_users_limit_shows_a_table(self, mock_client, mock_setup, runner, mock_user):
+        """Test that --limit without an output format fetches through the iterator and prints a table."""
+        mock_client.iter_users.return_value = iter([mock_user])
+        result = runner.invoke(lumos, ["list", "users", "--limit", "1"])
+        assert result.exit_code == 0
+        assert "test@example.com" in result.output
+        assert "more users" not in result.output
+        mock_client.iter_users.assert_called_once_with(like=None, limit=1)
+        mock_client.get_users.assert_not_called()
+
 
 class TestCLIPagination:
     """Test pagination options in list commands."""
@@ -1,9 +1,12 @@
-import os
+from unittest.mock import patch
 
+import requests
 from requests import Response
 
 from lumos import __version__
-from lumos.common.client_helpers import check_version_header, parse_version
+from lumos.common import client_helpers
+from lumos.common.client import ApiClient, AuthClient
+from lumos.common.client_helpers import check_version_header, connection_stats, parse_version
 
 
 def test_parse_version():
@@ -37,12 +40,33 @@ def test_check_version_header_higher_version():
     assert check_version_header(response) is False
 
 
-def test_check_version_header_higher_version_already_warned():
-    os.environ["WARNED"] = "1"
+def test_check_version_header_higher_version_already_warned(monkeypatch):
+    monkeypatch.setattr(client_helpers, "warned", True)
     current_version = parse_version(__version__)
     current_version[0] += 1
     response = Response()
     response.headers["X-CLI-Version"] = f"{current_version[0] + 1}.0.0"
 
     assert check_version_header(response) is True
-    os.environ.pop("WARNED")
+
+
+def test_check_version_header_parses_each_version_once(monkeypatch):
+    monkeypatch.setattr(client_helpers, "_satisfied_versions", set())
+    # Parses our own version, which is only done once per process
+    warm_up = Response()
+    warm_up.headers["X-CLI-Version"] = "0.0.1"
+    check_version_header(warm_up)
+    response = Response()
+    response.headers["X-CLI-Version"] = __version__
+    with patch.object(client_helpers, "parse_version", wraps=parse_version) as parse:
+        assert check_version_header(response) is True
+        assert check_version_header(response) is True
+    assert parse.call_count == 1
+
+
+def test_connection_stats_new_session():
+    assert connection_stats(requests.Session()) == (0, 0)
+
+
+def test_clients_share_session():
+    assert ApiClient().session is AuthClient().session
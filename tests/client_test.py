@@ -0,0 +1,183 @@
+import io
+import threading
+import time
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+from requests import Response
+
+from lumos.common.client import ApiClient, LoginRequired, page_plan
+from lumos.common.models import SupportRequestStatus
+
+
+def _fake_get_paged(total: int, page_size: int = 100):
+    pages = -(-total // page_size)
+
+    def get_paged(endpoint, params=None, page_size=page_size, page=1):
+        # Later pages answer faster so out-of-order completion gets exercised
+        time.sleep(0.01 * (pages - page) / pages)
+        start = (page - 1) * page_size
+        items = [{"n": n} for n in range(start, min(start + page_size, total))]
+        return items, len(items), total, page, pages
+
+    return get_paged
+
+
+def test_get_all_reassembles_pages_in_order():
+    client = ApiClient()
+    with patch.object(client, "get_paged", side_effect=_fake_get_paged(950)) as get_paged:
+        items, count, total, page, pages = client.get_all("users")
+    assert [item["n"] for item in items] == list(range(950))
+    assert (count, total, page, pages) == (950, 950, 1, 1)
+    assert get_paged.call_count == 10
+
+
+def test_get_all_single_page():
+    client = ApiClient()
+    with patch.object(client, "get_paged", side_effect=_fake_get_paged(3)) as get_paged:
+        _, count, _, _, _ = client.get_all("users")
+    assert count == 3
+    assert get_paged.call_count == 1
+
+
+def test_get_all_empty():
+    client = ApiClient()
+    with patch.object(client, "get_paged", return_value=([], 0, 0, 0, 0)):
+        assert client.get_all("users") == ([], 0, 0, 1, 1)
+
+
+def test_get_all_propagates_worker_exit():
+    client = ApiClient()
+    fake = _fake_get_paged(500)
+
+    def get_paged(endpoint, params=None, page_size=100, page=1):
+        if page == 3:
+            raise SystemExit(1)
+        return fake(endpoint, params, page_size, page)
+
+    with patch.object(client, "get_paged", side_effect=get_paged), pytest.raises(SystemExit):
+        client.get_all("users")
+
+
+def test_get_all_fetches_pages_that_need_a_login_on_the_main_thread():
+    client = ApiClient()
+    fake = _fake_get_paged(500)
+
+    def get_paged(endpoint, params=None, page_size=100, page=1):
+        if threading.current_thread() is not threading.main_thread():
+            raise LoginRequired("log in")
+        return fake(endpoint, params, page_size, page)
+
+    with patch.object(client, "get_paged", side_effect=get_paged):
+        results, *_ = client.get_all("users")
+    assert [r["n"] for r in results] == list(range(500))
+
+
+def test_only_the_main_thread_logs_in_again():
+    client = ApiClient()
+    response = Response()
+    response.status_code = 401
+    response.raw = io.BytesIO(b"{}")
+    errors = []
+
+    def get():
+        try:
+            client.get("users/current")
+        except SystemExit as e:
+            errors.append(e)
+
+    with (
+        patch.object(client.session, "request", return_value=response),
+        patch("lumos.common.client.AuthClient.authenticate") as authenticate,
+    ):
+        worker = threading.Thread(target=get)
+        worker.start()
+        worker.join()
+    assert isinstance(errors[0], LoginRequired)
+    authenticate.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    ("limit", "plan"),
+    [(None, (100, None)), (1, (1, 1)), (100, (100, 1)), (101, (51, 2)), (250, (84, 3))],
+)
+def test_page_plan(limit, plan):
+    assert page_plan(limit) == plan
+
+
+@pytest.mark.parametrize(("total", "limit", "calls"), [(950, 1, 1), (950, 250, 3), (40, 250, 1)])
+def test_iter_pages_stops_at_limit(total, limit, calls):
+    client = ApiClient()
+    with patch.object(client, "get_paged", side_effect=_fake_get_paged(total)) as get_paged:
+        items = [item for page in client.iter_pages("users", limit=limit) for item in page]
+    assert [item["n"] for item in items] == list(range(min(total, limit)))
+    assert get_paged.call_count == calls
+    assert {call.kwargs["page_size"] for call in get_paged.call_args_list} == {page_plan(limit)[0]}
+
+
+def test_permissions_by_id_are_fetched_once():
+    client = ApiClient()
+    found = {f"appstore/requestable_permissions/{UUID(int=n)}": n for n in (1, 2)}
+
+    def get(endpoint, params=None, missing_ok=False):
+        assert missing_ok
+        if n := found.get(endpoint):
+            return {"id": str(UUID(int=n)), "label": f"P{n}", "app_id": "app", "app_class_id": "github"}
+        return None
+
+    with patch.object(client, "get", side_effect=get) as fake_get:
+        permissions = client.get_app_requestable_permissions_by_id([UUID(int=2), UUID(int=3), UUID(int=1), UUID(int=2)])
+        assert [p and p.label for p in permissions.values()] == ["P2", None, "P1"]
+        assert fake_get.call_count == 3
+        # Already looked up, including the one that doesn't exist
+        assert client.get_app_requestable_permissions_by_id([UUID(int=1), UUID(int=3)]).keys() == {
+            UUID(int=1),
+            UUID(int=3),
+        }
+        assert fake_get.call_count == 3
+
+
+def test_permission_lookups_that_need_a_login_are_made_on_the_main_thread():
+    client = ApiClient()
+
+    def get(endpoint, params=None, missing_ok=False):
+        if threading.current_thread() is not threading.main_thread():
+            raise LoginRequired("log in")
+        id = endpoint.rsplit("/", 1)[1]
+        return {"id": id, "label": id[-1], "app_id": "app", "app_class_id": "github"}
+
+    with patch.object(client, "get", side_effect=get):
+        permissions = client.get_app_requestable_permissions_by_id([UUID(int=1), UUID(int=2)])
+    assert [p and p.label for p in permissions.values()] == ["1", "2"]
+
+
+@pytest.mark.parametrize("debug", ["", "1"])
+def test_connections_are_counted_only_when_debugging(monkeypatch, debug):
+    monkeypatch.setenv("DEBUG", debug)
+    client = ApiClient()
+    response = Response()
+    response.status_code = 200
+    response.raw = io.BytesIO(b"{}")
+    with (
+        patch.object(client.session, "request", return_value=response),
+        patch("lumos.common.client.connection_stats", return_value=(1, 0)) as stats,
+    ):
+        assert client.get("users/current") == {}
+    assert stats.called == bool(debug)
+
+
+def sent_access_requests_params(client: ApiClient, **kwargs) -> dict:
+    with patch.object(client, "iter_pages", return_value=iter([])) as iter_pages:
+        list(client.iter_access_requests(**kwargs))
+    return iter_pages.call_args.kwargs["params"]
+
+
+def test_access_requests_params_are_stable():
+    params = sent_access_requests_params(ApiClient(), status=["PENDING_APPROVAL", "PENDING", "PENDING"], sort="asc")
+    assert params == {"sort": "asc", "statuses": ["PENDING", "PENDING_APPROVAL"]}
+
+
+def test_access_requests_params_skip_every_status():
+    params = sent_access_requests_params(ApiClient(), status=SupportRequestStatus.ALL_STATUSES)
+    assert params == {"sort": "desc"}
@@ -0,0 +1,46 @@
+import pytest
+
+from lumos.common.dates import DateRenderer, parse_timestamp
+
+
+@pytest.mark.parametrize(
+    ("tz", "expected"),
+    [
+        ("America/New_York", "Mon Jan 01, 2024 07:00 AM EST"),
+        # Daylight saving time is picked per date, not once per zone
+        ("America/New_York", "Sat Jun 01, 2024 08:00 AM EDT"),
+        ("UTC", "Mon Jan 01, 2024 12:00 PM UTC"),
+        ("Asia/Kolkata", "Mon Jan 01, 2024 05:30 PM IST"),
+    ],
+)
+def test_human_dates_use_the_zone_label(tz, expected):
+    value = "2024-06-01T12:00:00" if "EDT" in expected else "2024-01-01T12:00:00"
+    assert DateRenderer(tz).render(value) == expected
+
+
+def test_machine_formats():
+    assert DateRenderer("UTC", "epoch").render("2024-01-01T00:00:00") == "1704067200"
+    assert DateRenderer("Europe/Paris", "iso").render("2024-01-01T00:00:00Z") == "2024-01-01T01:00:00+01:00"
+
+
+def test_missing_dates_are_blank():
+    renderer = DateRenderer("UTC")
+    assert renderer.render(None) == ""
+    assert renderer.render("") == ""
+
+
+def test_each_timestamp_is_rendered_once():
+    renderer = DateRenderer("UTC")
+    for _ in range(3):
+        renderer.render("2024-01-01T00:00:00")
+    assert renderer.render.cache_info().misses == 1
+
+
+def test_unknown_timezone():
+    with pytest.raises(ValueError):
+        DateRenderer("Mars/Olympus_Mons")
+
+
+def test_parse_timestamp_keeps_offsets():
+    assert parse_timestamp("2024-01-01T12:00:00+02:00").isoformat() == "2024-01-01T12:00:00+02:00"
+    assert parse_timestamp("2024-01-01T12:00:00.123Z").isoformat() == "2024-01-01T12:00:00.123000+00:00"
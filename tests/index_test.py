@@ -0,0 +1,87 @@
+import time
+from unittest.mock import patch
+from uuid import UUID
+
+import pytest
+
+from lumos.common import keyhelpers
+from lumos.common.index import LocalIndex
+from lumos.common.keyhelpers import Credentials
+from lumos.common.models import Permission, User
+
+URL = "https://api.lumos.com"
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalIndex(path=tmp_path / "index.db")
+
+
+def make_user(n: int, given_name: str = "Ada") -> User:
+    return User(id=UUID(int=n), given_name=given_name, family_name="Lovelace", email=f"user{n}@example.com")
+
+
+def make_permission(n: int, app_id: str, label: str) -> Permission:
+    return Permission(id=UUID(int=n), label=label, app_id=app_id, app_class_id="okta")
+
+
+def test_sync_counts_changes(index):
+    result = index.sync("users", URL, [make_user(1), make_user(2)])
+    assert (result.added, result.updated, result.removed, result.total) == (2, 0, 0, 2)
+
+    # Unchanged rows aren't rewritten
+    result = index.sync("users", URL, [make_user(1), make_user(2)])
+    assert (result.added, result.updated, result.removed, result.total) == (0, 0, 0, 2)
+
+    result = index.sync("users", URL, [make_user(1, given_name="Grace"), make_user(3)])
+    assert (result.added, result.updated, result.removed, result.total) == (1, 1, 1, 2)
+
+
+def test_search_matches_word_prefixes(index):
+    index.sync("users", URL, [make_user(1), make_user(2, given_name="Grace")])
+    users, count, total = index.search("users", URL, like="gra love")
+    assert [u.id for u in users] == [UUID(int=2)]
+    assert (count, total) == (1, 1)
+    assert isinstance(users[0], User)
+
+
+def test_search_filters_by_app_and_pages(index):
+    index.sync(
+        "permissions",
+        URL,
+        [make_permission(n, app_id="app-a" if n % 2 else "app-b", label=f"Admin {n}") for n in range(1, 8)],
+    )
+    permissions, count, total = index.search("permissions", URL, app_id="app-a", page_size=2, page=2)
+    assert [p.id for p in permissions] == [UUID(int=5), UUID(int=7)]
+    assert (count, total) == (2, 4)
+
+    permissions, count, total = index.search("permissions", URL, app_id="app-a", all=True)
+    assert len(permissions) == count == total == 4
+
+
+def test_search_needs_a_fresh_sync_of_the_same_api_and_key(index):
+    assert index.search("users", URL) is None
+    index.sync("users", URL, [make_user(1)])
+    assert index.search("users", URL) is not None
+    assert index.search("users", "http://localhost") is None
+    assert index.search("apps", URL) is None
+    with patch.object(keyhelpers, "_credentials", Credentials(api_key="key", scope="admin")):
+        assert index.search("users", URL) is None
+    with patch.object(keyhelpers, "_credentials", Credentials(api_key="another tenant's key")):
+        assert index.search("users", URL) is None
+    with patch("lumos.common.index.time.time", return_value=time.time() + 2 * 60 * 60):
+        assert index.search("users", URL) is None
+
+
+def test_disabled_index_is_not_searched(index):
+    index.sync("users", URL, [make_user(1)])
+    index.enabled = False
+    assert index.search("users", URL) is None
+
+
+def test_clear_deletes_the_file(index):
+    index.sync("users", URL, [make_user(1)])
+    assert index.path.exists()
+    index.clear()
+    assert not index.path.exists()
+    assert index.search("users", URL) is None
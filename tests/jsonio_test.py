@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+
+from lumos.common import jsonio
+from lumos.common.models import User
+
+USER = User(id=UUID(int=1), given_name="Zoë", family_name="User", email="zoe@example.com")
+DOCUMENT = {"user": USER, "ids": [UUID(int=2)], "at": datetime(2024, 1, 1, 12), "count": 3, "missing": None}
+
+
+def backends() -> list[str]:
+    names = []
+    for name in jsonio.BACKENDS:
+        try:
+            jsonio.load_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+@pytest.mark.parametrize("name", backends())
+@pytest.mark.parametrize("indent", [False, True])
+def test_backends_write_the_same_documents(name, indent):
+    expected = jsonio.load_backend("json").dumps(DOCUMENT, indent)
+    assert jsonio.load_backend(name).dumps(DOCUMENT, indent) == expected
+    assert json.loads(expected) == {
+        "user": {"id": str(UUID(int=1)), "given_name": "Zoë", "family_name": "User", "email": "zoe@example.com"},
+        "ids": [str(UUID(int=2))],
+        "at": "2024-01-01T12:00:00",
+        "count": 3,
+        "missing": None,
+    }
+
+
+@pytest.mark.parametrize("name", backends())
+def test_backends_decode(name):
+    backend = jsonio.load_backend(name)
+    assert backend.loads(b'{"items": [1, "\xc3\xa9"]}') == {"items": [1, "é"]}
+    with pytest.raises(ValueError):
+        backend.loads(b"{not json")
+
+
+def test_models_match_backend_layout():
+    backend = jsonio.load_backend("json")
+    assert jsonio.dumps(USER) == backend.dumps(USER)
+    assert jsonio.dumps(USER, indent=True) == backend.dumps(USER, indent=True)
+
+
+def test_unknown_types_raise():
+    with pytest.raises(TypeError):
+        jsonio.load_backend("json").dumps({"x": object()})
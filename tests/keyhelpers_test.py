@@ -0,0 +1,55 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from lumos.common import keyhelpers
+from lumos.common.client import ApiClient
+from lumos.common.keyhelpers import NO_CREDENTIALS, current_credentials, current_scope, read_key, write_key
+
+
+@pytest.fixture
+def key_file(tmp_path, monkeypatch):
+    path = tmp_path / ".lumos"
+    monkeypatch.setattr(keyhelpers, "key_file_path", lambda: path)
+    monkeypatch.setattr(keyhelpers, "_credentials", None)
+    monkeypatch.delenv("API_KEY", raising=False)
+    monkeypatch.delenv("SCOPE", raising=False)
+    return path
+
+
+def test_key_file_is_read_once(key_file):
+    key_file.write_text("admin:secret\n")
+    with patch("pathlib.Path.open", wraps=key_file.open) as open_file:
+        assert read_key() == "secret"
+        assert read_key() == "secret"
+    assert open_file.call_count == 1
+    assert current_scope() == "admin"
+
+
+def test_key_in_environment_wins(key_file, monkeypatch):
+    key_file.write_text("from-file\n")
+    monkeypatch.setenv("API_KEY", "from-env")
+    monkeypatch.setenv("SCOPE", "admin")
+    assert read_key() == "from-env"
+    assert current_scope() == "admin"
+    write_key("new-key")
+    # The environment is only read, never written
+    assert read_key() == "new-key"
+    assert os.environ["API_KEY"] == "from-env"
+
+
+def test_every_request_sends_the_same_prebuilt_headers(key_file):
+    assert current_credentials() is NO_CREDENTIALS
+    write_key("secret", "admin")
+    assert key_file.read_text() == "admin:secret"
+    sent = []
+    for client, endpoint in ((ApiClient(), "users"), (ApiClient(), "groups")):
+        with patch.object(client.session, "request", side_effect=SystemExit(1)) as request, pytest.raises(SystemExit):
+            client.get(endpoint)
+        sent.append(request.call_args.kwargs["headers"])
+    headers = sent[0]
+    assert headers["Authorization"] == "Bearer secret"
+    assert sent[1] is headers
+    with pytest.raises(TypeError):
+        headers["Authorization"] = "Bearer other"  # type: ignore[index]
@@ -0,0 +1,187 @@
+import json
+from datetime import datetime, timezone
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+from click.testing import CliRunner
+
+from lumos.common.models import AccessRequest, SupportRequestStatus, User
+from lumos.list_collections.checkpoint import Checkpoint, CheckpointError, iter_changes
+
+ME = User(id=UUID(int=1), given_name="Ada", family_name="Lovelace", email="ada@example.com")
+QUERY = {"target_user_id": None, "status": None, "app": None}
+NOW = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+
+def access_request(i: int, status: str = "COMPLETED", expires_at: str | None = None) -> AccessRequest:
+    return AccessRequest(
+        id=UUID(int=100 + i),
+        app_id=UUID(int=2),
+        app_name="GitHub",
+        status=status,
+        requested_at=f"2024-01-01T{i // 60:02d}:{i % 60:02d}:00",
+        expires_at=expires_at,
+        requester_user=ME,
+        supporter_user=None,
+        target_user=ME,
+    )
+
+
+class FakeApi:
+    """Serves access requests newest first, counting how many rows each scan reads."""
+
+    max_concurrency = 4
+
+    def __init__(self, requests: list[AccessRequest]):
+        self.requests = requests
+        self.rows_read = 0
+        self.get_request_status = MagicMock(side_effect=self._get)
+
+    def add(self, access_request: AccessRequest) -> None:
+        self.requests = [r for r in self.requests if r.id != access_request.id] + [access_request]
+
+    def iter_access_requests(self, target_user_id=None, status=None, sort="desc"):
+        for r in sorted(self.requests, key=lambda r: r.requested_at, reverse=True):
+            if not status or r.status in status:
+                self.rows_read += 1
+                yield r
+
+    def _get(self, id: UUID, missing_ok: bool = False) -> AccessRequest | None:
+        for r in self.requests:
+            if r.id == id:
+                return r
+        if missing_ok:
+            return None
+        raise SystemExit(1)
+
+
+def run(api: FakeApi, checkpoint: Checkpoint) -> list[int]:
+    api.rows_read = 0
+    return [r.id.int - 100 for r in iter_changes(api, checkpoint, now=NOW)]
+
+
+def test_first_run_returns_everything(tmp_path):
+    api = FakeApi([access_request(i) for i in range(5)] + [access_request(5, "PENDING")])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+
+    assert run(api, checkpoint) == [5, 4, 3, 2, 1, 0]
+    assert checkpoint.newest == access_request(5).requested_at
+    assert list(checkpoint.open_requests) == [str(access_request(5).id)]
+
+
+def test_later_runs_only_read_new_requests(tmp_path):
+    api = FakeApi([access_request(i) for i in range(100)])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+
+    api.add(access_request(100))
+    api.add(access_request(101))
+    assert run(api, checkpoint) == [101, 100]
+    # Stops at the first request older than the ones it had already seen
+    assert api.rows_read == 4
+    assert run(api, checkpoint) == []
+
+
+def test_requests_made_at_the_same_time_as_the_newest_are_not_missed(tmp_path):
+    api = FakeApi([access_request(1)])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+
+    twin = access_request(1).model_copy(update={"id": UUID(int=999)})
+    api.add(twin)
+    assert run(api, checkpoint) == [899]
+    assert checkpoint.newest_ids == {str(access_request(1).id), str(twin.id)}
+
+
+def test_status_changes_are_found_from_the_pending_list(tmp_path):
+    api = FakeApi([access_request(i, "PENDING") for i in range(3)] + [access_request(i) for i in range(3, 50)])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+
+    api.add(access_request(0, "PENDING_APPROVAL"))
+    api.add(access_request(1, "DENIED"))
+    assert sorted(run(api, checkpoint)) == [0, 1]
+    # Only the request that left the pending list is fetched by itself
+    api.get_request_status.assert_called_once_with(access_request(1).id, missing_ok=True)
+    assert set(checkpoint.open_requests) == {str(access_request(0).id), str(access_request(2).id)}
+
+
+def test_time_based_access_is_rechecked_once_it_expires(tmp_path):
+    api = FakeApi(
+        [
+            access_request(0, expires_at="2024-05-01T00:00:00"),
+            access_request(1, expires_at="2024-07-01T00:00:00"),
+        ]
+    )
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+
+    api.add(access_request(0, SupportRequestStatus.TIME_BASED_EXPIRED, expires_at="2024-05-01T00:00:00"))
+    assert run(api, checkpoint) == [0]
+    api.get_request_status.assert_called_once_with(access_request(0).id, missing_ok=True)
+    assert list(checkpoint.open_requests) == [str(access_request(1).id)]
+
+
+def test_deleted_requests_are_forgotten(tmp_path):
+    api = FakeApi([access_request(0, "PENDING"), access_request(1)])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+
+    api.requests = [access_request(1)]
+    assert run(api, checkpoint) == []
+    assert checkpoint.open_requests == {}
+
+
+def test_failed_status_checks_stop_the_run(tmp_path):
+    api = FakeApi([access_request(0, "PENDING"), access_request(1)])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+    checkpoint.save()
+
+    # The request leaves the pending list, then looking it up fails like a 500 does
+    api.add(access_request(0, "DENIED"))
+    api.iter_access_requests = lambda **kwargs: iter([])
+    api.get_request_status.side_effect = SystemExit(1)
+    with pytest.raises(SystemExit):
+        run(api, checkpoint)
+    # Not saved, so the next run looks again
+    assert str(access_request(0).id) in Checkpoint.load(tmp_path / "checkpoint.json", QUERY).open_requests
+
+
+def test_checkpoint_round_trip(tmp_path):
+    api = FakeApi([access_request(0, "PENDING"), access_request(1)])
+    checkpoint = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    run(api, checkpoint)
+    checkpoint.save()
+
+    loaded = Checkpoint.load(tmp_path / "checkpoint.json", QUERY)
+    assert (loaded.newest, loaded.newest_ids, loaded.open_requests) == (
+        checkpoint.newest,
+        checkpoint.newest_ids,
+        checkpoint.open_requests,
+    )
+    with pytest.raises(CheckpointError):
+        Checkpoint.load(tmp_path / "checkpoint.json", {**QUERY, "app": str(UUID(int=2))})
+
+
+def test_list_requests_since_checkpoint(tmp_path, monkeypatch):
+    from lumos.list_collections import cli as list_cli
+
+    api = FakeApi([access_request(i) for i in range(3)])
+    monkeypatch.setattr(list_cli, "client", api)
+    monkeypatch.setattr("lumos.common.helpers.setup", lambda **kwargs: None)
+    path = tmp_path / "checkpoint.json"
+    args = ["--since-checkpoint", str(path), "--json"]
+
+    first = CliRunner().invoke(list_cli.list_requests, args, standalone_mode=False)
+    assert first.exception is None
+    assert len(json.loads(first.stdout)) == 3
+    assert "3 new or changed requests on the first run" in first.stderr
+
+    second = CliRunner().invoke(list_cli.list_requests, args, standalone_mode=False)
+    assert json.loads(second.stdout) == []
+
+    api.add(access_request(3))
+    third = CliRunner().invoke(list_cli.list_requests, [*args[:2], "--ndjson"], standalone_mode=False)
+    assert [json.loads(line)["id"] for line in third.stdout.splitlines()] == [str(access_request(3).id)]
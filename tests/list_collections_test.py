@@ -0,0 +1,124 @@
+import json
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+
+from lumos.common.models import AccessRequest, User
+from lumos.list_collections.cli import display_stream, filter_access_requests
+
+APP_ID = UUID(int=2)
+
+
+@pytest.fixture
+def users():
+    return [
+        User(
+            id=UUID(f"123e4567-e89b-12d3-a456-42661417400{n}"),
+            given_name=f"Test{n}",
+            family_name="User",
+            email=f"test{n}@example.com",
+        )
+        for n in range(3)
+    ]
+
+
+def test_display_stream_json_matches_full_dump(users, capsys):
+    display_stream("users", iter(users), csv=False, json=False, ndjson=False)
+    expected = json.dumps([u.__dict__ for u in users], default=str, indent=2)
+    assert capsys.readouterr().out == expected + "\n"
+
+
+def test_display_stream_json_single_row(users, capsys):
+    display_stream("users", iter(users[:1]), csv=False, json=True, ndjson=False)
+    assert json.loads(capsys.readouterr().out) == json.loads(json.dumps([users[0].__dict__], default=str))
+
+
+def test_display_stream_ndjson(users, capsys):
+    display_stream("users", iter(users), csv=False, json=False, ndjson=True)
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)["email"] for line in lines] == [u.email for u in users]
+
+
+def test_display_stream_compact(users, capsys):
+    display_stream("users", iter(users), csv=False, json=True, ndjson=False, compact=True)
+    out = capsys.readouterr().out
+    assert out.count("\n") == 1
+    assert json.loads(out) == [u.model_dump(mode="json") for u in users]
+
+
+def test_display_stream_json_nests_models(capsys):
+    display_stream("requests", iter([access_request(1)]), csv=False, json=True, ndjson=False)
+    (row,) = json.loads(capsys.readouterr().out)
+    assert row["requester_user"] == {
+        "id": str(UUID(int=1)),
+        "given_name": "Ada",
+        "family_name": "Lovelace",
+        "email": "ada@example.com",
+    }
+
+
+def test_display_stream_csv(users, capsys):
+    display_stream("users", iter(users), csv=True, json=False, ndjson=False)
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == f"Test0 User,test0@example.com,{users[0].id}"
+    assert len(lines) == 3
+
+
+def test_display_stream_empty(capsys):
+    display_stream("users", iter([]), csv=False, json=True, ndjson=False)
+    assert capsys.readouterr().out == "No users found.\n"
+
+
+def test_display_stream_consumes_lazily(users, capsys):
+    def rows():
+        yield users[0]
+        # The first row is already written before the next one is produced
+        assert "test0@example.com" in capsys.readouterr().out
+        yield users[1]
+
+    display_stream("users", rows(), csv=True, json=False, ndjson=False)
+
+
+def access_request(day: int, app_id: UUID = APP_ID) -> AccessRequest:
+    user = User(id=UUID(int=1), given_name="Ada", family_name="Lovelace", email="ada@example.com")
+    return AccessRequest(
+        id=UUID(int=100 + day),
+        app_id=app_id,
+        app_name="GitHub",
+        status="COMPLETED",
+        requested_at=f"2024-06-{day:02d}T12:00:00",
+        expires_at=None,
+        requester_user=user,
+        supporter_user=None,
+        target_user=user,
+    )
+
+
+def test_filter_access_requests_stops_at_since():
+    read = []
+
+    def newest_first():
+        for day in range(30, 0, -1):
+            read.append(day)
+            yield access_request(day)
+
+    matches = filter_access_requests(
+        newest_first(), since=datetime(2024, 6, 20), until=datetime(2024, 6, 25), sort="desc"
+    )
+    assert [r.requested_at[:10] for r in matches] == [f"2024-06-{day}" for day in range(24, 19, -1)]
+    # Paging stops at the first request older than --since
+    assert read[-1] == 19
+
+
+def test_filter_access_requests_stops_at_until_when_ascending():
+    oldest_first = iter([access_request(day) for day in range(1, 31)])
+    matches = filter_access_requests(oldest_first, until=datetime(2024, 6, 3), sort="asc")
+    assert [r.requested_at[:10] for r in matches] == ["2024-06-01", "2024-06-02"]
+    assert next(oldest_first).requested_at.startswith("2024-06-04")
+
+
+def test_filter_access_requests_by_app():
+    other_app = UUID(int=3)
+    requests = [access_request(3), access_request(2, app_id=other_app), access_request(1)]
+    assert [r.app_id for r in filter_access_requests(requests, app_id=other_app)] == [other_app]
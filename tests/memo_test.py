@@ -0,0 +1,63 @@
+import os
+from unittest.mock import MagicMock, patch
+from uuid import UUID
+
+from lumos.common.client import APP, MY_APPS, ApiClient
+from lumos.common.memo import Memo, MemoKey
+
+USER = {"id": str(UUID(int=1)), "given_name": "Ada", "family_name": "Lovelace", "email": "ada@example.com"}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_answers_are_remembered_until_they_expire():
+    clock = Clock()
+    memo = Memo(clock)
+    load = MagicMock(side_effect=[1, 2])
+    assert memo.get(APP, "a", load) == 1
+    assert memo.get(APP, "a", load) == 1
+    assert APP.ttl is not None
+    clock.now += APP.ttl + 1
+    assert memo.get(APP, "a", load) == 2
+    assert load.call_count == 2
+
+
+def test_invalidate_only_forgets_the_given_keys():
+    memo = Memo()
+    other: MemoKey[int] = MemoKey("other")
+    memo.set(MY_APPS, "me", [])
+    memo.set(other, "me", 1)
+    memo.invalidate(MY_APPS)
+    assert memo.get(MY_APPS, "me", lambda: ["fresh"]) == ["fresh"]
+    assert memo.get(other, "me", lambda: 2) == 1
+
+
+def test_current_user_is_fetched_once_and_kept_out_of_the_environment(monkeypatch):
+    monkeypatch.delenv("USER_ID", raising=False)
+    client = ApiClient()
+    with patch.object(client, "get", return_value=USER) as get:
+        assert client.get_current_user_id() == UUID(int=1)
+        assert client.get_current_user().email == "ada@example.com"
+    get.assert_called_once_with("users/current")
+    assert "USER_ID" not in os.environ
+
+
+def test_writes_forget_my_apps():
+    client = ApiClient()
+    with (
+        patch.object(client, "iter_access_requests", return_value=iter([])) as iter_access_requests,
+        patch.object(client, "post", return_value=None),
+    ):
+        client.get_my_apps(for_user=UUID(int=1))
+        client.get_my_apps(for_user=UUID(int=1))
+        assert iter_access_requests.call_count == 1
+        client.create_access_request(app_id=UUID(int=2), note="deploys", expiration_in_seconds=None)
+        iter_access_requests.return_value = iter([])
+        client.get_my_apps(for_user=UUID(int=1))
+        assert iter_access_requests.call_count == 2
@@ -0,0 +1,83 @@
+import io
+import json
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from requests import Response
+
+from lumos.common.client import ApiClient
+from lumos.common.logging import logdebug_response
+from lumos.common.metrics import Metrics, RequestMetric, percentile
+from lumos.common.ratelimit import RateLimiter
+
+
+def make_response(status_code: int, body: bytes = b"{}", headers: dict | None = None) -> Response:
+    response = Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(body)
+    response.headers.update(headers or {})
+    response.elapsed = timedelta(milliseconds=5)
+    return response
+
+
+def metric(total: float, **kwargs) -> RequestMetric:
+    fields = {
+        "method": "GET",
+        "endpoint": "users",
+        "status": 200,
+        "started_at": 0.0,
+        "wait": 0.0,
+        "connect": None,
+        "tls": None,
+        "ttfb": total,
+        "download": 0.0,
+        "total": total,
+        "bytes": 1024,
+        "rate_limited": 0,
+        "retry": 0,
+    }
+    return RequestMetric(**{**fields, **kwargs})
+
+
+@pytest.mark.parametrize(("p", "expected"), [(50, 5), (95, 10), (100, 10), (1, 1)])
+def test_percentile(p, expected):
+    assert percentile([float(n) for n in range(1, 11)], p) == expected
+
+
+def test_summary():
+    metrics = Metrics()
+    assert metrics.summary() is None
+    metrics.record(metric(0.1, connect=0.01))
+    metrics.record(metric(0.3, status=429, wait=1.5))
+    assert metrics.summary() == (
+        "METRICS: 2 requests, p50 100ms, p95 300ms, 2.0 KiB received, "
+        "1.5s waiting on rate limits (1 rate limited), 1 connection opened"
+    )
+
+
+def test_client_records_every_attempt(tmp_path):
+    metrics = Metrics()
+    metrics.open(tmp_path / "metrics.jsonl")
+    client = ApiClient()
+    responses = [make_response(429, headers={"Retry-After": "0"}), make_response(200, b'{"id": 1}')]
+    with (
+        patch("lumos.common.client.metrics", metrics),
+        patch("lumos.common.client.rate_limiter", RateLimiter(rate=1000)),
+        patch.object(client.session, "request", side_effect=responses),
+    ):
+        assert client.get("users/current") == {"id": 1}
+    metrics.close()
+    lines = [json.loads(line) for line in (tmp_path / "metrics.jsonl").read_text().splitlines()]
+    assert [(line["status"], line["rate_limited"], line["bytes"]) for line in lines] == [(429, 0, 2), (200, 1, 9)]
+    assert lines[0]["endpoint"] == "users/current"
+
+
+def test_debug_response_log_does_not_parse_the_body(monkeypatch, capsys):
+    response = make_response(200, b'{"access_token": "abcdefghij"}')
+    with patch.object(Response, "json") as parse:
+        logdebug_response(response)
+        monkeypatch.setenv("DEBUG", "1")
+        logdebug_response(response)
+    parse.assert_not_called()
+    assert '{"access_token": "abcde..."}' in capsys.readouterr().out
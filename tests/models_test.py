@@ -0,0 +1,75 @@
+import json
+from uuid import UUID
+
+import pytest
+from pydantic import ValidationError
+
+from lumos.common.models import AccessRequest, Permission, User
+
+
+def raw_user(i: int) -> dict:
+    return {"id": str(UUID(int=i)), "given_name": f"G{i}", "family_name": "F", "email": f"u{i}@example.com"}
+
+
+def raw_permission(i: int) -> dict:
+    return {
+        "id": str(UUID(int=100 + i)),
+        "label": f"Permission {i}",
+        "app_id": str(UUID(int=1)),
+        "app_class_id": "github",
+        "request_config": {"request_fulfillment_config": {"time_based_access": ["12 hours", "7 days"]}},
+    }
+
+
+def raw_access_request(permissions: list[dict]) -> dict:
+    return {
+        "id": str(UUID(int=50)),
+        "app_id": str(UUID(int=1)),
+        "app_name": "GitHub",
+        "status": "PENDING",
+        "requested_at": "2024-01-01T00:00:00",
+        "expires_at": None,
+        "requester_user": raw_user(1),
+        "supporter_user": None,
+        "target_user": raw_user(1),
+        "requestable_permissions": permissions,
+    }
+
+
+def test_parse_list_validates_every_row():
+    users = User.parse_list([raw_user(i) for i in range(3)])
+    assert users == [User(**raw_user(i)) for i in range(3)]
+    assert isinstance(users[0].id, UUID)
+
+
+def test_parse_list_rejects_bad_rows():
+    with pytest.raises(ValidationError):
+        User.parse_list([raw_user(1), {"id": "not-a-uuid"}])
+
+
+def test_permission_lifts_duration_options():
+    assert Permission.model_validate(raw_permission(1)).duration_options == ["12 hours", "7 days"]
+    assert Permission.parse_list([raw_permission(1)])[0].duration_options == ["12 hours", "7 days"]
+    # Already flattened, as stored in the local index
+    stored = Permission.model_validate(raw_permission(1)).model_dump_json()
+    assert Permission.model_validate_json(stored).duration_options == ["12 hours", "7 days"]
+
+
+def test_nested_permissions_get_duration_options():
+    (access_request,) = AccessRequest.parse_list([raw_access_request([raw_permission(1)])])
+    assert access_request.requestable_permissions is not None
+    assert access_request.requestable_permissions[0].duration_options == ["12 hours", "7 days"]
+
+
+@pytest.mark.parametrize("request_config", [None, {}, {"request_fulfillment_config": None}])
+def test_nested_permissions_without_request_config(request_config):
+    permission = {**raw_permission(1), "request_config": request_config}
+    (access_request,) = AccessRequest.parse_list([raw_access_request([permission])])
+    assert access_request.requestable_permissions is not None
+    assert access_request.requestable_permissions[0].duration_options == []
+
+
+def test_parse_json_list():
+    rows = [json.dumps(raw_user(1)), json.dumps(raw_user(2)).encode()]
+    assert [u.email for u in User.parse_json_list(rows)] == ["u1@example.com", "u2@example.com"]
+    assert User.parse_json_list([]) == []
@@ -0,0 +1,57 @@
+import pstats
+import threading
+from unittest.mock import patch
+
+from lumos.common.profiling import Profiler, phase, profiler
+
+
+class TestProfiler:
+    def setup_method(self):
+        profiler.__init__()
+
+    def teardown_method(self):
+        profiler.stop()
+        profiler.__init__()
+
+    def test_phases_do_nothing_unless_profiling(self):
+        with phase("fetch"):
+            pass
+        assert profiler.phases == {}
+
+    def test_nested_phases_dont_overlap(self):
+        profiler.start()
+        clock = patch("lumos.common.profiling.time.perf_counter", side_effect=[0.0, 1.0, 3.0, 6.0])
+        with clock, phase("render"), phase("fetch"):
+            pass
+        assert profiler.phases == {"render": [4.0, 1], "fetch": [2.0, 1]}
+
+    def test_other_threads_are_not_counted(self):
+        profiler.start()
+        worker = threading.Thread(target=phase("fetch")(lambda: None))
+        worker.start()
+        worker.join()
+        assert profiler.phases == {}
+
+    def test_decorated_function_counts_every_call(self):
+        @phase("parse")
+        def parse(text):
+            return text.split()
+
+        profiler.start()
+        parse("a b")
+        parse("c")
+        assert profiler.phases["parse"][1] == 2
+
+    def test_report_and_saved_stats(self, tmp_path):
+        profiler.start()
+        with phase("fetch"):
+            sum(range(1000))
+        report = profiler.stop()
+        assert report.startswith("PROFILE: time by phase")
+        assert "fetch" in report
+        assert "cumulative" in report
+        profiler.save(tmp_path / "lumos.prof")
+        assert pstats.Stats(str(tmp_path / "lumos.prof")).total_calls > 0
+
+    def test_stop_without_start(self):
+        assert Profiler().stop() == ""
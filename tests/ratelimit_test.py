@@ -0,0 +1,88 @@
+import time
+from email.utils import formatdate
+
+from lumos.common.ratelimit import MAX_RATE, MIN_RATE, RATE_INCREASE, RateLimiter
+
+
+def test_retry_after_seconds():
+    # Delays get up to 25% jitter
+    assert 3.0 <= RateLimiter().record_rate_limited({"Retry-After": "3"}, attempt=1) <= 3.75
+
+
+def test_retry_after_missing_or_unreadable_backs_off_exponentially():
+    assert 4.0 <= RateLimiter().record_rate_limited({}, attempt=3) <= 5.0
+    assert 1.0 <= RateLimiter().record_rate_limited({"Retry-After": "soon"}, attempt=1) <= 1.25
+
+
+def test_retry_after_http_date():
+    delay = RateLimiter().record_rate_limited({"Retry-After": formatdate(time.time() + 30, usegmt=True)}, attempt=1)
+    assert 25 <= delay <= 31 * 1.25
+
+
+def test_rate_limit_headers():
+    limiter = RateLimiter(rate=20.0)
+    limiter.record_success({})
+    assert limiter.rate == 20.0 + RATE_INCREASE
+    limiter.record_success({"RateLimit-Remaining": "10", "RateLimit-Reset": "5"})
+    assert limiter.rate == 2.0
+
+
+def test_exhausted_budget_pauses_until_reset_timestamp():
+    limiter = RateLimiter()
+    limiter.record_success({"RateLimit-Remaining": "0", "RateLimit-Reset": str(time.time() + 5)})
+    assert 4 <= limiter.reserve() <= 5
+
+
+def test_rate_ramps_up_on_success():
+    limiter = RateLimiter(rate=1.0)
+    for _ in range(1000):
+        limiter.record_success({})
+    assert limiter.rate == MAX_RATE
+
+
+def test_rate_limited_halves_rate_and_pauses():
+    limiter = RateLimiter(rate=8.0)
+    delay = limiter.record_rate_limited({"Retry-After": "0.05"}, attempt=1)
+    assert limiter.rate == 4.0
+    assert 0.05 <= delay <= 0.07
+    start = time.monotonic()
+    waited = limiter.acquire()
+    assert waited >= 0.04
+    assert time.monotonic() - start >= 0.04
+
+
+def test_rate_never_drops_below_minimum():
+    limiter = RateLimiter(rate=1.0)
+    for attempt in range(1, 10):
+        limiter.record_rate_limited({"Retry-After": "0"}, attempt=attempt)
+    assert limiter.rate == MIN_RATE
+
+
+def test_remaining_budget_caps_rate():
+    limiter = RateLimiter(rate=20.0)
+    limiter.record_success({"RateLimit-Remaining": "10", "RateLimit-Reset": "5"})
+    assert limiter.rate == 2.0
+
+
+def test_acquire_paces_requests():
+    limiter = RateLimiter(rate=200.0)
+    start = time.monotonic()
+    for _ in range(31):
+        limiter.acquire()
+    # The bucket starts with a single token, the rest are paced at 200 per second
+    assert time.monotonic() - start >= 0.14
+
+
+def test_reserve_spaces_out_waits_without_blocking():
+    limiter = RateLimiter(rate=10.0)
+    start = time.monotonic()
+    waits = [limiter.reserve() for _ in range(4)]
+    assert time.monotonic() - start < 0.05
+    assert waits[0] == 0.0
+    assert [round(wait, 1) for wait in waits[1:]] == [0.1, 0.2, 0.3]
+
+
+def test_reserve_honours_rate_limit_pause():
+    limiter = RateLimiter()
+    limiter.record_rate_limited({"Retry-After": "2"}, attempt=1)
+    assert limiter.reserve() >= 2.0
@@ -0,0 +1,190 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+from click.testing import CliRunner
+
+from lumos.common.models import App, Permission, User
+from lumos.request.bulk import BulkRow, BulkRowError, Journal, LookupCache, iter_pending, read_rows
+
+APP = App(id=UUID(int=1), user_friendly_label="GitHub", app_class_id="github", instance_id="1")
+PERMISSIONS = [
+    Permission(id=UUID(int=10), label="Admin", app_id=str(APP.id), app_class_id="github", duration_options=["2 days"]),
+    Permission(id=UUID(int=11), label="Admin Read", app_id=str(APP.id), app_class_id="github"),
+]
+USERS = [
+    User(id=UUID(int=20), given_name="Ada", family_name="Lovelace", email="ada@example.com"),
+    User(id=UUID(int=21), given_name="Adam", family_name="Smith", email="adam@example.com"),
+]
+
+
+@pytest.fixture
+def client():
+    client = MagicMock()
+    client.get_appstore_apps.return_value = ([APP], 1, 1)
+    client.get_app_requestable_permissions.return_value = (PERMISSIONS, 2, 2)
+    client.get_users.return_value = (USERS, 2, 2)
+    return client
+
+
+def test_read_rows_csv(tmp_path):
+    path = tmp_path / "requests.csv"
+    path.write_text(
+        "app,permissions,user,reason,length\nGitHub,Admin;Admin Read,ada@example.com,onboarding,2 days\nGitHub,,,me,\n"
+    )
+    rows = read_rows(path)
+    assert rows[0] == BulkRow(
+        number=1,
+        app="GitHub",
+        reason="onboarding",
+        permissions=["Admin", "Admin Read"],
+        user="ada@example.com",
+        length="2 days",
+    )
+    assert rows[1] == BulkRow(number=2, app="GitHub", reason="me")
+
+
+def test_read_rows_jsonl(tmp_path):
+    path = tmp_path / "requests.jsonl"
+    path.write_text(
+        json.dumps({"app": "GitHub", "permissions": ["Admin"], "reason": "x", "length": 3600})
+        + "\n\n"
+        + json.dumps({"app": "GitHub", "permission": "Admin", "reason": "y"})
+        + "\n"
+    )
+    rows = read_rows(path)
+    assert [r.permissions for r in rows] == [["Admin"], ["Admin"]]
+    assert rows[0].length == "3600"
+
+
+def test_read_rows_requires_app_and_reason(tmp_path):
+    path = tmp_path / "requests.csv"
+    path.write_text("app,reason\nGitHub,\n")
+    with pytest.raises(BulkRowError, match="row 1: missing reason"):
+        read_rows(path)
+
+
+def test_journal_resumes_submitted_rows(tmp_path):
+    rows = [BulkRow(number=n, app="GitHub", reason=f"reason {n}") for n in range(1, 4)]
+    journal = Journal(tmp_path / "journal")
+    journal.record(rows[0], "submitted", request_id=UUID(int=1))
+    journal.record(rows[1], "failed", error="nope")
+    with journal.path.open("a") as f:
+        f.write('{"row": 3, "key": ')
+
+    resumed = Journal(journal.path)
+    assert [r.number for r in iter_pending(rows, resumed)] == [2, 3]
+
+
+def test_lookup_cache_resolves_names_once(client):
+    lookups = LookupCache(client)
+    row = BulkRow(number=1, app="github", reason="x", permissions=["admin"], user="ada@example.com", length="2d")
+    resolved = lookups.resolve(row)
+    lookups.resolve(row)
+    assert resolved.app == APP
+    assert resolved.permissions == [PERMISSIONS[0]]
+    assert resolved.user_id == USERS[0].id
+    assert resolved.expiration == 2 * 24 * 60 * 60
+    assert client.get_appstore_apps.call_count == 1
+    assert client.get_app_requestable_permissions.call_count == 1
+    assert client.get_users.call_count == 1
+
+
+DURATIONS = ["1 day", "1 day on call", "12 hours"]
+
+
+@pytest.mark.parametrize(
+    ("length", "expected"),
+    [("1 day", 24 * 60 * 60), ("12h", 12 * 60 * 60), ("unlimited", None), ("90", 90)],
+)
+def test_lookup_cache_expiration(client, length, expected):
+    permission = PERMISSIONS[0].model_copy(update={"duration_options": DURATIONS})
+    assert LookupCache(client).expiration(APP, [permission], length) == expected
+
+
+@pytest.mark.parametrize(("length", "error"), [("1d", "could be any of: 1 day, 1 day on call"), ("3d", "not one of")])
+def test_lookup_cache_expiration_must_fit_one_option(client, length, error):
+    permission = PERMISSIONS[0].model_copy(update={"duration_options": DURATIONS})
+    with pytest.raises(BulkRowError, match=error):
+        LookupCache(client).expiration(APP, [permission], length)
+
+
+def test_lookup_cache_shares_lookups_between_threads(client):
+    def slow_get_users(**kwargs):
+        time.sleep(0.05)
+        return USERS, 2, 2
+
+    client.get_users.side_effect = slow_get_users
+    lookups = LookupCache(client)
+    threads = [threading.Thread(target=lookups.user, args=("ada@example.com",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert client.get_users.call_count == 1
+
+
+def test_lookup_cache_rejects_ambiguous_names(client):
+    lookups = LookupCache(client)
+    with pytest.raises(BulkRowError, match="matches 2 users"):
+        lookups.user("Ad")
+    # Failures are remembered too, rather than retried for every row
+    with pytest.raises(BulkRowError):
+        lookups.user("Ad")
+    assert client.get_users.call_count == 1
+
+
+def test_bulk_submits_and_resumes(tmp_path, monkeypatch, client):
+    from lumos.request import cli as request_cli
+
+    monkeypatch.setattr(request_cli, "client", client)
+    monkeypatch.setattr("lumos.common.helpers.setup", lambda **kwargs: None)
+    client.create_access_request.side_effect = lambda **kwargs: MagicMock(id=UUID(int=99))
+    path = tmp_path / "requests.csv"
+    path.write_text("app,permissions,user,reason\nGitHub,Admin,ada@example.com,x\nGitHub,,Ad,y\n")
+
+    result = CliRunner().invoke(request_cli.bulk, ["--file", str(path)], standalone_mode=False)
+    assert isinstance(result.exception, SystemExit)
+    assert "1 requests submitted, 1 failed, 0 skipped" in result.output
+    client.create_access_request.assert_called_once_with(
+        app_id=APP.id,
+        note="x",
+        expiration_in_seconds=None,
+        permission_ids=[PERMISSIONS[0].id],
+        target_user_id=USERS[0].id,
+    )
+
+    path.write_text("app,permissions,user,reason\nGitHub,Admin,ada@example.com,x\nGitHub,,Adam Smith,y\n")
+    result = CliRunner().invoke(request_cli.bulk, ["--file", str(path)], standalone_mode=False)
+    assert result.exception is None
+    assert "1 requests submitted, 0 failed, 1 skipped" in result.output
+    assert client.create_access_request.call_count == 2
+
+
+def test_bulk_logs_in_again_on_the_main_thread(tmp_path, monkeypatch, client):
+    from lumos.common.client import LoginRequired
+    from lumos.request import cli as request_cli
+
+    monkeypatch.setattr(request_cli, "client", client)
+    monkeypatch.setattr("lumos.common.helpers.setup", lambda **kwargs: None)
+
+    def create_access_request(**kwargs):
+        # Like the client, which only logs in again on the main thread
+        if threading.current_thread() is not threading.main_thread():
+            raise LoginRequired(1)
+        return MagicMock(id=UUID(int=99))
+
+    client.create_access_request.side_effect = create_access_request
+    path = tmp_path / "requests.csv"
+    path.write_text("app,permissions,user,reason\nGitHub,Admin,ada@example.com,x\n")
+
+    result = CliRunner().invoke(request_cli.bulk, ["--file", str(path)], standalone_mode=False)
+    assert result.exception is None
+    assert "1 requests submitted, 0 failed, 0 skipped" in result.output
+    client.get_current_user_id.assert_called_once_with()
+    # The row that needed a login isn't journaled as failed
+    journal = path.with_name("requests.csv.journal").read_text().splitlines()
+    assert [json.loads(line)["status"] for line in journal] == ["submitted"]
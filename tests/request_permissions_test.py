@@ -0,0 +1,36 @@
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+
+from lumos.common.models import App, Permission
+from lumos.request import cli as request_cli
+
+APP = App(id=UUID(int=1), user_friendly_label="GitHub", app_class_id="github", instance_id="1")
+ADMIN = Permission(id=UUID(int=10), label="Admin", app_id=str(APP.id), app_class_id="github")
+OTHER_APP = Permission(id=UUID(int=11), label="Owner", app_id=str(UUID(int=2)), app_class_id="github")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = MagicMock()
+    client.get_app_requestable_permissions_by_id.side_effect = lambda ids: {
+        id: {ADMIN.id: ADMIN, OTHER_APP.id: OTHER_APP}.get(id) for id in ids
+    }
+    monkeypatch.setattr(request_cli, "client", client)
+    return client
+
+
+def test_valid_permissions(client):
+    assert request_cli.get_valid_permissions(APP, [ADMIN.id], True) == [ADMIN]
+    client.get_app_requestable_permissions_by_id.assert_called_once_with([ADMIN.id])
+
+
+def test_every_invalid_permission_is_reported(client, capsys):
+    with pytest.raises(SystemExit):
+        request_cli.get_valid_permissions(APP, [ADMIN.id, OTHER_APP.id, UUID(int=12)], False)
+    assert capsys.readouterr().err.splitlines() == [
+        "GitHub only allows one permission per request",
+        f"Permission {OTHER_APP.id} (Owner) isn't for GitHub",
+        f"Permission {UUID(int=12)} not found",
+    ]
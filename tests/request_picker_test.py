@@ -0,0 +1,130 @@
+import threading
+from unittest.mock import MagicMock, patch
+from uuid import UUID
+
+import pytest
+
+from lumos.common.client import ApiClient, LoginRequired
+from lumos.common.models import User
+from lumos.request import cli as request_cli
+from lumos.request import picker
+from lumos.request.picker import Candidates, fuzzy_score
+
+NAMES = [("Ada", "Lovelace"), ("Adam", "Smith"), ("Grace", "Hopper"), ("Canada", "Dry"), ("Alan", "Turing")]
+USERS = [
+    User(id=UUID(int=n), given_name=given, family_name=family, email=f"{given}.{family}@example.com".lower())
+    for n, (given, family) in enumerate(NAMES)
+]
+
+
+def loader(users: list[User]) -> MagicMock:
+    def load(like, limit):
+        yield from [u for u in users if not like or like.lower() in u.email][:limit]
+
+    return MagicMock(side_effect=load)
+
+
+@pytest.mark.parametrize(
+    ("query", "better", "worse"),
+    [
+        ("ada", "ada lovelace", "adam smith"),
+        ("ada", "adam smith", "canada dry"),
+        ("ada", "canada dry", "alan dare"),
+        ("gr hop", "grace hopper", "george hopkins"),
+    ],
+)
+def test_fuzzy_score_ranks_word_starts_first(query, better, worse):
+    better_score, worse_score = fuzzy_score(query.split(), better), fuzzy_score(query.split(), worse)
+    assert better_score is not None
+    assert worse_score is not None
+    assert better_score > worse_score
+
+
+def test_fuzzy_score_needs_every_word():
+    assert fuzzy_score(["ada", "zz"], "ada lovelace") is None
+    assert fuzzy_score(["alt"], "alan turing") is not None
+
+
+def test_searches_are_answered_locally():
+    load = loader(USERS)
+    users = Candidates("users", load)
+    assert [u.given_name for u in users.search("ada")] == ["Ada", "Adam", "Canada"]
+    assert [u.given_name for u in users.search("ad smi")] == ["Adam"]
+    assert users.search() == USERS
+    load.assert_called_once_with(None, picker.MAX_CANDIDATES)
+
+
+def test_spread_out_letters_only_match_when_nothing_has_the_words():
+    users = Candidates("users", loader(USERS))
+    assert fuzzy_score(["ala"], "ada lovelace") is not None
+    assert [u.given_name for u in users.search("ala")] == ["Alan"]
+    assert [u.given_name for u in users.search("alt")] == ["Alan"]
+
+
+def test_too_many_candidates_search_the_api(monkeypatch):
+    monkeypatch.setattr(picker, "MAX_CANDIDATES", 3)
+    load = loader(USERS)
+    users = Candidates("users", load)
+    assert len(users.search()) == 3
+    assert [u.given_name for u in users.search("grace")] == ["Grace"]
+    load.assert_called_with("grace", 3)
+
+
+def test_loading_many_candidates_never_asks_to_continue():
+    client = ApiClient()
+
+    def get_paged(endpoint, params=None, page=1, page_size=100):
+        return [{"n": n} for n in range(page_size)], page_size, 20000, page, -(-20000 // page_size)
+
+    with (
+        patch.object(client, "get_paged", side_effect=get_paged),
+        patch("lumos.common.client.confirm", side_effect=AssertionError("asked to continue")),
+    ):
+        rows = [row for page in client.iter_pages("users", limit=picker.MAX_CANDIDATES) for row in page]
+    assert len(rows) == picker.MAX_CANDIDATES
+
+
+def test_candidates_that_need_a_login_load_on_the_main_thread():
+    def load(like, limit):
+        if threading.current_thread() is not threading.main_thread():
+            raise LoginRequired("log in")
+        yield from USERS
+
+    assert Candidates("users", load).search() == USERS
+
+
+def test_closed_candidates_stop_loading():
+    loaded_one, release = threading.Event(), threading.Event()
+
+    def load(like, limit):
+        yield USERS[0]
+        loaded_one.set()
+        release.wait(5)
+        yield from USERS[1:]
+
+    users = Candidates("users", load)
+    assert loaded_one.wait(5)
+    users.close()
+    release.set()
+    assert users.search() == [USERS[0]]
+
+
+def test_narrow_asks_until_few_enough_match(monkeypatch):
+    monkeypatch.setattr(picker, "PICK_LIMIT", 2)
+    answers = iter(["zzz", "ada love"])
+    with patch.object(picker, "prompt", side_effect=lambda text: next(answers)) as prompt:
+        assert [u.given_name for u in Candidates("users", loader(USERS)).narrow("a")] == ["Ada"]
+    assert prompt.call_count == 2
+    assert [call.args[0].splitlines()[0] for call in prompt.call_args_list] == [
+        "5 users found. Too many to show.",
+        "No users found for 'zzz'",
+    ]
+
+
+def test_select_user_loads_users_once(monkeypatch):
+    client = MagicMock()
+    client.iter_users.side_effect = lambda like=None, limit=None: iter(USERS)
+    monkeypatch.setattr(request_cli, "client", client)
+    with patch.object(picker, "prompt", return_value="grace"):
+        assert request_cli.select_user("gr hop") == USERS[2].id
+    client.iter_users.assert_called_once_with(like=None, limit=picker.MAX_CANDIDATES)
@@ -0,0 +1,154 @@
+import threading
+from concurrent.futures import CancelledError
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+from click.testing import CliRunner
+
+from lumos.common.client import LoginRequired
+from lumos.common.models import (
+    AccessRequest,
+    App,
+    AppSetting,
+    AppSettingProvisioning,
+    Permission,
+    ProvisioningMethodOption,
+    User,
+)
+from lumos.request import cli as request_cli
+from lumos.request.prefetch import Prefetch
+
+ME = User(id=UUID(int=1), given_name="Ada", family_name="Lovelace", email="ada@example.com")
+APP = App(id=UUID(int=2), user_friendly_label="GitHub", app_class_id="github", instance_id="1")
+ADMIN = Permission(id=UUID(int=3), label="Admin", app_id=str(APP.id), app_class_id="github")
+SETTINGS = AppSetting(
+    custom_request_instructions="",
+    provisioning=AppSettingProvisioning(
+        groups_provisioning=ProvisioningMethodOption.GROUPS_AND_VISIBLE, allow_multiple_permission_selection=False
+    ),
+)
+EXISTING = AccessRequest(
+    id=UUID(int=4),
+    app_id=APP.id,
+    app_name="GitHub",
+    status="PENDING",
+    requested_at="2024-01-01T00:00:00",
+    expires_at=None,
+    requester_user=ME,
+    supporter_user=None,
+    target_user=ME,
+    requestable_permissions=[ADMIN],
+)
+ARGS = ["--for-me", "--app", str(APP.id), "--reason", "deploys", "--no-wait", "--dry-run"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    client = MagicMock()
+    client.get_appstore_app.return_value = APP
+    client.get_my_apps.return_value = []
+    monkeypatch.setattr(request_cli, "client", client)
+    monkeypatch.setattr("lumos.common.helpers.setup", lambda **kwargs: None)
+    return client
+
+
+def test_permissions_are_picked_from_the_app(client):
+    client.get_appstore_app_setting.return_value = SETTINGS
+    client.iter_app_requestable_permissions.side_effect = lambda app_id, search_term=None, limit=None: iter([ADMIN])
+    result = CliRunner().invoke(request_cli.request, ARGS)
+    assert result.exit_code == 0, result.output
+    assert "--permission 00000000-0000-0000-0000-000000000003" in result.output
+    client.get_my_apps.assert_called_once_with(None, limit=request_cli.MAX_CANDIDATES)
+
+
+def test_permissions_load_while_the_settings_are_fetched(client):
+    loading = threading.Event()
+
+    def iter_app_requestable_permissions(app_id, search_term=None, limit=None):
+        loading.set()
+        return iter([ADMIN])
+
+    def get_appstore_app_setting(app_id):
+        assert loading.wait(5)
+        return SETTINGS
+
+    client.iter_app_requestable_permissions.side_effect = iter_app_requestable_permissions
+    client.get_appstore_app_setting.side_effect = get_appstore_app_setting
+    result = CliRunner().invoke(request_cli.request, ARGS)
+    assert result.exit_code == 0, result.output
+    assert "--permission 00000000-0000-0000-0000-000000000003" in result.output
+
+
+def test_permissions_are_not_offered_for_apps_without_visible_groups(client):
+    client.get_appstore_app_setting.return_value = AppSetting(
+        custom_request_instructions="",
+        provisioning=AppSettingProvisioning(
+            groups_provisioning=ProvisioningMethodOption.DIRECT_TO_USER, allow_multiple_permission_selection=False
+        ),
+    )
+    result = CliRunner().invoke(request_cli.request, ARGS)
+    assert result.exit_code == 0, result.output
+    assert "--permission" not in result.output
+
+
+def test_duplicate_request_is_flagged(client):
+    client.get_appstore_app_setting.return_value = SETTINGS
+    client.get_my_apps.return_value = [EXISTING]
+    client.get_app_requestable_permissions_by_id.return_value = {ADMIN.id: ADMIN}
+    result = CliRunner().invoke(request_cli.request, [*ARGS, "--permission", str(ADMIN.id)])
+    assert result.exit_code == 0, result.output
+    assert f"There's already a request for this app and permission (ID {EXISTING.id}, PENDING)" in result.stderr
+    client.iter_app_requestable_permissions.assert_not_called()
+
+
+def test_prefetch_errors_are_raised_by_get():
+    prefetch = Prefetch()
+    prefetch.start("user", MagicMock(side_effect=SystemExit(1)))
+    prefetch.start("user", MagicMock(return_value="never called"))
+    with pytest.raises(SystemExit):
+        prefetch.get("user")
+
+
+def test_calls_that_need_to_log_in_again_run_on_the_caller():
+    threads = []
+
+    def get_my_apps():
+        threads.append(threading.current_thread())
+        if len(threads) == 1:
+            raise LoginRequired("log in")
+        return [EXISTING]
+
+    prefetch = Prefetch()
+    prefetch.start("my_apps", get_my_apps)
+    assert prefetch.get("my_apps") == [EXISTING]
+    assert threads[0] is not threading.main_thread()
+    assert threads[1] is threading.main_thread()
+
+
+def test_close_drops_calls_that_havent_started():
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+
+    prefetch = Prefetch(max_workers=1)
+    prefetch.start("slow", slow)
+    assert started.wait(5)
+    prefetch.start("queued", MagicMock())
+    prefetch.close()
+    release.set()
+    with pytest.raises(CancelledError):
+        prefetch.get("queued")
+
+
+def test_calls_still_running_dont_hold_up_the_exit():
+    release = threading.Event()
+    prefetch = Prefetch()
+    prefetch.start("slow", release.wait, 5)
+    prefetch.close()
+    running = [t for t in threading.enumerate() if t.name.startswith("prefetch")]
+    assert running
+    assert all(t.daemon for t in running)
+    release.set()
@@ -0,0 +1,230 @@
+import json
+import threading
+from unittest.mock import MagicMock
+from uuid import UUID
+
+import pytest
+from click.testing import CliRunner
+
+from lumos.common.client import LoginRequired
+from lumos.common.models import AccessRequest, User
+from lumos.request.watch import MAX_INTERVAL, MIN_INTERVAL, RequestWatcher
+
+ME = User(id=UUID(int=1), given_name="Ada", family_name="Lovelace", email="ada@example.com")
+
+
+def access_request(i: int, status: str = "PENDING") -> AccessRequest:
+    return AccessRequest(
+        id=UUID(int=100 + i),
+        app_id=UUID(int=2),
+        app_name="GitHub",
+        status=status,
+        # Newest first, like the API sorts them
+        requested_at=f"2024-01-01T00:{59 - i:02d}:00",
+        expires_at=None,
+        requester_user=ME,
+        supporter_user=None,
+        target_user=ME,
+    )
+
+
+class FakeApi:
+    """Serves access requests in pages, newest first, counting what gets called."""
+
+    max_concurrency = 4
+
+    def __init__(self, count: int, page_size: int = 2):
+        self.requests = [access_request(i) for i in range(count)]
+        self.page_size = page_size
+        self.list_calls = 0
+        # Requests the API fails to return, as if it answered with a 503
+        self.failing: set[UUID] = set()
+        self.get_request_status = MagicMock(side_effect=self._get)
+
+    def set_status(self, i: int, status: str) -> None:
+        self.requests[i] = access_request(i, status)
+
+    def get_access_requests(self, target_user_id=None, status=None, all=False, page_size=100, page=1):
+        self.list_calls += 1
+        matching = [r for r in self.requests if not status or r.status in status]
+        if all:
+            return matching, len(matching), len(matching), 1, 1
+        items = matching[(page - 1) * self.page_size : page * self.page_size]
+        pages = max(1, -(-len(matching) // self.page_size))
+        return items, len(items), len(matching), page, pages
+
+    def _get(self, id: UUID, missing_ok: bool = False) -> AccessRequest | None:
+        if id in self.failing:
+            raise SystemExit(1)
+        for r in self.requests:
+            if r.id == id:
+                return r
+        if missing_ok:
+            return None
+        raise SystemExit(1)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_first_refresh_finds_requests_by_id():
+    api = FakeApi(5)
+    api.set_status(1, "COMPLETED")
+    watcher = RequestWatcher(api)
+    for i in (0, 1):
+        watcher.add(access_request(i).id)
+    watcher.add(UUID(int=999))
+
+    events = list(watcher.refresh(list(watcher.requests.values())))
+
+    assert [(e["event"], e.get("status")) for e in events] == [
+        ("status", "PENDING"),
+        ("status", "COMPLETED"),
+        ("not_found", None),
+    ]
+    # The finished and unknown requests can't be found among recent ones without a cutoff
+    assert api.get_request_status.call_count == 2
+    assert watcher.pending == [watcher.requests[access_request(0).id]]
+
+
+def test_failed_lookups_are_tried_again():
+    api = FakeApi(1)
+    api.set_status(0, "COMPLETED")
+    watcher = RequestWatcher(api)
+    watcher.add(access_request(0).id)
+    api.failing.add(access_request(0).id)
+
+    assert list(watcher.refresh(list(watcher.requests.values()))) == []
+    assert watcher.pending == [watcher.requests[access_request(0).id]]
+
+    api.failing.clear()
+    events = list(watcher.refresh(watcher.pending))
+    assert [(e["event"], e.get("status")) for e in events] == [("status", "COMPLETED")]
+
+
+def test_lookups_that_need_a_login_are_made_on_the_main_thread():
+    api = FakeApi(1)
+    api.set_status(0, "COMPLETED")
+    get = api.get_request_status.side_effect
+
+    def get_request_status(id, missing_ok=False):
+        if threading.current_thread() is not threading.main_thread():
+            raise LoginRequired(1)
+        return get(id, missing_ok)
+
+    api.get_request_status.side_effect = get_request_status
+    watcher = RequestWatcher(api)
+    watcher.add(access_request(0).id)
+
+    events = list(watcher.refresh(list(watcher.requests.values())))
+    assert [(e["event"], e.get("status")) for e in events] == [("status", "COMPLETED")]
+
+
+def test_watch_streams_transitions_until_done():
+    api = FakeApi(6)
+    clock = FakeClock()
+    watcher = RequestWatcher(api, clock=clock, sleep=clock.sleep)
+    listed = [watcher.add_known(r) for r in api.requests]
+    assert all(e is not None and e["previous_status"] is None for e in listed)
+
+    events = watcher.run()
+    api.set_status(0, "PENDING_APPROVAL")
+    first = next(events)
+    assert (first["id"], first["previous_status"], first["status"], first["done"]) == (
+        str(access_request(0).id),
+        "PENDING",
+        "PENDING_APPROVAL",
+        False,
+    )
+    for i in range(6):
+        api.set_status(i, "COMPLETED" if i % 2 else "DENIED")
+    rest = list(events)
+
+    assert sorted(e["id"] for e in rest) == sorted(str(r.id) for r in api.requests)
+    assert all(e["done"] for e in rest)
+    # Finished requests were found by listing, never fetched one at a time
+    api.get_request_status.assert_not_called()
+
+
+def test_unchanged_requests_back_off():
+    api = FakeApi(1)
+    clock = FakeClock()
+    watcher = RequestWatcher(api, clock=clock, sleep=clock.sleep)
+    watcher.add_known(api.requests[0])
+    watched = watcher.requests[api.requests[0].id]
+
+    intervals = []
+    for _ in range(6):
+        clock.now = watched.next_check
+        list(watcher.refresh([watched]))
+        intervals.append(watched.interval)
+    assert intervals == [10.0, 20.0, 40.0, MAX_INTERVAL, MAX_INTERVAL, MAX_INTERVAL]
+
+    api.set_status(0, "PENDING_APPROVAL")
+    clock.now = watched.next_check
+    list(watcher.refresh([watched]))
+    assert watched.interval == MIN_INTERVAL
+
+
+def test_refresh_stops_paging_once_every_request_is_seen():
+    api = FakeApi(20)
+    watcher = RequestWatcher(api)
+    for r in api.requests:
+        watcher.add_known(r)
+
+    list(watcher.refresh([watcher.requests[api.requests[2].id]]))
+    # The request is on the second page of ten
+    assert api.list_calls == 2
+
+
+def test_timeout_reports_pending_requests():
+    api = FakeApi(2)
+    clock = FakeClock()
+    watcher = RequestWatcher(api, clock=clock, sleep=clock.sleep)
+    for r in api.requests:
+        watcher.add_known(r)
+
+    events = list(watcher.run(timeout=30))
+
+    assert events[-1]["event"] == "timeout"
+    assert events[-1]["pending"] == [str(r.id) for r in api.requests]
+    assert clock.now == 30
+
+
+@pytest.mark.parametrize("args", [[], ["--mine"]])
+def test_watch_command_needs_something_to_watch(monkeypatch, args):
+    from lumos.request import cli as request_cli
+
+    monkeypatch.setattr("lumos.common.helpers.setup", lambda **kwargs: None)
+    result = CliRunner().invoke(request_cli.watch, args, standalone_mode=False)
+    assert isinstance(result.exception, SystemExit)
+
+
+def test_watch_command_follows_journal(tmp_path, monkeypatch):
+    from lumos.request import cli as request_cli
+
+    api = FakeApi(3)
+    api.set_status(0, "COMPLETED")
+    monkeypatch.setattr(request_cli, "client", api)
+    monkeypatch.setattr("lumos.common.helpers.setup", lambda **kwargs: None)
+    journal = tmp_path / "requests.csv.journal"
+    journal.write_text(
+        json.dumps({"row": 1, "key": "a", "status": "submitted", "request_id": str(api.requests[0].id)})
+        + "\n"
+        + json.dumps({"row": 2, "key": "b", "status": "failed", "error": "nope"})
+        + "\n"
+    )
+
+    result = CliRunner().invoke(request_cli.watch, ["--journal", str(journal)], standalone_mode=False)
+
+    assert result.exception is None
+    events = [json.loads(line) for line in result.output.splitlines()]
+    assert [(e["id"], e["status"]) for e in events] == [(str(api.requests[0].id), "COMPLETED")]